@@ -22,7 +22,3 @@ classifiers = [
     'Operating System :: POSIX :: Linux',
 ]
 description = 'Study time management tool'
-
-with open('README.md', 'r') as fh:
-    # pylint: disable=C0103
-    long_description = fh.read()
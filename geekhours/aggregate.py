@@ -0,0 +1,85 @@
+""" aggregate.py is a module to compute the reports of 'geekhours sum' in one pass. """
+
+__all__ = ['MONTHS_AND_DAYS', 'Summary']
+
+from typing import Dict
+
+# Day numbers of strftime('%w') and month numbers of strftime('%m')
+MONTHS_AND_DAYS = {
+    '01': 'Jan',
+    '02': 'Feb',
+    '03': 'Mar',
+    '04': 'Apr',
+    '05': 'May',
+    '06': 'Jun',
+    '07': 'Jul',
+    '08': 'Aug',
+    '09': 'Sep',
+    '10': 'Oct',
+    '11': 'Nov',
+    '12': 'Dec',
+    '0': 'Sun',
+    '1': 'Mon',
+    '2': 'Tue',
+    '3': 'Wed',
+    '4': 'Thu',
+    '5': 'Fri',
+    '6': 'Sat',
+}
+
+
+class Summary:
+    """ Summary accumulates the total minutes per course, day of week and month.
+
+    The rows of Database.get_summary() are added one by one, so all the
+    reports of 'geekhours sum' are built from a single scan of donelist.
+    """
+
+    def __init__(self):
+        self.total = None
+        self.course = {}
+        self.week = {}
+        self.month = {}
+
+    def add(self, course: str, week: str, month: str, minutes: int):
+        """ Add minutes studied.
+
+        Args:
+            course: Course name.
+            week: Day number of week, '0' (Sunday) to '6' (Saturday).
+            month: Month number, '01' to '12'.
+            minutes: Minutes studied.
+        """
+        self.total = (self.total or 0) + minutes
+        self.course[course] = self.course.get(course, 0) + minutes
+        self.week[week] = self.week.get(week, 0) + minutes
+        self.month[month] = self.month.get(month, 0) + minutes
+
+    def to_dict(self) -> Dict:
+        """ Return the total hours in the format of Command.show_total_hours(). """
+        total = self.total / 60.0 if self.total is not None else None
+
+        return {
+            'total_hours': {
+                'Total: ': total
+            },
+            'total_hours_per_course': self.to_hours(self.course),
+            'total_hours_per_week': self.to_hours(self.week, MONTHS_AND_DAYS),
+            'total_hours_per_month': self.to_hours(self.month, MONTHS_AND_DAYS),
+        }
+
+    @staticmethod
+    def to_hours(minutes: Dict, names: Dict = None) -> Dict:
+        """ Convert minutes to hours in the order of the keys.
+
+        Args:
+            minutes: Dictionary of minutes.
+            names: Dictionary to rename the keys.
+        """
+        hours = {}
+
+        for key in sorted(minutes):
+            name = names[key] if names else key
+            hours[name] = minutes[key] / 60.0
+
+        return hours
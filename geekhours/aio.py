@@ -0,0 +1,304 @@
+""" aio.py is a module to call Database and Command from asyncio.
+
+AsyncDatabase and AsyncCommand mirror the public methods of Database and
+Command as coroutines. The calls run on a dedicated worker thread which
+opens and owns the sqlite3 connection, so the event loop is not blocked by
+the disk I/O.
+
+The calls queued while the worker is busy are run together in one
+transaction, which takes the write lock only if one of them writes. Each
+call runs in its own savepoint, so a call raising an exception rolls back
+its own statements only. The results are returned once the transaction is
+committed.
+
+A method returning an iterator such as iter_rows() returns an
+AsyncIterator, which fetches the rows on the worker thread in chunks.
+"""
+
+__all__ = ['AsyncIterator', 'AsyncDatabase', 'AsyncCommand']
+
+import asyncio
+import functools
+import inspect
+import queue
+import threading
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future
+from itertools import islice
+from typing import Callable
+from geekhours.command import Command
+from geekhours.database import Database
+
+# Methods writing to the database. A batch with one of them takes the write lock first.
+WRITES = {
+    'import_course',
+    'import_donelist',
+    'insert_course',
+    'insert_donelist',
+    'insert_donelist_many',
+    'merge',
+    'rebuild_rollups',
+    'remove_course',
+    'remove_donelist',
+}
+
+# Methods managing their own transaction, which run outside the batches.
+UNBATCHED = {'create_table', 'migrate', 'merge', 'close_db'}
+
+# Methods which are not mirrored: the worker makes the batches.
+EXCLUDED = {'batch'}
+
+# Maximum number of calls run in one transaction.
+MAX_BATCH = 100
+
+# Number of rows fetched at a time by AsyncIterator.
+CHUNK_SIZE = 1000
+
+
+class _Job:
+    """ A call queued to the worker thread. """
+
+    def __init__(self, function: Callable, write: bool, batched: bool):
+        self.function = function
+        self.write = write
+        self.batched = batched
+        self.future = Future()
+
+
+class _Worker(threading.Thread):
+    """ Thread which owns the connection and runs the queued calls in batches.
+
+    Args:
+        factory: Function returning the Database or Command, called on the thread.
+        max_batch: Maximum number of calls run in one transaction.
+    """
+
+    def __init__(self, factory: Callable, max_batch: int = MAX_BATCH):
+        super().__init__(name='geekhours', daemon=True)
+        self._factory = factory
+        self._max_batch = max_batch
+        self._jobs = queue.Queue()
+        self._target = None
+        self._error = None
+
+    def submit(self, function: Callable, write: bool = True, batched: bool = True) -> Future:
+        """ Queue function(target) and return the Future of its result. """
+        job = _Job(function, write, batched)
+        self._jobs.put(job)
+        return job.future
+
+    def stop(self):
+        """ Let the thread exit once the queued calls have run. """
+        self._jobs.put(None)
+
+    def run(self):
+        try:
+            self._target = self._factory()
+        except Exception as error:  # pylint: disable=broad-except
+            self._error = error
+
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            if not job.batched:
+                self._run([job], batch=False)
+                continue
+
+            jobs = [job]
+            stop = False
+            while len(jobs) < self._max_batch:
+                try:
+                    job = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                if not job.batched:
+                    # Keep the order of the calls: run the batch, then this call.
+                    self._run(jobs, batch=True)
+                    jobs = []
+                    self._run([job], batch=False)
+                    continue
+                jobs.append(job)
+
+            if jobs:
+                self._run(jobs, batch=True)
+            if stop:
+                break
+
+    def _database(self) -> Database:
+        """ Return the Database of the target. """
+        return self._target.database if isinstance(self._target, Command) else self._target
+
+    def _run(self, jobs: list, batch: bool):
+        """ Run jobs, in one transaction if batch, and set their results. """
+        jobs = [job for job in jobs if job.future.set_running_or_notify_cancel()]
+        if not jobs:
+            return
+        if self._error:
+            for job in jobs:
+                job.future.set_exception(self._error)
+            return
+
+        if not batch:
+            for job in jobs:
+                try:
+                    job.future.set_result(self._call(job))
+                except Exception as error:  # pylint: disable=broad-except
+                    job.future.set_exception(error)
+            return
+
+        database = self._database()
+        outcomes = []
+        try:
+            with database.batch(immediate=any(job.write for job in jobs)):
+                for job in jobs:
+                    database.con.execute('SAVEPOINT job')
+                    try:
+                        outcomes.append((job, self._call(job), None))
+                    except Exception as error:  # pylint: disable=broad-except
+                        database.con.execute('ROLLBACK TO job')
+                        outcomes.append((job, None, error))
+                    database.con.execute('RELEASE job')
+        except Exception as error:  # pylint: disable=broad-except
+            # The transaction is rolled back: none of the calls took effect.
+            for job in jobs:
+                job.future.set_exception(error)
+            return
+
+        for job, result, error in outcomes:
+            if error is None:
+                job.future.set_result(result)
+            else:
+                job.future.set_exception(error)
+
+    def _call(self, job: _Job):
+        """ Return the result of job, with an iterator wrapped in AsyncIterator. """
+        result = job.function(self._target)
+        if isinstance(result, Iterator):
+            return AsyncIterator(self, result)
+        return result
+
+
+class AsyncIterator:
+    """ Asynchronous iterator over an iterator of the worker thread.
+
+    The items are fetched on the worker thread size items at a time.
+    """
+
+    def __init__(self, worker: _Worker, iterator: Iterator, size: int = CHUNK_SIZE):
+        self._worker = worker
+        self._iterator = iterator
+        self._size = size
+        self._buffer = deque()
+        self._exhausted = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._buffer and not self._exhausted:
+            chunk = await asyncio.wrap_future(
+                self._worker.submit(lambda _: list(islice(self._iterator, self._size)),
+                                    write=False))
+            self._buffer.extend(chunk)
+            self._exhausted = len(chunk) < self._size
+        if not self._buffer:
+            raise StopAsyncIteration
+        return self._buffer.popleft()
+
+
+def _coroutine(name: str, method: Callable) -> Callable:
+    """ Return a coroutine function calling the method name of the target on the worker. """
+
+    @functools.wraps(method)
+    async def coroutine(self, *args, **kwargs):
+        return await asyncio.wrap_future(
+            self._worker.submit(lambda target: getattr(target, name)(*args, **kwargs),
+                                write=name in WRITES,
+                                batched=name not in UNBATCHED))
+
+    return coroutine
+
+
+def _mirror(cls: type, target: type) -> type:
+    """ Add the public methods of target to cls as coroutine functions.
+
+    The static methods do not access the database and are not mirrored.
+    """
+    for name, method in inspect.getmembers(target, inspect.isfunction):
+        if (not name.startswith('_') and name not in EXCLUDED and not hasattr(cls, name)
+                and not isinstance(inspect.getattr_static(target, name), staticmethod)):
+            setattr(cls, name, _coroutine(name, method))
+    return cls
+
+
+class _AsyncProxy:
+    """ Base class of AsyncDatabase and AsyncCommand.
+
+    Args:
+        factory: Function creating the Database or Command on the worker thread.
+        close: Function closing the database of the Database or Command.
+        max_batch: Maximum number of calls run in one transaction.
+    """
+
+    def __init__(self, factory: Callable, close: Callable, max_batch: int = MAX_BATCH):
+        self._close = close
+        self._worker = _Worker(factory, max_batch)
+        self._worker.start()
+
+    async def run(self, function: Callable, write: bool = True):
+        """ Call function with the Database or Command on the worker thread.
+
+        The call is batched with the other calls like the methods.
+
+        Args:
+            function: Function taking the Database or Command.
+            write: Whether function writes to the database.
+        """
+        return await asyncio.wrap_future(self._worker.submit(function, write=write))
+
+    async def close(self):
+        """ Close the database once the queued calls have run and stop the worker thread. """
+        closing = self._worker.submit(self._close, batched=False)
+        self._worker.stop()
+        await asyncio.wrap_future(closing)
+        await asyncio.get_event_loop().run_in_executor(None, self._worker.join)
+
+
+@functools.partial(_mirror, target=Database)
+class AsyncDatabase(_AsyncProxy):
+    """ AsyncDatabase calls the methods of a Database on a worker thread.
+
+    Args:
+        db_name: Path of the database.
+        profile: Name of tuning.PROFILES.
+        max_batch: Maximum number of calls run in one transaction.
+    """
+
+    def __init__(self, db_name: str, profile: str = None, max_batch: int = MAX_BATCH):
+        super().__init__(lambda: Database(db_name, profile), Database.close_db, max_batch)
+
+    async def close_db(self):
+        """ Close the database and stop the worker thread. """
+        await self.close()
+
+
+@functools.partial(_mirror, target=Command)
+class AsyncCommand(_AsyncProxy):
+    """ AsyncCommand calls the methods of a Command on a worker thread.
+
+    The database is opened and its tables are created on the worker thread.
+
+    Args:
+        db_name: Path of the database.
+        profile: Name of tuning.PROFILES.
+        max_batch: Maximum number of calls run in one transaction.
+    """
+
+    def __init__(self, db_name: str, profile: str = None, max_batch: int = MAX_BATCH):
+        super().__init__(lambda: Command(db_name, profile),
+                         lambda command: command.database.close_db(), max_batch)
@@ -0,0 +1,252 @@
+""" analytics.py is a module to compute the trends of the study time.
+
+DailyMatrix loads the minutes per course and day once, as a dense matrix
+with a row per course and a column per day, and computes the metrics of
+'geekhours stats' from it with operations on whole rows:
+
+    rolling_average(): Average minutes per day over trailing windows.
+    streaks(): Longest and current runs of days with study time.
+    percentiles(): Percentiles of the length of the sessions (records).
+    week_over_week(): Minutes of the last 7 days against the 7 days before.
+
+NumPy is used if it is installed. Otherwise the rows are array('d') and
+the same metrics are computed in pure Python, with the same results.
+"""
+
+__all__ = ['DailyMatrix', 'PERCENTILES', 'WINDOWS']
+
+from array import array
+from datetime import date
+from itertools import accumulate
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Windows of the rolling averages in days
+WINDOWS = (7, 30)
+
+# Percentiles of the session length
+PERCENTILES = (25, 50, 75, 90)
+
+
+class DailyMatrix:
+    """ DailyMatrix holds the minutes per course and day.
+
+    Args:
+        names: Course names, one per row.
+        first: Ordinal of the day of the first column.
+        days: Number of days, the columns of the matrix.
+        minutes: Rows of minutes per day, a 2-D numpy.ndarray or a list of
+                 array('d') of the same length.
+    """
+
+    def __init__(self, names: List[str], first: int, days: int, minutes):
+        self.names = names
+        self.first = first
+        self.days = days
+        self.minutes = minutes
+        self.numpy = numpy is not None and isinstance(minutes, numpy.ndarray)
+
+    @classmethod
+    def from_rows(cls,
+                  rows: Iterable[Tuple[str, int, int]],
+                  first: int = None,
+                  last: int = None,
+                  use_numpy: bool = None) -> 'DailyMatrix':
+        """ Build the matrix of (course, day ordinal, minutes) rows.
+
+        The rows of Database.get_daily_minutes() are accepted as is.
+
+        Args:
+            first: Ordinal of the first day. The first day of the rows if omitted.
+            last: Ordinal of the last day. The last day of the rows if omitted.
+            use_numpy: Use NumPy. If omitted, NumPy is used if it is installed.
+
+        Raises:
+            ValueError: use_numpy is True and NumPy is not installed.
+        """
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        elif use_numpy and numpy is None:
+            raise ValueError('NumPy is not installed.')
+
+        rows = list(rows)
+        if first is None:
+            first = min((day for _, day, _ in rows), default=date.today().toordinal())
+        if last is None:
+            last = max((day for _, day, _ in rows), default=first - 1)
+        days = max(last - first + 1, 0)
+
+        names = sorted({name for name, day, _ in rows if first <= day <= last})
+        index = {name: i for i, name in enumerate(names)}
+
+        if use_numpy:
+            minutes = numpy.zeros((len(names), days))
+            for name, day, mins in rows:
+                if first <= day <= last:
+                    minutes[index[name], day - first] += mins
+        else:
+            minutes = [array('d', bytes(8 * days)) for _ in names]
+            for name, day, mins in rows:
+                if first <= day <= last:
+                    minutes[index[name]][day - first] += mins
+
+        return cls(names, first, days, minutes)
+
+    def totals(self):
+        """ Return the total minutes per day of all the courses. """
+        if self.numpy:
+            return self.minutes.sum(axis=0)
+        if not self.minutes:
+            return array('d', bytes(8 * self.days))
+        return array('d', map(sum, zip(*self.minutes)))
+
+    def rolling_average(self, window: int) -> Tuple[List, List]:
+        """ Return the average minutes per day over the trailing window of each day.
+
+        The days less than window days after the first day are averaged
+        over the days so far.
+
+        Returns:
+            The series of each course and the series of the totals.
+        """
+        if self.numpy:
+            matrix = numpy.vstack([self.minutes, self.totals()])
+            sums = numpy.concatenate([numpy.zeros(
+                (matrix.shape[0], 1)), matrix.cumsum(axis=1)],
+                                     axis=1)
+            ends = numpy.arange(1, self.days + 1)
+            starts = numpy.maximum(ends - window, 0)
+            averages = (sums[:, ends] - sums[:, starts]) / (ends - starts)
+            return list(averages[:-1]), averages[-1]
+
+        def average(series):
+            sums = [0.0] + list(accumulate(series))
+            return array('d',
+                         ((sums[day + 1] - sums[max(day + 1 - window, 0)]) / min(day + 1, window)
+                          for day in range(len(series))))
+
+        return [average(row) for row in self.minutes], average(self.totals())
+
+    def streaks(self) -> Tuple[int, int]:
+        """ Return the longest and the current number of consecutive days studied.
+
+        The current streak ends on the last day, and is 0 if nothing was
+        studied on the last day.
+        """
+        totals = self.totals()
+        if self.numpy:
+            studied = numpy.concatenate([[0], (totals > 0).astype(numpy.int8), [0]])
+            edges = numpy.flatnonzero(numpy.diff(studied))
+            lengths = edges[1::2] - edges[::2]
+            if not len(lengths):
+                return 0, 0
+            return int(lengths.max()), int(lengths[-1]) if studied[-2] else 0
+
+        longest = current = 0
+        for minutes in totals:
+            current = current + 1 if minutes > 0 else 0
+            longest = max(longest, current)
+        return longest, current
+
+    def percentiles(self, percents: Iterable[float] = PERCENTILES) -> List[float]:
+        """ Return the percentiles of the minutes of the sessions.
+
+        A session is the study time of a course on a day. The percentiles
+        are interpolated linearly between the sessions, as numpy.percentile()
+        does. They are None if there is no session.
+        """
+        percents = list(percents)
+        if self.numpy:
+            sessions = self.minutes[self.minutes > 0]
+            if not sessions.size:
+                return [None] * len(percents)
+            return [float(value) for value in numpy.percentile(sessions, percents)]
+
+        sessions = sorted(minutes for row in self.minutes for minutes in row if minutes > 0)
+        if not sessions:
+            return [None] * len(percents)
+        values = []
+        for percent in percents:
+            position = (len(sessions) - 1) * percent / 100.0
+            lower = int(position)
+            upper = min(lower + 1, len(sessions) - 1)
+            values.append(sessions[lower] + (sessions[upper] - sessions[lower]) *
+                          (position - lower))
+        return values
+
+    def week_over_week(self) -> Tuple[List[Tuple[float, float]], Tuple[float, float]]:
+        """ Return the minutes of the last 7 days and of the 7 days before.
+
+        Returns:
+            The pair of each course and the pair of the totals.
+        """
+        if self.numpy:
+            matrix = numpy.vstack([self.minutes, self.totals()])
+            this_week = matrix[:, -7:].sum(axis=1)
+            last_week = matrix[:, -14:-7].sum(axis=1)
+            pairs = [(float(this), float(last)) for this, last in zip(this_week, last_week)]
+            return pairs[:-1], pairs[-1]
+
+        def pair(series):
+            return sum(series[-7:]), sum(series[-14:-7])
+
+        return [pair(row) for row in self.minutes], pair(self.totals())
+
+    def report(self) -> Dict:
+        """ Return all the metrics in hours, rounded to 2 decimal places. """
+
+        def hours(minutes):
+            return round(float(minutes) / 60, 2) if minutes is not None else None
+
+        def last(series):
+            return hours(series[-1]) if self.days else None
+
+        def per_course(values):
+            return {name: value for name, value in zip(self.names, values)}
+
+        since = until = None
+        if self.days:
+            since = date.fromordinal(self.first).isoformat()
+            until = date.fromordinal(self.first + self.days - 1).isoformat()
+
+        stats = {
+            'period': {
+                'since': since,
+                'until': until,
+                'days': self.days,
+            },
+        }
+
+        for window in WINDOWS:
+            courses, total = self.rolling_average(window)
+            stats['rolling_average_{}_days'.format(window)] = {
+                'total': last(total),
+                'per_course': per_course(last(series) for series in courses),
+            }
+
+        longest, current = self.streaks()
+        stats['streak'] = {'longest': longest, 'current': current}
+
+        stats['session_percentiles'] = {
+            'p{}'.format(percent): hours(value)
+            for percent, value in zip(PERCENTILES, self.percentiles())
+        }
+
+        def delta(pair):
+            return {
+                'this_week': hours(pair[0]),
+                'last_week': hours(pair[1]),
+                'delta': hours(pair[0] - pair[1]),
+            }
+
+        courses, total = self.week_over_week()
+        stats['week_over_week'] = {
+            'total': delta(total),
+            'per_course': per_course(delta(pair) for pair in courses),
+        }
+
+        return stats
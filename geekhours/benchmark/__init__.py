@@ -0,0 +1,5 @@
+""" Benchmarks of geekhours
+
+Run each benchmark as a module from the top directory, e.g.
+python3 -m geekhours.benchmark.bench_index
+"""
@@ -0,0 +1,105 @@
+""" Benchmark of the latency of the requests with and without the daemon.
+
+A database in a temporary HOME is filled by generate.py, and each command
+is run as from a shell prompt, first with the database opened by the
+command itself, then through the daemon of 'geekhours serve'. The latency
+of the calls of RemoteCommand in a running process, such as a status bar
+widget polling the totals, is measured as well.
+
+Usage:
+    python3 -m geekhours.benchmark.bench_daemon [--rows N] [--repeat N]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import islice
+from geekhours import client
+from geekhours.benchmark import generate
+from geekhours.database import Database
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+
+COMMANDS = [
+    ['sum'],
+    ['sum', '--by', 'month'],
+    ['course', 'list'],
+    ['done', 'list', '--since', '2000-12-01', '--until', '2000-12-31'],
+]
+
+
+def time_command(args: list, env: dict, repeat: int) -> float:
+    """ Return the median latency of the command in milliseconds. """
+    times = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(ROOT, 'bin', 'geekhours')] + args,
+                       stdout=subprocess.DEVNULL,
+                       env=env,
+                       check=True)
+        times.append(time.perf_counter() - begin)
+    return statistics.median(times) * 1e3
+
+
+def time_call(remote: client.RemoteCommand, repeat: int) -> float:
+    """ Return the median latency of show_total_hours() in milliseconds. """
+    times = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        remote.show_total_hours()
+        times.append(time.perf_counter() - begin)
+    return statistics.median(times) * 1e3
+
+
+def main():
+    """ main """
+    parser = argparse.ArgumentParser(description='Benchmark the daemon of geekhours.')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp()
+    env = dict(os.environ,
+               HOME=home,
+               PYTHONPATH=os.pathsep.join([ROOT, os.environ.get('PYTHONPATH', '')]))
+    db_name = os.path.join(home, '.geekhours.db')
+    daemon = None
+
+    try:
+        database = Database(db_name)
+        database.create_table()
+        generate.populate(
+            database,
+            islice(generate.generate(10, generate.years_for(args.rows, 10, 0.5)), args.rows), 10)
+        database.close_db()
+
+        without = [time_command(command, env, args.repeat) for command in COMMANDS]
+
+        daemon = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, 'bin', 'geekhours'), 'serve'], env=env)
+        remote = None
+        while remote is None:
+            time.sleep(0.05)
+            remote = client.connect(db_name)
+        with_daemon = [time_command(command, env, args.repeat) for command in COMMANDS]
+        call = time_call(remote, args.repeat * 10)
+
+        print('{:<58} {:>12} {:>12}'.format('command', 'local [ms]', 'daemon [ms]'))
+        for command, local, served in zip(COMMANDS, without, with_daemon):
+            print('{:<58} {:>12.1f} {:>12.1f}'.format(' '.join(['geekhours'] + command), local,
+                                                      served))
+        print('{:<58} {:>12} {:>12.2f}'.format('RemoteCommand.show_total_hours()', '-', call))
+    finally:
+        if daemon:
+            client.stop(db_name)
+            daemon.wait()
+        shutil.rmtree(home)
+
+
+if __name__ == '__main__':
+    main()
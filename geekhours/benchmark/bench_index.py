@@ -0,0 +1,83 @@
+""" Benchmark of the lookups on donelist with and without the indexes.
+
+The cost of the duplicate check of insert_donelist(), remove_donelist()
+and the total hours of a course is measured on growing tables. With the
+indexes the cost stays flat, while the full table scan (forced with
+'NOT INDEXED') grows linearly with the number of records.
+
+Usage:
+    python3 -m geekhours.benchmark.bench_index [--sizes N [N ...]] [--lookups N]
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from geekhours.database import Database
+from geekhours.util import create_db, remove_db
+
+QUERIES = {
+    'duplicate check': 'SELECT 1 FROM donelist {} WHERE date=? AND course_id=?',
+    'course total': 'SELECT SUM(duration) FROM donelist {} WHERE course_id=? AND date>=?',
+}
+
+
+def populate(database: Database, size: int, courses: int = 10):
+    """ Insert size records spread over courses and return the course ids. """
+    names = ['course{:d}'.format(i) for i in range(courses)]
+    start = date(2000, 1, 1)
+    with database.con:
+        database.cur.executemany('INSERT INTO course(name) VALUES (?)',
+                                 [(name,) for name in names])
+        ids = [row[0] for row in database.cur.execute('SELECT id FROM course ORDER BY id')]
+        database.cur.executemany(
+            'INSERT INTO donelist(date, course_id, duration) VALUES (?, ?, ?)',
+            ((str(start + timedelta(days=i // courses)), ids[i % courses], 1)
+             for i in range(size)))
+    return ids, start
+
+
+def measure(database: Database, sql: str, params: list) -> float:
+    """ Return the mean latency of sql in microseconds. """
+    begin = time.perf_counter()
+    for param in params:
+        database.cur.execute(sql, param).fetchall()
+    return (time.perf_counter() - begin) / len(params) * 1e6
+
+
+def main():
+    """ main """
+    parser = argparse.ArgumentParser(description='Benchmark the indexes on donelist.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+
+    rand = random.Random(0)
+    print('{:>10} {:>16} {:>14} {:>14}'.format('records', 'query', 'indexed [us]', 'scan [us]'))
+
+    for size in args.sizes:
+        db_path, db_name = create_db()
+        database = Database(db_name)
+        database.create_table()
+        ids, start = populate(database, size)
+        days = max(size // len(ids), 1)
+        lookups = [(str(start + timedelta(days=rand.randrange(days))), rand.choice(ids))
+                   for _ in range(args.lookups)]
+        # The total of a course over the last week touches a bounded number of records.
+        last_week = str(start + timedelta(days=days - 7))
+        params = {
+            'duplicate check': lookups,
+            'course total': [(course, last_week) for _, course in lookups],
+        }
+
+        for name, sql in QUERIES.items():
+            indexed = measure(database, sql.format(''), params[name])
+            scan = measure(database, sql.format('NOT INDEXED'), params[name])
+            print('{:>10} {:>16} {:>14.1f} {:>14.1f}'.format(size, name, indexed, scan))
+
+        database.close_db()
+        remove_db(db_path, db_name)
+
+
+if __name__ == '__main__':
+    main()
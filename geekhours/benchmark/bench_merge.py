@@ -0,0 +1,60 @@
+""" Benchmark of Database.merge().
+
+Generates two databases of the same courses and dates with different
+seeds, so about half of the records of the other database conflict with
+the records of the first one. The other database is merged into a copy
+of the first one with each policy and the time is printed.
+
+Usage:
+    python3 -m geekhours.benchmark.bench_merge [--rows N] [--profile NAME]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from itertools import islice
+from geekhours.benchmark import generate
+from geekhours.database import MERGE_POLICIES, Database
+
+
+def main():
+    """ main """
+    parser = argparse.ArgumentParser(description='Benchmark Database.merge().')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--profile', default='fast')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        db_names = []
+        for seed in range(2):
+            db_name = os.path.join(workdir, 'seed{}.db'.format(seed))
+            database = Database(db_name, args.profile)
+            database.create_table()
+            records = generate.generate(100, generate.years_for(args.rows, 100, 0.5), seed=seed)
+            generate.populate(database, islice(records, args.rows), 100)
+            database.close_db()
+            db_names.append(db_name)
+
+        print('{:>8} {:>10} {:>10} {:>10} {:>10}'.format('policy', 'inserted', 'conflicts',
+                                                         'updated', 'time [s]'))
+        for policy in MERGE_POLICIES:
+            db_name = os.path.join(workdir, 'merged.db')
+            shutil.copy(db_names[0], db_name)
+            database = Database(db_name, args.profile)
+            begin = time.perf_counter()
+            res = database.merge(db_names[1], policy)
+            elapsed = time.perf_counter() - begin
+            database.close_db()
+            os.remove(db_name)
+            print('{:>8} {:>10} {:>10} {:>10} {:>10.3f}'.format(policy, res.inserted,
+                                                                res.conflicts, res.updated,
+                                                                elapsed))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+""" Benchmark of DatabasePool under concurrent threads.
+
+For each number of reader threads, the readers read the total hours per
+month in a loop while a writer thread adds records one by one through
+the pool. The throughput of the reads and of the writes is printed.
+
+Usage:
+    python3 -m geekhours.benchmark.bench_pool [--threads N [N ...]] [--writes N]
+                                              [--profile NAME] [--rows N]
+"""
+
+import argparse
+import contextlib
+import io
+import threading
+import time
+from datetime import date, timedelta
+from itertools import islice
+from geekhours.benchmark import generate
+from geekhours.database import Database
+from geekhours.pool import DatabasePool
+from geekhours.util import create_db, remove_db
+
+
+def run(db_name: str, threads: int, writes: int, profile: str):
+    """ Return the reads and the writes per second with threads readers. """
+    pool = DatabasePool(db_name, profile, readers=threads)
+    with pool.reader() as database:
+        last_day = database.con.execute('SELECT MAX(date) FROM donelist').fetchone()[0]
+    first = date(*map(int, last_day.split('-'))) + timedelta(days=1)
+    stop = threading.Event()
+    reads = [0] * threads
+
+    def write():
+        try:
+            for day in range(writes):
+                with pool.writer() as database:
+                    database.insert_donelist((first + timedelta(days=day)).isoformat(),
+                                             'course0000', '30m')
+        finally:
+            stop.set()
+
+    def read(i):
+        while not stop.is_set():
+            with pool.reader() as database:
+                database.get_total_hours_by('month')
+            reads[i] += 1
+
+    workers = [threading.Thread(target=read, args=(i,)) for i in range(threads)]
+    workers.append(threading.Thread(target=write))
+    begin = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - begin
+    pool.close()
+
+    return sum(reads) / elapsed, writes / elapsed
+
+
+def main():
+    """ main """
+    parser = argparse.ArgumentParser(description='Benchmark DatabasePool.')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--writes', type=int, default=200)
+    parser.add_argument('--profile', default='fast')
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    print('{:>8} {:>12} {:>12}'.format('readers', 'reads [/s]', 'writes [/s]'))
+    for threads in args.threads:
+        db_path, db_name = create_db()
+        try:
+            database = Database(db_name, args.profile)
+            database.create_table()
+            records = islice(generate.generate(10, generate.years_for(args.rows, 10, 0.5)),
+                             args.rows)
+            generate.populate(database, records, 10)
+            database.close_db()
+            # insert_donelist() prints the records it adds.
+            with contextlib.redirect_stdout(io.StringIO()):
+                reads, writes = run(db_name, threads, args.writes, args.profile)
+            print('{:>8} {:>12.1f} {:>12.1f}'.format(threads, reads, writes))
+        finally:
+            remove_db(db_path, db_name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+""" Benchmark of Report.from_databases() over many databases.
+
+Generates a number of databases, then sums them up with each number of
+worker processes and prints the wall clock time. With one job the
+databases are read one after another in this process.
+
+Usage:
+    python3 -m geekhours.benchmark.bench_report [--jobs N [N ...]] [--databases N]
+                                                [--rows N]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from itertools import islice
+from geekhours.benchmark import generate
+from geekhours.database import Database
+from geekhours.report import Report
+
+
+def main():
+    """ main """
+    parser = argparse.ArgumentParser(description='Benchmark Report.from_databases().')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--databases', type=int, default=16)
+    parser.add_argument('--rows', type=int, default=50000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        db_names = []
+        for i in range(args.databases):
+            db_name = os.path.join(workdir, 'member{:03d}.db'.format(i))
+            database = Database(db_name, 'fast')
+            database.create_table()
+            records = islice(generate.generate(10, generate.years_for(args.rows, 10, 0.5)),
+                             args.rows)
+            generate.populate(database, records, 10)
+            database.close_db()
+            db_names.append(db_name)
+
+        print('{:>6} {:>10}'.format('jobs', 'time [s]'))
+        for jobs in sorted(set(args.jobs)):
+            begin = time.perf_counter()
+            Report.from_databases(db_names, jobs=jobs)
+            print('{:>6} {:>10.3f}'.format(jobs, time.perf_counter() - begin))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+""" Benchmark of the startup time of bin/geekhours.
+
+Each command is run in a new interpreter with '-X importtime', as from a
+shell prompt. The median wall-clock time is compared with the target. The
+slowest imports of the last run are listed on Python 3.7 and later, where
+'-X importtime' exists.
+
+'--help' and '--version' must not import the modules to access the
+database. They are run once more in an interpreter which lists the
+modules of sys.modules after main() returns, on every version of Python.
+
+The exit status is 1 if a command exceeds the target or imports them.
+
+Usage:
+    python3 -m geekhours.benchmark.bench_startup [--runs N] [--target-ms MS]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+GEEKHOURS = os.path.join(os.path.dirname(__file__), '..', '..', 'bin', 'geekhours')
+
+COMMANDS = [['--version'], ['--help'], ['sum'], ['done', 'list']]
+
+# Modules which must not be imported without the database.
+DATABASE_MODULES = ['sqlite3', 'geekhours.command', 'geekhours.database']
+
+# Run bin/geekhours as __main__ and write the imported modules to stderr.
+LIST_MODULES = ('import runpy, sys\n'
+                'sys.argv = sys.argv[1:]\n'
+                'try:\n'
+                '    runpy.run_path(sys.argv[0], run_name="__main__")\n'
+                'except SystemExit:\n'
+                '    pass\n'
+                'sys.stderr.write("\\n".join(sys.modules))\n')
+
+
+def run(command: list, env: dict):
+    """ Run geekhours once and return the wall-clock time in ms and the imports.
+
+    The imports are pairs of the module and its cumulative import time in us.
+    """
+    begin = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', GEEKHOURS] + command,
+                          stdout=subprocess.DEVNULL,
+                          stderr=subprocess.PIPE,
+                          env=env,
+                          check=True,
+                          universal_newlines=True)
+    elapsed = (time.perf_counter() - begin) * 1e3
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        # The header row has no numbers.
+        if cumulative.strip().isdigit():
+            imports.append((module.strip(), int(cumulative)))
+
+    return elapsed, imports
+
+
+def loaded_modules(command: list, env: dict) -> list:
+    """ Run geekhours once and return the DATABASE_MODULES it imported. """
+    proc = subprocess.run([sys.executable, '-c', LIST_MODULES, GEEKHOURS] + command,
+                          stdout=subprocess.DEVNULL,
+                          stderr=subprocess.PIPE,
+                          env=env,
+                          check=True,
+                          universal_newlines=True)
+    modules = set(proc.stderr.splitlines())
+    return [module for module in DATABASE_MODULES if module in modules]
+
+
+def main():
+    """ main """
+    parser = argparse.ArgumentParser(description='Benchmark the startup of geekhours.')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--target-ms', type=float, default=100.0)
+    parser.add_argument('--top', type=int, default=5, help='Number of slowest imports to list.')
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp()
+    env = dict(os.environ,
+               HOME=home,
+               PYTHONPATH=os.pathsep.join([os.path.join(os.path.dirname(GEEKHOURS), '..')] +
+                                          [os.environ.get('PYTHONPATH', '')]))
+    failed = False
+
+    print('{:>12} {:>12} {:>10}  {}'.format('command', 'median [ms]', 'target', 'slowest imports'))
+    for command in COMMANDS:
+        times = []
+        for _ in range(args.runs):
+            elapsed, imports = run(command, env)
+            times.append(elapsed)
+
+        median = statistics.median(times)
+        ok = median <= args.target_ms
+        if command[0].startswith('--'):
+            loaded = loaded_modules(command, env)
+            if loaded:
+                ok = False
+                print('{} imports {}'.format(command[0], ', '.join(loaded)))
+        failed = failed or not ok
+
+        slowest = sorted(imports, key=lambda item: item[1], reverse=True)[:args.top]
+        print('{:>12} {:>12.1f} {:>10}  {}'.format(
+            ' '.join(command), median, 'ok' if ok else 'FAILED',
+            ', '.join('{} {:.1f}'.format(module, us / 1e3) for module, us in slowest)))
+
+    for name in os.listdir(home):
+        os.remove(os.path.join(home, name))
+    os.rmdir(home)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+""" Benchmark suite of the Database and Command layers.
+
+For each size, a database in a temporary HOME is filled by generate.py
+and every operation is timed several times. The CLI is started as from a
+shell prompt, so it reads the same database as ~/.geekhours.db.
+
+The results are printed as a table and, with '--output', written as JSON
+together with the commit and the versions of Python and SQLite, so that
+the results of two commits can be compared.
+
+Usage:
+    python3 -m geekhours.benchmark.bench_suite [--sizes N [N ...]] [--repeat N]
+                                               [--operations NAME [NAME ...]]
+                                               [--output results.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from itertools import count, islice
+from geekhours.benchmark import generate
+from geekhours.command import Command
+from geekhours.snapshot import Snapshot
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+
+# Operations measured with several calls per run, timed per call.
+CALLS = {'insert_donelist': 100}
+
+
+def operations(cmd: Command, names: list, first_new_day: date, workdir: str, env: dict) -> dict:
+    """ Return the operations to time by name.
+
+    cmd has no cache, so that the reports are computed at each call. The
+    cached reports are timed with another Command.
+    """
+    new_days = (first_new_day + timedelta(days=i) for i in count())
+    new_courses = ('new{:06d}'.format(i) for i in count())
+    last_month = (first_new_day - timedelta(days=31)).isoformat()
+    files = count()
+
+    def insert_donelist():
+        cmd.insert_donelist(next(new_days).isoformat(), names[0], '30m')
+
+    def export(fmt):
+        outfile = os.path.join(workdir, 'export{}.{}'.format(next(files), fmt))
+        if fmt == 'csv':
+            cmd.dump_to_csv(cmd.iter_rows('donelist'), outfile, cmd.show_column('donelist'))
+        else:
+            cmd.dump_to_json(cmd.iter_rows('donelist'), outfile)
+        os.remove(outfile)
+
+    def export_snapshot():
+        outfile = os.path.join(workdir, 'export{}.snapshot'.format(next(files)))
+        cmd.dump_to_snapshot(outfile)
+        os.remove(outfile)
+
+    def load_snapshot():
+        with Snapshot.load(snapshot) as loaded:
+            sum(loaded.durations)
+
+    def cli(*args):
+        subprocess.run([sys.executable, os.path.join(ROOT, 'bin', 'geekhours')] + list(args),
+                       stdout=subprocess.DEVNULL,
+                       env=env,
+                       check=True)
+
+    database = cmd.database
+    cached = Command(os.path.join(workdir, '.geekhours.db'))
+    snapshot = os.path.join(workdir, 'records.snapshot')
+    cmd.dump_to_snapshot(snapshot)
+    return {
+        'insert_donelist': insert_donelist,
+        'insert_course': lambda: cmd.insert_course(list(islice(new_courses, 100))),
+        'show course': lambda: database.show('course'),
+        'show donelist': lambda: database.show('donelist'),
+        'get_total_hours': database.get_total_hours,
+        'get_total_hours_course': database.get_total_hours_course,
+        'get_total_hours_week': database.get_total_hours_week,
+        'get_total_hours_month': database.get_total_hours_month,
+        'get_total_hours_month course': lambda: database.get_total_hours_month(names[0]),
+        'get_total_hours last month': lambda: database.get_total_hours(since=last_month),
+        'get_total_hours_by month': lambda: database.get_total_hours_by('month'),
+        'get_total_hours_by week': lambda: database.get_total_hours_by('week', since=last_month),
+        'show_total_hours': cmd.show_total_hours,
+        'show_total_hours cached': cached.show_total_hours,
+        'show_stats': cmd.show_stats,
+        'export csv': lambda: export('csv'),
+        'export json': lambda: export('json'),
+        'export snapshot': export_snapshot,
+        'load snapshot and sum': load_snapshot,
+        'cli sum': lambda: cli('sum'),
+        'cli --version': lambda: cli('--version'),
+    }
+
+
+def commit() -> str:
+    """ Return the commit of the source tree, or None outside git. """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                       cwd=ROOT,
+                                       stderr=subprocess.DEVNULL,
+                                       universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(size: int, args, out) -> list:
+    """ Time the operations on a database of size records and return the results. """
+    home = tempfile.mkdtemp()
+    env = dict(os.environ,
+               HOME=home,
+               PYTHONPATH=os.pathsep.join([ROOT, os.environ.get('PYTHONPATH', '')]))
+    results = []
+
+    try:
+        # About args.years of history, with more courses for more records.
+        courses = max(10, -(-size // int(args.years * 365 * args.density)))
+        years = generate.years_for(size, courses, args.density)
+        records = islice(generate.generate(courses, years, args.density, args.seed), size)
+
+        cmd = Command(os.path.join(home, '.geekhours.db'), cache_size=0)
+        begin = time.perf_counter()
+        rows = generate.populate(cmd.database, records, courses)
+        print('{} records of {} courses generated in {:.1f} s'.format(
+            rows, courses,
+            time.perf_counter() - begin),
+              file=sys.stderr)
+
+        last_day = cmd.database.cur.execute('SELECT MAX(date) FROM donelist').fetchone()[0]
+        first_new_day = datetime.strptime(last_day, '%Y-%m-%d').date() + timedelta(days=1)
+        ops = operations(cmd, generate.course_names(courses), first_new_day, home, env)
+
+        unknown = set(args.operations or []) - set(ops)
+        if unknown:
+            raise ValueError('No such operation: {}'.format(', '.join(sorted(unknown))))
+
+        for name in args.operations or ops:
+            calls = CALLS.get(name, 1)
+            times = []
+            for _ in range(args.repeat):
+                # The Database layer prints the records it adds.
+                with contextlib.redirect_stdout(io.StringIO()):
+                    begin = time.perf_counter()
+                    for _ in range(calls):
+                        ops[name]()
+                    times.append((time.perf_counter() - begin) / calls)
+            results.append({
+                'rows': rows,
+                'operation': name,
+                'calls': calls,
+                'median': statistics.median(times),
+                'min': min(times),
+                'max': max(times),
+            })
+            print('{:>10} {:>28} {:>12.6f}'.format(rows, name, results[-1]['median']), file=out)
+
+        cmd.database.close_db()
+    finally:
+        shutil.rmtree(home)
+
+    return results
+
+
+def main():
+    """ main """
+    parser = argparse.ArgumentParser(description='Benchmark the Database and Command layers.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 1000000, 10000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--operations', nargs='+', help='Names of the operations to time.')
+    parser.add_argument('--years', type=int, default=20, help='Years of history to generate.')
+    parser.add_argument('--density', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="JSON file to write the results. '-' is stdout.")
+    args = parser.parse_args()
+
+    # The table goes to stderr when the JSON is written to stdout.
+    out = sys.stderr if args.output == '-' else sys.stdout
+    print('{:>10} {:>28} {:>12}'.format('records', 'operation', 'median [s]'), file=out)
+    results = []
+    for size in args.sizes:
+        results.extend(run(size, args, out))
+
+    report = {
+        'commit': commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'args': vars(args),
+        'results': results,
+    }
+
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=4)
+    elif args.output:
+        with open(args.output, 'w') as outfile:
+            json.dump(report, outfile, indent=4)
+
+
+if __name__ == '__main__':
+    main()
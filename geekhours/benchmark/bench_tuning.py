@@ -0,0 +1,109 @@
+""" Benchmark of the tuning profiles of SQLite.
+
+Insert throughput: records added one by one with insert_donelist(), each
+in its own transaction as 'geekhours done add' does.
+
+Concurrent read latency: latency of get_total_hours() on one connection
+while another thread keeps adding records. In the rollback journal the
+readers wait for the writer, while in WAL they read the last commit.
+'readonly-report' is measured as the reader of a database written with
+the 'fast' profile, since it cannot write.
+
+Usage:
+    python3 -m geekhours.benchmark.bench_tuning [--inserts N] [--reads N]
+"""
+
+import argparse
+import contextlib
+import io
+import threading
+import time
+from datetime import date, timedelta
+from geekhours import tuning
+from geekhours.database import Database
+from geekhours.util import create_db, remove_db
+
+COURSES = ['course{:d}'.format(i) for i in range(10)]
+
+
+def records(start: int):
+    """ Generate records of distinct dates from the start-th day of 2000. """
+    first = date(2000, 1, 1)
+    i = start
+    while True:
+        yield str(first + timedelta(days=i // len(COURSES))), COURSES[i % len(COURSES)], '1'
+        i += 1
+
+
+def insert_throughput(db_name: str, profile: str, inserts: int) -> float:
+    """ Return the records added per second. """
+    database = Database(db_name, profile)
+    database.create_table()
+    database.insert_course(COURSES)
+    generator = records(0)
+
+    begin = time.perf_counter()
+    for _ in range(inserts):
+        database.insert_donelist(*next(generator))
+    elapsed = time.perf_counter() - begin
+
+    database.close_db()
+    return inserts / elapsed
+
+
+def read_latency(db_name: str, writer: str, reader: str, inserts: int, reads: int):
+    """ Return the mean and the maximum latency of reads in milliseconds. """
+    stop = threading.Event()
+
+    def write():
+        database = Database(db_name, writer)
+        generator = records(inserts)
+        while not stop.is_set():
+            database.insert_donelist(*next(generator))
+        database.close_db()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    database = Database(db_name, reader)
+    latencies = []
+
+    try:
+        for _ in range(reads):
+            begin = time.perf_counter()
+            database.get_total_hours()
+            latencies.append((time.perf_counter() - begin) * 1e3)
+    finally:
+        stop.set()
+        thread.join()
+        database.close_db()
+
+    return sum(latencies) / len(latencies), max(latencies)
+
+
+def main():
+    """ main """
+    parser = argparse.ArgumentParser(description='Benchmark the tuning profiles of SQLite.')
+    parser.add_argument('--inserts', type=int, default=500)
+    parser.add_argument('--reads', type=int, default=500)
+    args = parser.parse_args()
+
+    results = []
+    # insert_donelist() prints every record.
+    with contextlib.redirect_stdout(io.StringIO()):
+        for profile in sorted(tuning.PROFILES):
+            writer = 'fast' if profile == 'readonly-report' else profile
+            db_path, db_name = create_db()
+            throughput = insert_throughput(db_name, writer, args.inserts)
+            mean, worst = read_latency(db_name, writer, profile, args.inserts, args.reads)
+            results.append((profile, throughput if writer == profile else None, mean, worst))
+            remove_db(db_path, db_name)
+
+    print('{:>16} {:>14} {:>15} {:>14}'.format('profile', 'inserts [1/s]', 'read mean [ms]',
+                                               'read max [ms]'))
+    for profile, throughput, mean, worst in results:
+        print('{:>16} {:>14} {:>15.3f} {:>14.3f}'.format(
+            profile, '-' if throughput is None else '{:.0f}'.format(throughput), mean, worst))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+""" Reproducible synthetic data of geekhours.
+
+The records are generated day by day from the first day of start_year.
+Each course is studied on a day with the probability density, for a
+multiple of 15 minutes up to 4 hours. The same arguments always generate
+the same records.
+
+Usage:
+    python3 -m geekhours.benchmark.generate [--courses N] [--years M] [--density D]
+                                            [--seed S] [--rows R] database
+"""
+
+import argparse
+import random
+from datetime import date, timedelta
+from itertools import islice
+from typing import Iterator, List, Tuple
+from geekhours import bucket, rollup
+from geekhours.database import Database
+
+
+def course_names(courses: int) -> List[str]:
+    """ Return the names of the courses. """
+    return ['course{:04d}'.format(i) for i in range(courses)]
+
+
+def generate(courses: int = 10,
+             years: int = 1,
+             density: float = 0.5,
+             seed: int = 0,
+             start_year: int = 2000) -> Iterator[Tuple[str, str, int]]:
+    """ Generate (date, course, minutes) records in the order of date.
+
+    Args:
+        courses: Number of courses.
+        years: Number of years from start_year.
+        density: Probability that a course is studied on a day, 0 to 1.
+        seed: Seed of the random numbers.
+        start_year: First year of the records.
+    """
+    if not 0 < density <= 1:
+        raise ValueError('density must be more than 0 and at most 1.')
+
+    rand = random.Random(seed)
+    names = course_names(courses)
+    day = date(start_year, 1, 1)
+    end = date(start_year + years, 1, 1)
+
+    while day < end:
+        today = day.isoformat()
+        for name in names:
+            if rand.random() < density:
+                yield today, name, rand.randint(1, 16) * 15
+        day += timedelta(days=1)
+
+
+def years_for(rows: int, courses: int, density: float) -> int:
+    """ Return the number of years to generate at least rows records.
+
+    One more year than the expected number is returned for the randomness.
+    """
+    per_year = max(1, int(courses * 365 * density))
+    return -(-rows // per_year) + 1
+
+
+def populate(database: Database,
+             records: Iterator[Tuple[str, str, int]],
+             courses: int,
+             batch_size: int = 100000) -> int:
+    """ Insert the courses and records in one transaction and return the number of records.
+
+    The records are trusted, so they are inserted without the checks of
+    insert_donelist_many(), and the rollup tables are rebuilt once.
+    """
+    count = 0
+
+    with database.con.begin(immediate=True):
+        database.con.executemany('INSERT OR IGNORE INTO course(name) VALUES (?)',
+                                 ((name,) for name in course_names(courses)))
+        ids = dict(database.con.execute('SELECT name, id FROM course'))
+        rollup.drop_triggers(database.con)
+        bucket.drop_triggers(database.con)
+        records = iter(records)
+        while True:
+            batch = [(date, ids[course], minutes)
+                     for date, course, minutes in islice(records, batch_size)]
+            if not batch:
+                break
+            database.con.executemany(
+                'INSERT INTO donelist(date, course_id, duration, {}) '
+                'SELECT new.date, new.course_id, new.duration, {} '
+                'FROM (SELECT ? AS date, ? AS course_id, ? AS duration) AS new'.format(
+                    bucket.COLUMNS, bucket.values('new')), batch)
+            count += len(batch)
+        bucket.create_triggers(database.con)
+        rollup.rebuild(database.con)
+        rollup.create_triggers(database.con)
+
+    return count
+
+
+def main():
+    """ main """
+    parser = argparse.ArgumentParser(description='Generate synthetic data of geekhours.')
+    parser.add_argument('database', help='Database to fill. Created if it does not exist.')
+    parser.add_argument('--courses', type=int, default=10)
+    parser.add_argument('--years', type=int, default=1)
+    parser.add_argument('--density', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rows', type=int, help='Stop at this number of records.')
+    args = parser.parse_args()
+
+    years = years_for(args.rows, args.courses, args.density) if args.rows else args.years
+    records = generate(args.courses, years, args.density, args.seed)
+    if args.rows:
+        records = islice(records, args.rows)
+
+    database = Database(args.database)
+    database.create_table()
+    print('Inserted: {}'.format(populate(database, records, args.courses)))
+    database.close_db()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+""" bucket.py is a module to maintain the calendar buckets of donelist.
+
+The buckets are stored in columns of donelist and filled by triggers on
+INSERT and on UPDATE of the date, so the reports group the records on
+plain columns instead of formatting every date at query time.
+
+year: Year such as '2019'.
+month: Year and month such as '2019-01'.
+week: ISO 8601 year and week such as '2019-W05'.
+weekday: Day of week from '0' (Sunday) to '6' (Saturday).
+
+The indexes on year, month and week cover the total hours per bucket in a
+range of dates.
+"""
+
+__all__ = [
+    'BUCKETS', 'COLUMNS', 'values', 'create_indexes', 'create_triggers', 'drop_triggers', 'fill',
+    'install'
+]
+
+import sqlite3
+from geekhours.rollup import ISO_WEEK
+
+# Bucket column and its expression of a donelist row
+BUCKETS = [
+    ('year', "strftime('%Y', {0}.date)"),
+    ('month', 'substr({0}.date, 1, 7)'),
+    ('week', ISO_WEEK),
+    ('weekday', "strftime('%w', {0}.date)"),
+]
+
+COLUMNS = ', '.join(column for column, _ in BUCKETS)
+
+TRIGGERS = ['bucket_insert', 'bucket_update']
+
+# Indexes on the buckets with the column of the course
+INDEXES = {
+    'donelist_year': 'year, date, {course}, duration',
+    'donelist_month': 'month, date, {course}, duration',
+    'donelist_week': 'week, date, {course}, duration',
+}
+
+
+def _set(row: str) -> str:
+    """ Return the assignments of the buckets from a donelist row. """
+    return ', '.join('{} = {}'.format(column, expr.format(row)) for column, expr in BUCKETS)
+
+
+def values(row: str) -> str:
+    """ Return the expressions of the buckets of a row, in the order of COLUMNS.
+
+    Used to insert the buckets together with the rows while the triggers are dropped.
+    """
+    return ', '.join(expr.format(row) for _, expr in BUCKETS)
+
+
+def create_indexes(con: sqlite3.Connection, course: str = 'course_id'):
+    """ Create the indexes on the buckets.
+
+    Args:
+        course: Column of the course in donelist.
+    """
+    for index, columns in INDEXES.items():
+        con.execute('CREATE INDEX {} ON donelist({})'.format(index, columns.format(course=course)))
+
+
+def create_triggers(con: sqlite3.Connection):
+    """ Create the triggers on donelist which fill the buckets. """
+    con.execute('CREATE TRIGGER bucket_insert AFTER INSERT ON donelist BEGIN '
+                'UPDATE donelist SET {} WHERE id = NEW.id; END'.format(_set('NEW')))
+    con.execute('CREATE TRIGGER bucket_update AFTER UPDATE OF date ON donelist BEGIN '
+                'UPDATE donelist SET {} WHERE id = NEW.id; END'.format(_set('NEW')))
+
+
+def drop_triggers(con: sqlite3.Connection):
+    """ Drop the triggers on donelist which fill the buckets. """
+    for trigger in TRIGGERS:
+        con.execute('DROP TRIGGER IF EXISTS {}'.format(trigger))
+
+
+def fill(con: sqlite3.Connection, last_id: int = 0):
+    """ Fill the buckets of the donelist rows after last_id. """
+    con.execute('UPDATE donelist SET {} WHERE id > ?'.format(_set('donelist')), (last_id,))
+
+
+def install(con: sqlite3.Connection):
+    """ Version 4: Add the bucket columns, their indexes and triggers to donelist. """
+    for column, _ in BUCKETS:
+        con.execute('ALTER TABLE donelist ADD COLUMN {} TEXT'.format(column))
+    fill(con)
+    # The course name was stored in donelist until version 5.
+    create_indexes(con, 'course')
+    create_triggers(con)
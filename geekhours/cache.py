@@ -0,0 +1,94 @@
+""" cache.py is a module to cache the results of the reports.
+
+ResultCache keeps the most recently used results with the version of the
+database they were computed from. The version is a pair of
+'PRAGMA data_version', which changes when another connection commits, and
+the total number of rows changed by the connection itself. Probing it
+reads no table, so a result of an unchanged database is returned without
+running its query.
+"""
+
+__all__ = ['CacheStats', 'ResultCache', 'cached']
+
+import copy
+import functools
+import json
+from collections import OrderedDict, namedtuple
+from typing import Callable, Hashable
+
+CacheStats = namedtuple('CacheStats', ['hits', 'misses', 'evictions', 'size', 'capacity'])
+
+CAPACITY = 128
+
+
+class ResultCache:
+    """ LRU cache of results validated against the version of the database.
+
+    Args:
+        capacity: Maximum number of results kept. 0 disables the cache.
+    """
+
+    def __init__(self, capacity: int = CAPACITY):
+        if capacity < 0:
+            raise ValueError('The capacity must not be negative.')
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._hits = self._misses = self._evictions = 0
+
+    @staticmethod
+    def key(name: str, args: tuple, kwargs: dict) -> str:
+        """ Return the key of the query name with its parameters.
+
+        Raises:
+            TypeError: A parameter cannot be a part of a key.
+        """
+        return json.dumps([name, args, kwargs], sort_keys=True)
+
+    def get(self, key: str, version: Hashable, compute: Callable):
+        """ Return the result of key, computed by compute() unless cached at version.
+
+        A copy is returned, so that the callers may modify it.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return copy.deepcopy(entry[1])
+
+        self._misses += 1
+        result = compute()
+        if self.capacity:
+            self._entries[key] = (version, copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return result
+
+    def clear(self):
+        """ Remove all the results. The statistics are kept. """
+        self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """ Return the hits, misses, evictions, size and capacity of the cache. """
+        return CacheStats(self._hits, self._misses, self._evictions, len(self._entries),
+                          self.capacity)
+
+
+def cached(method: Callable) -> Callable:
+    """ Cache the results of a method of an object with 'cache' and 'database' attributes.
+
+    The results are validated against Database.data_version(). A call
+    whose parameters cannot be a part of a key is not cached.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            key = self.cache.key(method.__name__, args, kwargs)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        return self.cache.get(key, self.database.data_version(),
+                              lambda: method(self, *args, **kwargs))
+
+    return wrapper
@@ -0,0 +1,149 @@
+""" client.py is a module to call the Command of the daemon of server.py.
+
+The socket of the daemon is next to the database, such as
+'~/.geekhours.sock' for '~/.geekhours.db'. Each call opens a connection,
+sends the request as one line of JSON and reads the response line:
+
+    {"method": "show_total_hours", "args": [null, "2019-04-01", null], "kwargs": {}}
+    {"result": {...}, "output": "", "error": null}
+
+output is what the method printed, and error is {"type": ..., "message": ...}
+if it raised an exception.
+
+Only a few standard library modules are imported, so the command line
+uses the daemon through RemoteCommand at little cost.
+"""
+
+__all__ = ['METHODS', 'socket_path', 'connect', 'RemoteCommand', 'stop']
+
+import json
+import os
+import socket
+from geekhours.result import Course, CourseResult, DoneRecord
+
+# Methods of Command served by the daemon. The others read or write files
+# of the client, so the command line runs them in its own process.
+METHODS = {
+    'cache_stats',
+    'check_rollups',
+    'insert_course',
+    'insert_donelist',
+    'query_donelist',
+    'rebuild_rollups',
+    'remove_course',
+    'remove_donelist',
+    'show',
+    'show_column',
+    'show_stats',
+    'show_total_hours',
+    'show_total_hours_by',
+    'show_total_hours_course',
+    'show_total_hours_month',
+    'show_total_hours_week',
+}
+
+# Results rebuilt from JSON arrays by the client
+RESULTS = {'insert_course': CourseResult}
+
+# Records rebuilt from JSON arrays by the client, per table of show()
+RECORDS = {'course': Course, 'donelist': DoneRecord}
+
+# Exceptions raised again by the client. The others are raised as RuntimeError.
+ERRORS = {error.__name__: error for error in [FileExistsError, KeyError, RuntimeError, ValueError]}
+
+SHUTDOWN = 'shutdown'
+
+
+def socket_path(db_name: str) -> str:
+    """ Return the path of the socket of the daemon serving db_name. """
+    return os.path.splitext(db_name)[0] + '.sock'
+
+
+def connect(db_name: str, timeout: float = 1.0):
+    """ Return a RemoteCommand if a daemon serves db_name, otherwise None. """
+    remote = RemoteCommand(socket_path(db_name), timeout)
+    sock = remote.open()
+    if sock is None:
+        return None
+    sock.close()
+    return remote
+
+
+class RemoteCommand:
+    """ RemoteCommand calls the methods of the Command of a daemon.
+
+    It has the methods of METHODS with the same arguments and results as
+    Command. What the methods print on the daemon is printed here. Each
+    call is sent on its own connection.
+
+    Args:
+        path: Path of the socket.
+        timeout: Seconds to wait for the connection.
+    """
+
+    def __init__(self, path: str, timeout: float = 1.0):
+        self.path = path
+        self.timeout = timeout
+
+    def __getattr__(self, name: str):
+        if name not in METHODS:
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+    def open(self) -> socket.socket:
+        """ Return a socket connected to the daemon, or None if it is not running. """
+        if not hasattr(socket, 'AF_UNIX'):
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            return None
+        sock.settimeout(None)
+        return sock
+
+    def call(self, method: str, *args, **kwargs):
+        """ Call method on the daemon and return its result. """
+        sock = self.open()
+        if sock is None:
+            raise RuntimeError('The daemon is not running on {}.'.format(self.path))
+        request = {'method': method, 'args': args, 'kwargs': kwargs}
+        with sock, sock.makefile('rb') as stream:
+            sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            line = stream.readline()
+        if not line:
+            raise RuntimeError('The daemon closed the connection.')
+        response = json.loads(line.decode('utf-8'))
+
+        if response['output']:
+            print(response['output'], end='')
+        error = response['error']
+        if error:
+            raise ERRORS.get(error['type'], RuntimeError)(error['message'])
+
+        return _decode(method, args, kwargs, response['result'])
+
+
+def _decode(method: str, args: tuple, kwargs: dict, result):
+    """ Rebuild the result of method called with args and kwargs from JSON. """
+    if method in RESULTS:
+        return RESULTS[method](*result)
+    if method == 'query_donelist':
+        return [DoneRecord(*row) for row in result]
+    if method == 'show' and isinstance(result, list):
+        record = RECORDS[args[0] if args else kwargs['arg']]
+        return [record(*row) for row in result]
+    if isinstance(result, list) and result and all(isinstance(row, list) for row in result):
+        return [tuple(row) for row in result]
+    return result
+
+
+def stop(db_name: str) -> bool:
+    """ Stop the daemon serving db_name. Return False if none is running. """
+    remote = connect(db_name)
+    if remote is None:
+        return False
+    remote.call(SHUTDOWN)
+    return True
@@ -4,16 +4,39 @@ __all__ = ['Command']
 
 import csv
 import json
+import sys
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Sequence, Tuple
-from geekhours.database import Database
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+from geekhours.aggregate import MONTHS_AND_DAYS, Summary
+from geekhours.cache import CAPACITY, ResultCache, cached
+from geekhours.database import CourseResult, Database, DoneRecord, ImportResult, MergeResult
+from geekhours.instrument import Instrument
+from geekhours.snapshot import Snapshot
+
+IMPORT_FORMATS = {
+    '.csv': 'csv',
+    '.json': 'json',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+READ_CHUNK_SIZE = 65536
 
 
 class Command:
     """ Command class provides command-line interface to manipulate the database. """
 
-    def __init__(self, db_name: str):
-        self.database = Database(db_name)
+    def __init__(self,
+                 db_name: str,
+                 profile: str = None,
+                 instrument: Instrument = None,
+                 cache_size: int = CAPACITY):
+        self.database = Database(db_name, profile)
+        self.cache = ResultCache(cache_size)
+        if instrument:
+            instrument.attach(self.database)
         self.database.create_table()
 
     def show_column(self, arg: str):
@@ -26,14 +49,87 @@ class Command:
         records = self.database.show(arg)
         return records
 
-    def insert_course(self, arg: List[str]):
+    def iter_rows(self, arg: str, size: int = 1000) -> Iterator[Tuple]:
+        """ Call database.iter_rows() """
+        return self.database.iter_rows(arg, size)
+
+    def query_donelist(self,
+                       since: str = None,
+                       until: str = None,
+                       course: str = None,
+                       limit: int = None,
+                       after_id: int = None) -> List[DoneRecord]:
+        """ Call database.query_donelist() """
+        return self.database.query_donelist(since, until, course, limit, after_id)
+
+    def iter_donelist(self,
+                      since: str = None,
+                      until: str = None,
+                      course: str = None,
+                      limit: int = None,
+                      after_id: int = None) -> Iterator[DoneRecord]:
+        """ Call database.iter_donelist() """
+        return self.database.iter_donelist(since, until, course, limit, after_id)
+
+    def insert_course(self, arg: Iterable[str]) -> CourseResult:
         """ Call database.insert_course() """
-        self.database.insert_course(arg)
+        return self.database.insert_course(arg)
+
+    def import_course(self, srcfile: str, courses: Iterable[str] = ()) -> CourseResult:
+        """ Insert the course names listed in a file in one transaction.
+
+        args:
+            srcfile: File path with one course name per line, or '-' for the
+                     standard input. Blank lines and lines starting with '#'
+                     are ignored.
+            courses: Course names inserted together with the file.
+        """
+        if srcfile == '-':
+            return self.insert_course(list(courses) + list(self.read_courses(sys.stdin)))
+
+        with open(str(srcfile), 'r') as infile:
+            return self.insert_course(list(courses) + list(self.read_courses(infile)))
 
     def insert_donelist(self, date: str, course: str, duration: str):
         """ Call database.insert_donelist() """
         self.database.insert_donelist(date, course, duration)
 
+    def insert_donelist_many(self, records: Iterable, batch_size: int = 1000) -> ImportResult:
+        """ Call database.insert_donelist_many() """
+        return self.database.insert_donelist_many(records, batch_size)
+
+    def import_donelist(self,
+                        srcfile: str,
+                        fmt: str = None,
+                        batch_size: int = 1000) -> ImportResult:
+        """ Import records into donelist from a file.
+
+        The file is read lazily and the records are passed to
+        database.insert_donelist_many(). Each record must provide the date,
+        course and duration either as named fields or as a row of
+        [date, course, duration] or [id, date, course, duration], so files
+        written by dump_to_csv() and dump_to_json() can be imported as is.
+
+        args:
+            srcfile: File path to import.
+            fmt: 'csv', 'json' or 'ndjson'. Guessed from the file extension if omitted.
+            batch_size: Number of records written at a time.
+        """
+        if not fmt:
+            fmt = IMPORT_FORMATS.get(Path(srcfile).suffix.lower())
+        readers = {'csv': self.read_csv, 'json': self.read_json, 'ndjson': self.read_ndjson}
+
+        if fmt not in readers:
+            raise ValueError('Unknown import format: {}'.format(srcfile))
+
+        with open(str(srcfile), 'r', newline='') as infile:
+            records = (self.normalize_record(record) for record in readers[fmt](infile))
+            return self.insert_donelist_many(records, batch_size)
+
+    def merge(self, other_db: str, policy: str = 'keep') -> MergeResult:
+        """ Call database.merge() """
+        return self.database.merge(other_db, policy)
+
     def remove_course(self, arg: str):
         """ Call database.remove_course() """
         self.database.remove_course(arg)
@@ -42,36 +138,103 @@ class Command:
         """ Call database.remove_donelist() """
         self.database.remove_donelist(date, course)
 
-    def show_total_hours(self):
-        """ Call database.get_total_hours() """
-        key = ['total_hours']
-        records = self.database.get_total_hours()
-        formatted = self.map_keys_to_dict(key, records)
-        formatted.update(self.show_total_hours_course())
-        formatted.update(self.show_total_hours_week())
-        formatted.update(self.show_total_hours_month())
-        return formatted
-
-    def show_total_hours_course(self):
+    @cached
+    def show_total_hours(self, course=None, since: str = None, until: str = None):
+        """ Call database.get_summary()
+
+        Build the total hours, the total hours per course, per week and per
+        month from a single scan of donelist.
+
+        args:
+            course: Course name or list of course names to sum up.
+            since: First date to sum up in YYYY-MM-DD format.
+            until: Last date to sum up in YYYY-MM-DD format.
+        """
+        summary = Summary()
+
+        for name, week, month, minutes in self.database.get_summary(course, since, until):
+            summary.add(name, str(week), month, minutes)
+
+        return summary.to_dict()
+
+    @cached
+    def show_total_hours_course(self, course=None, since: str = None, until: str = None):
         """ Call database.get_total_hours_course() """
         key = ['total_hours_per_course']
-        records = self.database.get_total_hours_course()
+        records = self.database.get_total_hours_course(course, since, until)
         return self.map_keys_to_dict(key, records)
 
-    def show_total_hours_week(self, course: str = None):
+    @cached
+    def show_total_hours_week(self, course=None, since: str = None, until: str = None):
         """ Call database.get_total_hours_week() """
         key = ['total_hours_per_week']
-        records = self.database.get_total_hours_week(course)
+        records = self.database.get_total_hours_week(course, since, until)
         records = self.name_months_and_days(records)
         return self.map_keys_to_dict(key, records)
 
-    def show_total_hours_month(self, course: str = None):
+    @cached
+    def show_total_hours_month(self, course=None, since: str = None, until: str = None):
         """ Call database.get_total_hours_month() """
         key = ['total_hours_per_month']
-        records = self.database.get_total_hours_month(course)
+        records = self.database.get_total_hours_month(course, since, until)
         records = self.name_months_and_days(records)
         return self.map_keys_to_dict(key, records)
 
+    @cached
+    def show_total_hours_by(self, by: str, course=None, since: str = None, until: str = None):
+        """ Call database.get_total_hours_by()
+
+        The days of week are named as in show_total_hours_week().
+        """
+        key = ['total_hours_per_{}'.format(by)]
+        records = self.database.get_total_hours_by(by, course, since, until)
+        if by == 'weekday':
+            records = self.name_months_and_days(records)
+        return self.map_keys_to_dict(key, records)
+
+    @cached
+    def show_stats(self, course=None, since: str = None, until: str = None) -> Dict:
+        """ Show the trends of the study time
+
+        Compute the rolling averages, the streaks, the percentiles of the
+        session length and the week over week deltas of DailyMatrix.report()
+        from the minutes per course and day. The days range from since, or
+        the first record, to until, or the last record.
+        """
+        # NumPy is imported with analytics, so only the stats pay for it.
+        from geekhours.analytics import DailyMatrix  # pylint: disable=import-outside-toplevel
+
+        rows = self.database.get_daily_minutes(course, since, until)
+        first, last = [
+            datetime.strptime(day, '%Y-%m-%d').toordinal() if day else None
+            for day in [since, until]
+        ]
+        return DailyMatrix.from_rows(rows, first, last).report()
+
+    def cache_stats(self) -> Dict:
+        """ Return the statistics of the cache of the total hours. """
+        return self.cache.stats()._asdict()
+
+    def rebuild_rollups(self):
+        """ Call database.rebuild_rollups() """
+        self.database.rebuild_rollups()
+
+    def check_rollups(self) -> Dict:
+        """ Call database.check_rollups() """
+        return self.database.check_rollups()
+
+    def dump_to_snapshot(self, snapshotfile: str) -> int:
+        """ Write the records of donelist to a snapshot file.
+
+        Return the number of records. The file is read by Snapshot.load().
+
+        args:
+            snapshotfile: File path to save. It must not exist.
+        """
+        snapshot = Snapshot.from_database(self.database)
+        snapshot.save(snapshotfile)
+        return len(snapshot)
+
     def map_keys_to_dict(self, keys: List, seq: List) -> Dict:
         """
         Make a dictionary key and value pairs of the 0th element and 1st
@@ -88,19 +251,39 @@ class Command:
         return self.map_keys_to_seq(keys, res)
 
     @staticmethod
-    def dump_to_csv(records: str, csvfile: str, fields: Tuple):
+    @contextmanager
+    def open_output(outfile: str, newline: str = None):
+        """ Open a file to write records.
+
+        '-' is the standard output. Other files must not exist.
+
+        args:
+            outfile: File path to save, or '-'.
+            newline: newline argument of open().
+        """
+        if outfile == '-':
+            yield sys.stdout
+            return
+
+        outfile = Path(outfile)
+
+        if outfile.exists():
+            raise FileExistsError('{} exists'.format(outfile))
+        with open(str(outfile), 'w', newline=newline) as out:
+            yield out
+
+    @staticmethod
+    def dump_to_csv(records: Iterable, csvfile: str, fields: Tuple):
         """ dump outputs to comma separated CSV.
 
+        The records are written one by one as they are read.
+
         args:
             records: Target data to dump.
-            csvfile: File path to save.
+            csvfile: File path to save, or '-' for the standard output.
             fields: Tuple object of a header row of the records.
         """
-        csvfile = Path(csvfile)
-
-        if csvfile.exists():
-            raise FileExistsError('{} exists'.format(csvfile))
-        with open(str(csvfile), 'w', newline='') as outcsv:
+        with Command.open_output(csvfile, newline='') as outcsv:
             writer = csv.DictWriter(outcsv, fieldnames=fields)
             writer.writeheader()
             csv_writer = csv.writer(outcsv, delimiter=',')
@@ -108,19 +291,40 @@ class Command:
                 csv_writer.writerow(record)
 
     @staticmethod
-    def dump_to_json(records: str, jsonfile: str):
+    def dump_to_json(records: Iterable, jsonfile: str):
         """ dump outputs to JSON and write it to a file.
 
+        The records are written one by one as they are read, and the output
+        is the same as json.dump() of the list of the records.
+
         args:
             records: Target data to write.
-            jsonfile: File path to save.
+            jsonfile: File path to save, or '-' for the standard output.
         """
-        jsonfile = Path(jsonfile)
+        with Command.open_output(jsonfile) as outjson:
+            outjson.write('[')
+            for i, record in enumerate(records):
+                if i:
+                    outjson.write(', ')
+                outjson.write(json.dumps(record))
+            outjson.write(']')
 
-        if jsonfile.exists():
-            raise FileExistsError('{} exists'.format(jsonfile))
-        with open(str(jsonfile), 'w') as outjson:
-            json.dump(records, outjson)
+    @staticmethod
+    def dump_to_ndjson(records: Iterable, ndjsonfile: str, fields: Tuple = None):
+        """ dump outputs to NDJSON, one JSON value per line.
+
+        args:
+            records: Target data to write.
+            ndjsonfile: File path to save, or '-' for the standard output.
+            fields: Tuple object of the keys of the records. If given, each
+                    record is written as an object, otherwise as an array.
+        """
+        with Command.open_output(ndjsonfile) as outjson:
+            for record in records:
+                if fields:
+                    record = dict(zip(fields, record))
+                outjson.write(json.dumps(record))
+                outjson.write('\n')
 
     @staticmethod
     def name_months_and_days(records: List) -> List:
@@ -149,33 +353,11 @@ class Command:
         12           | Dec
 
         """
-        months_and_days = {
-            '01': 'Jan',
-            '02': 'Feb',
-            '03': 'Mar',
-            '04': 'Apr',
-            '05': 'May',
-            '06': 'Jun',
-            '07': 'Jul',
-            '08': 'Aug',
-            '09': 'Sep',
-            '10': 'Oct',
-            '11': 'Nov',
-            '12': 'Dec',
-            '0': 'Sun',
-            '1': 'Mon',
-            '2': 'Tue',
-            '3': 'Wed',
-            '4': 'Thu',
-            '5': 'Fri',
-            '6': 'Sat',
-        }
-
         named = []
 
         for record in records:
-            if record[0] in months_and_days:
-                entry = (months_and_days[record[0]], record[1])
+            if record[0] in MONTHS_AND_DAYS:
+                entry = (MONTHS_AND_DAYS[record[0]], record[1])
                 named.append(entry)
 
         return named
@@ -214,3 +396,100 @@ class Command:
             res[elem[0]] = elem[1]
 
         return res
+
+    @staticmethod
+    def normalize_record(record) -> Tuple:
+        """ Normalize a record read from a file to a tuple of (date, course, duration).
+
+        A record which cannot be normalized is returned as is and will be
+        rejected by database.insert_donelist_many().
+        """
+        if isinstance(record, dict):
+            return (record.get('date'), record.get('course'), record.get('duration'))
+        if isinstance(record, (list, tuple)) and len(record) == 4:
+            return tuple(record[1:])
+        return record
+
+    @staticmethod
+    def read_csv(infile) -> Iterator:
+        """ Read records from comma separated CSV lazily.
+
+        If the first row is a header containing 'date' and 'course', the
+        records are yielded as dictionaries.
+        """
+        reader = csv.reader(infile)
+        header = next(reader, None)
+
+        if header is None:
+            return
+        if 'date' in header and 'course' in header:
+            for row in reader:
+                yield dict(zip(header, row))
+        else:
+            yield header
+            for row in reader:
+                yield row
+
+    @staticmethod
+    def read_json(infile) -> Iterator:
+        """ Read records from a JSON array lazily.
+
+        The file is read in chunks and each element of the top-level array is
+        decoded as soon as it is complete, so the whole document is never
+        loaded into memory.
+        """
+        decoder = json.JSONDecoder()
+        buf = infile.read(READ_CHUNK_SIZE).lstrip()
+        eof = False
+
+        if not buf.startswith('['):
+            raise ValueError('The JSON file must contain an array of records.')
+        pos = 1
+
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+
+            if pos < len(buf) and buf[pos] == ']':
+                return
+
+            if pos < len(buf):
+                try:
+                    record, end = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    if eof:
+                        raise
+                else:
+                    pos = end
+                    yield record
+                    continue
+
+            if eof:
+                raise ValueError('The JSON array is not terminated.')
+            chunk = infile.read(READ_CHUNK_SIZE)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+
+    @staticmethod
+    def read_ndjson(infile) -> Iterator:
+        """ Read records from newline delimited JSON lazily.
+
+        A line which is not valid JSON is yielded as None to be rejected.
+        """
+        for line in infile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+    @staticmethod
+    def read_courses(infile) -> Iterator[str]:
+        """ Read course names, one per line, lazily. """
+        for line in infile:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
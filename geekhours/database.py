@@ -1,19 +1,227 @@
 """ database.py is a module to communicate with a database. """
 
-from datetime import datetime
+import os
+import re
 import sqlite3
-from typing import List
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date as datetime_date, datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+from geekhours import bucket, migration, rollup, tuning
+from geekhours.instrument import CountingCursor, Instrument, Metric
+from geekhours.result import Course, CourseResult, DoneRecord, ImportResult, MergeResult
+from geekhours.util import parse_duration
+
+# Bucket of get_total_hours_by() and its column in donelist, its rollup
+# table and its column in the rollup table
+BUCKETS = OrderedDict([
+    ('day', ('date', 'rollup_day', 'day')),
+    ('week', ('week', 'rollup_week', 'week')),
+    ('month', ('month', 'rollup_month', 'month')),
+    ('year', ('year', 'rollup_month', 'substr(month, 1, 4)')),
+    ('weekday', ('weekday', 'rollup_month', 'weekday')),
+])
+
+# Type of the records of each table
+RECORDS = {'course': Course, 'donelist': DoneRecord}
+
+# Duration of a record of donelist given the one of the same date and
+# course in the other database of Database.merge(), per conflict policy
+MERGE_POLICIES = OrderedDict([
+    ('keep', None),
+    ('sum', 'donelist.duration + other_done.duration'),
+    ('replace', 'other_done.duration'),
+])
+
+# Records of donelist with the course names, filtered and ordered by the callers
+DONELIST = ('SELECT donelist.id, date, course.name AS course, duration / 60.0 AS duration '
+            'FROM donelist INNER JOIN course ON course.id = donelist.course_id')
+
+DATE_PATTERN = re.compile(r'^[0-9]{4}-[0-9]{2}-[0-9]{2}$')
+
+
+def is_valid_date(date: str) -> bool:
+    """ Return True if date is an existing date in YYYY-MM-DD format. """
+    if not isinstance(date, str) or not DATE_PATTERN.match(date):
+        return False
+    try:
+        datetime_date(int(date[:4]), int(date[5:7]), int(date[8:]))
+    except ValueError:
+        return False
+    return True
+
+
+def date_range(since: str = None,
+               until: str = None,
+               column: str = 'date') -> Tuple[List[str], List]:
+    """ Return the conditions of a range of dates and their parameters.
+
+    Args:
+        column: Column of the date, such as donelist.date or rollup_day.day.
+
+    Raises:
+        ValueError: since or until is not a valid date.
+    """
+    where = []
+    params = []
+
+    for date, operator in [(since, '>='), (until, '<=')]:
+        if date is not None:
+            if not is_valid_date(date):
+                raise ValueError('Invalid date: {}'.format(date))
+            where.append('{} {} ?'.format(column, operator))
+            params.append(date)
+
+    return where, params
+
+
+def course_filter(course, where: List[str], params: List, column: str = 'course_id'):
+    """ Add the condition on the course names to where and params.
+
+    A single name is compared with '=', so the rows of the course keep
+    the order of the index on course_id and date.
+
+    Args:
+        course: Course name or names, or None for all the courses.
+        column: Column of the course id.
+    """
+    if isinstance(course, str):
+        where.append('{} = (SELECT id FROM course WHERE name = ?)'.format(column))
+        params.append(course)
+    elif course is not None:
+        courses = list(course)
+        where.append('{} IN (SELECT id FROM course WHERE name IN ({}))'.format(
+            column, ', '.join('?' * len(courses))))
+        params.extend(courses)
+
+
+class Connection(sqlite3.Connection):
+    """ sqlite3.Connection which leaves the transaction of Database.batch() open.
+
+    The connection is opened in autocommit mode (isolation_level=None), so
+    sqlite3 never begins or commits a transaction implicitly: Python 3.5
+    would commit before the DDL, PRAGMA and SAVEPOINT statements run in the
+    transactions of the migrations, the imports and the batches.
+
+    The methods of Database run their statements in 'with self.con' blocks,
+    which begin a transaction unless one is open, and commit or roll back
+    on exit. In a batch, the blocks exit without either, and the batch
+    commits or rolls back all the calls at once.
+    """
+
+    batch = False
+
+    # Instrument counting the rows of the statements, set by Instrument.attach()
+    instrument = None
+
+    def cursor(self, factory=None):
+        """ Return a new cursor, a CountingCursor while an Instrument is attached. """
+        if factory is None:
+            factory = sqlite3.Cursor if self.instrument is None else CountingCursor
+        return super().cursor(factory)
+
+    def execute(self, *args):
+        """ Execute a statement on a new cursor and return the cursor. """
+        if self.instrument is None:
+            return super().execute(*args)
+        # sqlite3.Connection.execute() does not call cursor().
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        """ Execute a statement for each parameters on a new cursor and return the cursor. """
+        if self.instrument is None:
+            return super().executemany(*args)
+        return self.cursor().executemany(*args)
+
+    def begin(self, immediate: bool = False) -> 'Connection':
+        """ Begin a transaction unless one is open and return the connection.
+
+        Args:
+            immediate: Take the write lock at the beginning of the transaction.
+        """
+        if not self.in_transaction:
+            self.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        return self
+
+    def __enter__(self):
+        return self.begin()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.batch:
+            return False
+        return super().__exit__(exc_type, exc_value, traceback)
 
 
 class Database:
     """ Database class initializes and manipulates SQLite3 database. """
 
-    def __init__(self, db_name):
-        self.con = sqlite3.connect(db_name)
+    def __init__(self, db_name, profile: str = None, check_same_thread: bool = True):
+        """ Connect to db_name and apply the tuning profile.
+
+        Args:
+            db_name: Path of the database.
+            profile: Name of tuning.PROFILES. If omitted, the profile is
+                     selected by the environment variable or the config file.
+            check_same_thread: Passed to sqlite3.connect(). Disable it only
+                               if the threads never use the Database at once.
+        """
+        self.profile, pragmas = tuning.load(db_name, profile)
+        self.con = sqlite3.connect(db_name,
+                                   isolation_level=None,
+                                   check_same_thread=check_same_thread,
+                                   factory=Connection)
+        tuning.apply(self.con, pragmas)
+        # Enforce donelist.course_id and delete the records of a removed course.
+        self.con.execute('PRAGMA foreign_keys = ON')
         self.cur = self.con.cursor()
         self.donelist = 'donelist'
         self.course = 'course'
 
+    def instrument(self, callback: Callable[[Metric], None] = None) -> Instrument:
+        """ Record the latency of the methods and the statements.
+
+        Return the attached Instrument. Call its report() for the summary,
+        and its detach() to stop recording.
+
+        Args:
+            callback: Function called with an instrument.Metric when a
+                      method returns or a statement ends.
+        """
+        instrument = Instrument(callback)
+        instrument.attach(self)
+        return instrument
+
+    @contextmanager
+    def batch(self, immediate: bool = False):
+        """ Run the calls in the block in one transaction.
+
+        The transaction is committed at the end of the block, or rolled back
+        if the block raises. create_table() and migrate() manage their own
+        transaction and must not be called in the block.
+
+        Args:
+            immediate: Take the write lock at the beginning of the block.
+        """
+        self.con.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        self.con.batch = True
+        try:
+            yield self
+        except BaseException:
+            self.con.batch = False
+            self.con.rollback()
+            raise
+        self.con.batch = False
+        self.con.commit()
+
+    def data_version(self) -> Tuple[int, int]:
+        """ Return the version of the data seen by the connection.
+
+        The version changes when another connection commits or when this
+        connection changes rows. It is read without accessing any table.
+        """
+        return self.con.execute('PRAGMA data_version').fetchone()[0], self.con.total_changes
+
     def close_db(self):
         """ Close the database """
         if self.con:
@@ -23,9 +231,16 @@ class Database:
         """
         Create table.
 
-        donelist: Table for registration of date, course name and duration you studied.
-        course: Table for validation of course name.
+        donelist: Table for registration of date, course and duration you studied.
+        course: Table of the course names, referred to by donelist.course_id.
+
+        The schema version is read first, and nothing else is done if the
+        database is up to date, so the commands which only read the
+        database never take the write lock.
         """
+        if migration.get_version(self.con) == migration.SCHEMA_VERSION:
+            return
+
         donelist = ("CREATE TABLE IF NOT EXISTS donelist ("
                     "id INTEGER PRIMARY KEY AUTOINCREMENT, "
                     "date TEXT NOT NULL, "
@@ -40,58 +255,215 @@ class Database:
             self.cur.execute(donelist)
             self.cur.execute(course)
 
+        self.migrate()
+
+    def migrate(self) -> int:
+        """ Upgrade the schema of the database in place.
+
+        Apply the migrations which have not been applied yet and return the
+        schema version of the database.
+        """
+        return migration.migrate(self.con)
+
     def get_column(self, table: str):
-        """ Get column names """
-        self.con.row_factory = sqlite3.Row
-        cur = self.con.cursor()
+        """ Get column names
 
-        if table == self.course:
-            course_columns = cur.execute('SELECT * FROM course').fetchone()
-            columns = course_columns.keys()
-        elif table == self.donelist:
-            donelist_columns = cur.execute('SELECT * FROM donelist').fetchone()
-            columns = donelist_columns.keys()
-        return columns
+        The names are the fields of the records of show(), so no query is
+        run and they are returned for an empty table as well.
+        """
+        if table not in RECORDS:
+            raise RuntimeError("No such table.")
+        return list(RECORDS[table]._fields)
 
     def show(self, table: str):
-        """  Show table """
+        """  Show table
+
+        Return the records of table as Course or DoneRecord. The duration
+        of donelist is returned in hours.
+        """
+        sql = self.select(table)
+        return self._cursor(table).execute(sql).fetchall()
+
+    def iter_rows(self, table: str, size: int = 1000) -> Iterator[Tuple]:
+        """ Iterate over the records of table
+
+        Unlike show(), the records are fetched from the cursor size records
+        at a time, so the memory usage does not depend on the size of the
+        table. The duration of donelist is returned in hours.
+
+        Args:
+            table: 'course' or 'donelist'.
+            size: Number of records fetched at a time.
+        """
+        sql = self.select(table)
+        cur = self._cursor(table)
+        cur.execute(sql)
+        return self._fetch(cur, size)
+
+    def query_donelist(self,
+                       since: str = None,
+                       until: str = None,
+                       course: str = None,
+                       limit: int = None,
+                       after_id: int = None) -> List[DoneRecord]:
+        """ Query the records of donelist in the order of date and course.
+
+        The records of a date are in the order the courses were registered.
+        The filters are evaluated by SQLite on the indexes of donelist.
+        The pages are split by the key of the last record of the previous
+        page rather than OFFSET, so every page costs the same.
+
+        The duration is returned in hours.
+
+        Args:
+            since: First date in YYYY-MM-DD format.
+            until: Last date in YYYY-MM-DD format.
+            course: Course name.
+            limit: Maximum number of records.
+            after_id: Id of the last record of the previous page.
+
+        Raises:
+            ValueError: Invalid date or limit, or after_id does not exist.
+        """
+        sql, params = self._query_donelist(since, until, course, limit, after_id)
+        return self._cursor(self.donelist).execute(sql, params).fetchall()
+
+    def iter_donelist(self,
+                      since: str = None,
+                      until: str = None,
+                      course: str = None,
+                      limit: int = None,
+                      after_id: int = None,
+                      size: int = 1000) -> Iterator[DoneRecord]:
+        """ Iterate over the records of query_donelist() fetching size records at a time. """
+        sql, params = self._query_donelist(since, until, course, limit, after_id)
+        cur = self._cursor(self.donelist)
+        cur.execute(sql, params)
+        return self._fetch(cur, size)
+
+    def _query_donelist(self,
+                        since: str = None,
+                        until: str = None,
+                        course: str = None,
+                        limit: int = None,
+                        after_id: int = None) -> Tuple[str, List]:
+        """ Return the query and its parameters of query_donelist(). """
+        where, params = date_range(since, until)
+        course_filter(course, where, params)
+
+        if after_id is not None:
+            last = self.con.execute('SELECT date, course_id FROM donelist WHERE id = ?',
+                                    (after_id,)).fetchone()
+            if last is None:
+                raise ValueError('No such record: {}'.format(after_id))
+            # 'date >= ?' lets the index seek to the first date of the page.
+            where.append('date >= ? AND (date > ? OR (date = ? AND course_id > ?))')
+            params.extend([last[0], last[0], last[0], last[1]])
+
+        sql = DONELIST
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY date, course_id'
+
+        if limit is not None:
+            if limit < 1:
+                raise ValueError('limit must be 1 or more.')
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        return sql, params
+
+    def select(self, table: str) -> str:
+        """ Return the query to show table in the order of id """
         if table == self.course:
-            ret = self.cur.execute('SELECT * FROM course').fetchall()
-        elif table == self.donelist:
-            ret = self.cur.execute('SELECT * FROM donelist').fetchall()
-        else:
-            raise RuntimeError("No such table.")
-        return ret
+            return 'SELECT id, name FROM course ORDER BY id'
+        if table == self.donelist:
+            return DONELIST + ' ORDER BY donelist.id'
+        raise RuntimeError("No such table.")
+
+    def _cursor(self, table: str) -> sqlite3.Cursor:
+        """ Return a new cursor building the records of table.
 
-    def insert_course(self, courses: List[str]):
+        The row factory is set on the cursor only, so the other queries of
+        the connection still return plain tuples.
+        """
+        make = RECORDS[table]._make
+        cur = self.con.cursor()
+        cur.row_factory = lambda _, row: make(row)
+        return cur
+
+    @staticmethod
+    def _fetch(cur: sqlite3.Cursor, size: int) -> Iterator[Tuple]:
+        """ Yield the records of cur fetching size records at a time. """
+        while True:
+            rows = cur.fetchmany(size)
+            if not rows:
+                break
+            for row in rows:
+                yield row
+
+    def insert_course(self, courses: Iterable[str]) -> CourseResult:
         """ Insert course name.
 
-        Insert course name into the 'course' table.
-        Insertion of the course name which is already registered will be discarded.
+        Insert course names into the 'course' table in one transaction.
+        Insertion of the course name which is already registered, or given
+        twice, will be discarded.
+
+        Return the names added and the names skipped as duplicates.
+
+        Raises:
+            ValueError: A course name is not a non-empty string. No course is inserted.
         """
-        for elem in courses:
-            with self.con:
-                self.con.execute('INSERT INTO course(name) VALUES (?)', (elem,))
-                print("Add '{}' in course.".format(elem))
+        courses = list(courses)
+        for course in courses:
+            if not isinstance(course, str) or not course:
+                raise ValueError('Invalid course name: {!r}'.format(course))
+
+        added = []
+        skipped = []
+
+        with self.con.begin(immediate=True):
+            registered = set()
+            unique = list(OrderedDict.fromkeys(courses))
+            # Keep the number of parameters below SQLITE_MAX_VARIABLE_NUMBER.
+            for i in range(0, len(unique), 500):
+                chunk = unique[i:i + 500]
+                placeholders = ', '.join('?' * len(chunk))
+                rows = self.con.execute(
+                    'SELECT name FROM course WHERE name IN ({})'.format(placeholders), chunk)
+                registered.update(row[0] for row in rows)
+
+            for course in courses:
+                if course in registered:
+                    skipped.append(course)
+                else:
+                    added.append(course)
+                    registered.add(course)
+
+            self.con.executemany('INSERT OR IGNORE INTO course(name) VALUES (?)',
+                                 ((course,) for course in added))
+
+        return CourseResult(added, skipped)
 
     def insert_donelist(self, date: str, course: str, duration: str):
         """ Insert donelist.
 
         Insert donelist into the 'donelist' table.
         The course name must be a registered name in the 'course' table.
+        The duration is parsed by parse_duration() and stored in minutes.
         """
-        check_course_name = self.con.execute('SELECT name FROM course WHERE name=?', (course,))
-        check_course_name = check_course_name.fetchall()
+        course_id = self.con.execute('SELECT id FROM course WHERE name=?', (course,)).fetchone()
+
+        if course_id is None:
+            raise RuntimeError("No such course in 'course' table.")
+
         check_duplicate = self.con.execute(
-            'SELECT date course FROM donelist WHERE date=? AND course=?', (
+            'SELECT date FROM donelist WHERE date=? AND course_id=?', (
                 date,
-                course,
+                course_id[0],
             ))
         check_duplicate = check_duplicate.fetchall()
 
-        if not check_course_name:
-            raise RuntimeError("No such course in 'course' table.")
-
         if check_duplicate:
             raise RuntimeError("Record already exists in 'donelist' table.")
 
@@ -109,16 +481,186 @@ class Database:
         else:
             raise ValueError('Invalid date')
 
+        minutes = parse_duration(duration)
+
         with self.con:
-            self.con.execute('INSERT INTO donelist(date, course, duration) VALUES (?, ?, ?)', (
+            self.con.execute('INSERT INTO donelist(date, course_id, duration) VALUES (?, ?, ?)', (
                 date,
-                course,
-                duration,
+                course_id[0],
+                minutes,
             ))
             print("Add '{} {} {}' in donelist.".format(date, course, duration))
 
+    def insert_donelist_many(self, records: Iterable[Sequence[str]], batch_size: int = 1000):
+        """ Insert many records into donelist.
+
+        Insert (date, course, duration) records into the 'donelist' table in a
+        single transaction. The records are consumed lazily and written
+        batch_size records at a time with executemany().
+
+        A record is rejected if it is malformed, its date is not in YYYY-MM-DD
+        format, its course is not registered in the 'course' table or its
+        duration cannot be parsed by parse_duration(). A record whose date and course are already
+        registered is counted as a duplicate and discarded.
+
+        Args:
+            records: Iterable of (date, course, duration) sequences.
+            batch_size: Number of records written per executemany() call.
+
+        Returns:
+            ImportResult holding the number of inserted, duplicate and
+            rejected records.
+        """
+        if batch_size < 1:
+            raise ValueError('The batch size must be a positive integer.')
+
+        courses = dict(self.con.execute('SELECT name, id FROM course'))
+        records = iter(records)
+        inserted = duplicate = rejected = 0
+
+        with self.con.begin(immediate=True):
+            # The buckets are inserted with the records and the rollups are
+            # updated per batch, instead of per record by the triggers.
+            rollup.drop_triggers(self.con)
+            bucket.drop_triggers(self.con)
+
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+
+                valid = []
+                for record in batch:
+                    try:
+                        date, course, duration = record
+                        minutes = parse_duration(duration)
+                    except (TypeError, ValueError):
+                        rejected += 1
+                        continue
+                    if not is_valid_date(date) or course not in courses or minutes is None:
+                        rejected += 1
+                        continue
+                    course_id = courses[course]
+                    valid.append((date, course_id, minutes, date, course_id))
+
+                last_id = self.con.execute('SELECT MAX(id) FROM donelist').fetchone()[0] or 0
+                ret = self.con.executemany(
+                    'INSERT INTO donelist(date, course_id, duration, {}) '
+                    'SELECT new.date, new.course_id, new.duration, {} '
+                    'FROM (SELECT ? AS date, ? AS course_id, ? AS duration) AS new '
+                    'WHERE NOT EXISTS '
+                    '(SELECT 1 FROM donelist WHERE date=? AND course_id=?)'.format(
+                        bucket.COLUMNS, bucket.values('new')), valid)
+                inserted += max(ret.rowcount, 0)
+                duplicate += len(valid) - max(ret.rowcount, 0)
+                rollup.add_since(self.con, last_id)
+
+            bucket.create_triggers(self.con)
+            rollup.create_triggers(self.con)
+
+        return ImportResult(inserted, duplicate, rejected)
+
+    def merge(self, other_db: str, policy: str = 'keep') -> MergeResult:
+        """ Merge another database into this one.
+
+        The other database is attached and its courses and records are
+        copied with INSERT ... SELECT statements in one transaction. A
+        record of the other database whose date and course are already
+        registered is a conflict, resolved by the policy:
+
+            keep: Keep the duration of this database.
+            sum: Add the duration of the other database.
+            replace: Take the duration of the other database.
+
+        The rollups are updated once at the end instead of per record by the
+        triggers. It manages its own transaction and must not be called in
+        batch().
+
+        Args:
+            other_db: Path of the database to merge. It is only read.
+            policy: Key of MERGE_POLICIES.
+
+        Returns:
+            MergeResult holding the number of courses added, records inserted,
+            conflicts and records updated by the policy.
+
+        Raises:
+            FileNotFoundError: other_db does not exist.
+            ValueError: The policy is invalid, or other_db is this database
+                        or has another schema version.
+        """
+        if policy not in MERGE_POLICIES:
+            raise ValueError('Invalid policy: {}'.format(policy))
+        if not os.path.isfile(other_db):
+            raise FileNotFoundError('No such database: {}'.format(other_db))
+        databases = self.con.execute('PRAGMA database_list')
+        main_db = dict((row[1], row[2]) for row in databases)['main']
+        if main_db and os.path.samefile(main_db, other_db):
+            raise ValueError('Cannot merge a database into itself.')
+
+        # ATTACH is not allowed in a transaction.
+        self.con.execute('ATTACH DATABASE ? AS other', (other_db,))
+        try:
+            if self.con.execute('PRAGMA other.user_version').fetchone()[0] != \
+                    migration.SCHEMA_VERSION:
+                raise ValueError(
+                    'Schema of {} is not current. Open it with geekhours first.'.format(other_db))
+
+            # The records of the other database with the ids of the courses of this one
+            records = ('SELECT other_done.id, other_done.date, course.id AS course_id, '
+                       'other_done.duration FROM other.donelist AS other_done '
+                       'INNER JOIN other.course AS other_course '
+                       'ON other_course.id = other_done.course_id '
+                       'INNER JOIN main.course AS course ON course.name = other_course.name')
+            same = ('FROM ({}) AS other_done WHERE other_done.date = donelist.date '
+                    'AND other_done.course_id = donelist.course_id'.format(records))
+            with self.con.begin(immediate=True):
+                rollup.drop_triggers(self.con)
+                bucket.drop_triggers(self.con)
+
+                courses = self.con.execute('INSERT OR IGNORE INTO main.course(name) '
+                                           'SELECT name FROM other.course ORDER BY id').rowcount
+                conflicts = self.con.execute(
+                    'SELECT COUNT(*) FROM main.donelist WHERE EXISTS (SELECT 1 {})'.format(same))
+                conflicts = conflicts.fetchone()[0]
+
+                # The records are updated before the new ones are inserted,
+                # so that the inserted records are not updated again.
+                updated = 0
+                if MERGE_POLICIES[policy]:
+                    updated = self.con.execute(
+                        'UPDATE main.donelist SET duration = (SELECT {duration} {same}) '
+                        'WHERE EXISTS (SELECT 1 {same} '
+                        'AND {duration} != donelist.duration)'.format(
+                            duration=MERGE_POLICIES[policy], same=same)).rowcount
+
+                last_id = self.con.execute('SELECT MAX(id) FROM main.donelist').fetchone()[0]
+                inserted = self.con.execute(
+                    'INSERT INTO main.donelist(date, course_id, duration, {}) '
+                    'SELECT other_done.date, other_done.course_id, other_done.duration, {} '
+                    'FROM ({}) AS other_done '
+                    'WHERE NOT EXISTS (SELECT 1 FROM main.donelist AS done '
+                    'WHERE done.date = other_done.date AND done.course_id = other_done.course_id) '
+                    'ORDER BY other_done.id'.format(bucket.COLUMNS, bucket.values('other_done'),
+                                                    records)).rowcount
+
+                if updated:
+                    rollup.rebuild(self.con)
+                else:
+                    rollup.add_since(self.con, last_id or 0)
+                bucket.create_triggers(self.con)
+                rollup.create_triggers(self.con)
+        finally:
+            self.con.execute('DETACH DATABASE other')
+
+        return MergeResult(courses, inserted, conflicts, updated)
+
     def remove_course(self, course: str):
-        """ Remove course name from 'course' table. """
+        """ Remove course name from 'course' table.
+
+        The records of the course in donelist are removed with it by the
+        foreign key (ON DELETE CASCADE).
+        """
         ret = self.con.execute('SELECT name FROM course WHERE name=?', (course,))
         check = ret.fetchall()
 
@@ -134,95 +676,232 @@ class Database:
 
         Search record by date and course name and if found matched record, it will be removed.
         """
-        ret = self.con.execute('SELECT date, course FROM donelist WHERE date=? AND course=?', (
-            date,
-            course,
-        ))
+        ret = self.con.execute(
+            'SELECT donelist.id FROM donelist INNER JOIN course ON course.id = donelist.course_id '
+            'WHERE date=? AND course.name=?', (
+                date,
+                course,
+            ))
         check = ret.fetchall()
 
         if not check:
             raise RuntimeError("No such record in 'donelist' table.")
 
         with self.con:
-            self.cur.execute('DELETE FROM donelist WHERE date=? AND course=?', (
-                date,
-                course,
-            ))
+            self.cur.execute('DELETE FROM donelist WHERE id=?', check[0])
             print('Removed record.')
 
-    def get_total_hours(self):
+    def get_total_hours(self, course=None, since: str = None, until: str = None):
         """ Get the total hours
 
-        Get the total number of hours and return it.
+        Get the total number of hours from the 'rollup_month' table and return it.
+
+        Args:
+            course: Course name or list of course names to sum up.
+            since: First date to sum up in YYYY-MM-DD format.
+            until: Last date to sum up in YYYY-MM-DD format.
         """
+        sql, params = self._minutes(course, since, until)
         with self.con:
             total = self.cur.execute(
-                ("SELECT 'Total: ', SUM(donelist.duration) FROM donelist")).fetchall()
+                "SELECT 'Total: ', SUM(done.minutes) / 60.0 FROM ({}) AS done".format(sql),
+                params).fetchall()
 
         return total
 
-    def get_total_hours_course(self):
+    def get_summary(self, course=None, since: str = None, until: str = None):
+        """ Get the minutes for all the total hours reports in one scan
+
+        Scan the 'rollup_month' table once and return a cursor of
+        (course, week, month, minutes) rows, where week is the day number
+        of week from '0' (Sunday) to '6' (Saturday) and month is the month
+        number from '01' to '12'. Aggregating the rows gives the total
+        hours, the total hours per course, per week and per month at once.
+
+        The arguments are the same as get_total_hours().
+        """
+        sql, params = self._minutes(course, since, until)
+        return self.con.execute(
+            "SELECT course.name, done.weekday, done.month_number, SUM(done.minutes) "
+            "FROM ({}) AS done "
+            "INNER JOIN course ON course.id = done.course_id "
+            "GROUP BY done.course_id, done.month_number, done.weekday".format(sql), params)
+
+    def get_daily_minutes(self, course=None, since: str = None, until: str = None):
+        """ Get the minutes per course and day
+
+        Return a cursor of (course, day, minutes) rows of the registered
+        courses, where day is the ordinal of the date (date.toordinal()).
+        Without a date range they are read from the 'rollup_day' table,
+        otherwise from donelist through the index of the date range.
+
+        The arguments are the same as get_total_hours().
+        """
+        if since is None and until is None:
+            sql = 'SELECT course_id, day, minutes FROM rollup_day'
+            where, params = [], []
+        else:
+            sql = 'SELECT course_id, date AS day, duration AS minutes FROM donelist'
+            where, params = date_range(since, until)
+
+        course_filter(course, where, params)
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+
+        return self.con.execute(
+            "SELECT course.name, CAST(julianday(done.day) - 1721424.5 AS INTEGER), done.minutes "
+            "FROM ({}) AS done "
+            "INNER JOIN course ON course.id = done.course_id".format(sql), params)
+
+    def get_total_hours_course(self, course=None, since: str = None, until: str = None):
         """ Get the total hours per course
 
-        Get the total number of hours per course and return it.
+        Get the total number of hours per course from the 'rollup_month'
+        table and return it.
+
+        The arguments are the same as get_total_hours().
         """
+        sql, params = self._minutes(course, since, until)
         with self.con:
-            total = self.cur.execute(("SELECT course.name, SUM(donelist.duration) "
-                                      "FROM donelist "
-                                      "INNER JOIN course ON course.name = donelist.course "
-                                      "GROUP BY course.name")).fetchall()
+            total = self.cur.execute(("SELECT course.name, SUM(done.minutes) / 60.0 "
+                                      "FROM ({}) AS done "
+                                      "INNER JOIN course ON course.id = done.course_id "
+                                      "GROUP BY course.name").format(sql), params).fetchall()
         return total
 
-    def get_total_hours_week(self, course: str = None):
+    def get_total_hours_week(self, course=None, since: str = None, until: str = None):
         """ Get the total hours per week
 
-        Get the total number of hours per week and return it.
+        Get the total number of hours per day of week from the
+        'rollup_month' table and return it.
         If the course name is passed as an argument, return the total
         hours per week for each course.
 
-        Args:
-            course: Target course name to get the total hours.
+        The arguments are the same as get_total_hours().
         """
+        sql, params = self._minutes(course, since, until)
         with self.con:
-            if not course:
-                total = self.cur.execute(
-                    ("SELECT strftime('%w', donelist.date) AS week, SUM(donelist.duration) "
-                     "FROM donelist "
-                     "INNER JOIN course ON course.name = donelist.course "
-                     "GROUP BY week")).fetchall()
-            else:
-                total = self.cur.execute(
-                    ("SELECT strftime('%w', donelist.date) AS week, SUM(donelist.duration) "
-                     "FROM donelist "
-                     "INNER JOIN course ON course.name = donelist.course "
-                     "WHERE course=? "
-                     "GROUP BY week"), (course,)).fetchall()
+            total = self.cur.execute(("SELECT done.weekday AS week, SUM(done.minutes) / 60.0 "
+                                      "FROM ({}) AS done "
+                                      "INNER JOIN course ON course.id = done.course_id "
+                                      "GROUP BY week").format(sql), params).fetchall()
 
         return total
 
-    def get_total_hours_month(self, course=None):
+    def get_total_hours_month(self, course=None, since: str = None, until: str = None):
         """ Get the total hours per month
 
-        Get the total number of hours per month and return it.
+        Get the total number of hours per month from the 'rollup_month'
+        table and return it.
         If the course name is passed as an argument, return the total
         hours per month for each course.
 
+        The arguments are the same as get_total_hours().
+        """
+        sql, params = self._minutes(course, since, until)
+        with self.con:
+            total = self.cur.execute(("SELECT done.month_number, SUM(done.minutes) / 60.0 "
+                                      "FROM ({}) AS done "
+                                      "INNER JOIN course ON course.id = done.course_id "
+                                      "GROUP BY done.month_number").format(sql),
+                                     params).fetchall()
+
+        return total
+
+    def get_total_hours_by(self, by: str, course=None, since: str = None, until: str = None):
+        """ Get the total hours per calendar bucket
+
+        Get the total number of hours per bucket in the order of the buckets
+        and return it. Unlike get_total_hours_month(), the months of
+        different years are not merged.
+
+        Without a date range they are read from the rollup tables. With a
+        date range they are read from the bucket columns of donelist, where
+        the range of the buckets is served by their indexes.
+
         Args:
-            course: Target course name to get the total hours.
+            by: 'day', 'week' (ISO week such as '2019-W05'), 'month' (such as
+                '2019-01'), 'year' or 'weekday' ('0' (Sunday) to '6' (Saturday)).
+
+        The other arguments are the same as get_total_hours().
         """
+        if by not in BUCKETS:
+            raise ValueError('Invalid bucket: {}'.format(by))
+
+        column, table, key = BUCKETS[by]
+
+        if since is None and until is None:
+            sql = 'SELECT course_id, {} AS bucket, minutes FROM {}'.format(key, table)
+            where, params = [], []
+        else:
+            sql = 'SELECT course_id, {} AS bucket, duration AS minutes FROM donelist'.format(
+                column)
+            where, params = date_range(since, until)
+            # Redundant with the range of dates, but lets the index of the bucket seek it.
+            for date, condition in [(since, '{} >= ?'), (until, '{} <= ?')]:
+                if date is not None and by in ('week', 'month', 'year'):
+                    where.append(condition.format(column))
+                    params.append(self._bucket(by, date))
+
+        course_filter(course, where, params)
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+
         with self.con:
-            if not course:
-                total = self.cur.execute(
-                    ("SELECT strftime('%m', donelist.date) AS month, SUM(donelist.duration) "
-                     "FROM donelist "
-                     "INNER JOIN course ON course.name = donelist.course "
-                     "GROUP BY month")).fetchall()
-            else:
-                total = self.cur.execute(
-                    ("SELECT strftime('%m', donelist.date) AS month, SUM(donelist.duration) "
-                     "FROM donelist "
-                     "INNER JOIN course ON course.name = donelist.course "
-                     "WHERE course=? "
-                     "GROUP BY month"), (course,)).fetchall()
+            total = self.cur.execute(("SELECT done.bucket, SUM(done.minutes) / 60.0 "
+                                      "FROM ({}) AS done "
+                                      "INNER JOIN course ON course.id = done.course_id "
+                                      "GROUP BY done.bucket "
+                                      "ORDER BY done.bucket").format(sql), params).fetchall()
 
         return total
+
+    @staticmethod
+    def _bucket(by: str, date: str) -> str:
+        """ Return the bucket of a date in YYYY-MM-DD format. """
+        if by == 'week':
+            year, week, _ = datetime.strptime(date, '%Y-%m-%d').date().isocalendar()
+            return '{:04d}-W{:02d}'.format(year, week)
+        return date[:{'month': 7, 'year': 4}[by]]
+
+    def _minutes(self, course=None, since: str = None, until: str = None) -> Tuple[str, List]:
+        """ Return the query of the minutes to sum up and its parameters.
+
+        The query returns (course_id, weekday, month_number, minutes) rows.
+        Without a date range they are read from the 'rollup_month' table.
+        With a date range they are read from donelist, where the range is
+        served by the indexes starting with date, or with course and date
+        if the courses are given, so only the records in the range are read.
+        """
+        where = []
+        params = []
+
+        if since is None and until is None:
+            sql = ("SELECT course_id, weekday, substr(month, 6, 2) AS month_number, minutes "
+                   "FROM rollup_month")
+        else:
+            sql = ("SELECT course_id, weekday, substr(month, 6, 2) AS month_number, "
+                   "duration AS minutes FROM donelist")
+            where, params = date_range(since, until)
+
+        course_filter(course, where, params)
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+
+        return sql, params
+
+    def rebuild_rollups(self):
+        """ Rebuild the rollup tables
+
+        Recompute the rollup tables from donelist in one transaction.
+        """
+        with self.con:
+            rollup.rebuild(self.con)
+
+    def check_rollups(self) -> Dict[str, int]:
+        """ Check the rollup tables
+
+        Compare the rollup tables with a full recompute of donelist and
+        return the number of rows which differ per rollup table.
+        """
+        return rollup.check(self.con)
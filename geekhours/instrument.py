@@ -0,0 +1,211 @@
+""" instrument.py is a module to measure the queries of Database.
+
+Instrument.attach() wraps the public methods of a Database instance with
+timers and sets the trace callback of its connection. Nothing is wrapped
+until then, so a Database without an Instrument runs at full speed.
+
+A statement is timed from its start until the next statement starts or
+the outermost call of Database returns. If the call returns an iterator
+such as a cursor, the statement is timed until the next statement starts
+so that fetching the rows is included.
+
+While an Instrument is attached, the connection of the Database, a
+database.Connection, creates CountingCursor cursors. They count the rows
+fetched from a query, or changed by an INSERT, UPDATE or DELETE, as the
+rows of the statement.
+"""
+
+__all__ = ['Metric', 'CountingCursor', 'Instrument']
+
+import functools
+import re
+import sqlite3
+import time
+from collections import OrderedDict, namedtuple
+from collections.abc import Iterator
+from typing import Callable
+
+# kind is 'method' or 'statement'. rows is the number of rows of a method
+# returning a list, or the number of rows fetched or changed by a statement,
+# otherwise None.
+Metric = namedtuple('Metric', ['kind', 'name', 'seconds', 'rows'])
+
+# Literals in the statements given by the trace callback.
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b[0-9]+(?:\.[0-9]+)?\b")
+
+
+class CountingCursor(sqlite3.Cursor):
+    """ Cursor counting the rows of its statements for the Instrument of its connection.
+
+    The rows are added to connection.instrument, and nothing is counted
+    once the Instrument is detached.
+    """
+
+    def _add_rows(self, count: int):
+        """ Add count rows to the Instrument of the connection if it is attached. """
+        instrument = getattr(self.connection, 'instrument', None)
+        if instrument is not None:
+            instrument.add_rows(count)
+
+    def execute(self, *args):
+        """ Execute a statement and count the rows it changed. """
+        super().execute(*args)
+        # The rows of a query are counted as they are fetched.
+        self._add_rows(self.rowcount if self.description is None else 0)
+        return self
+
+    def executemany(self, *args):
+        """ Execute a statement for each parameters and count the rows it changed. """
+        super().executemany(*args)
+        self._add_rows(self.rowcount)
+        return self
+
+    def fetchone(self):
+        """ Fetch the next row and count it. """
+        row = super().fetchone()
+        self._add_rows(0 if row is None else 1)
+        return row
+
+    def fetchmany(self, *args):
+        """ Fetch the next rows and count them. """
+        rows = super().fetchmany(*args)
+        self._add_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        """ Fetch the remaining rows and count them. """
+        rows = super().fetchall()
+        self._add_rows(len(rows))
+        return rows
+
+    def __next__(self):
+        row = super().__next__()
+        self._add_rows(1)
+        return row
+
+
+class Instrument:
+    """ Instrument records the calls of the methods and the statements of Database.
+
+    Args:
+        callback: Function called with a Metric when a method returns or a
+                  statement ends.
+    """
+
+    def __init__(self, callback: Callable[[Metric], None] = None):
+        self.callback = callback
+        self.methods = OrderedDict()
+        self.statements = OrderedDict()
+        self._statement = None
+        self._depth = 0
+        self._cur = None
+
+    def attach(self, database):
+        """ Start recording the calls of database. """
+        for name in dir(type(database)):
+            method = getattr(database, name)
+            if not name.startswith('_') and callable(method):
+                setattr(database, name, self._wrap(name, method))
+
+        database.con.instrument = self
+        self._cur = database.cur
+        database.cur = database.con.cursor()
+        database.con.set_trace_callback(self._trace)
+
+    def detach(self, database):
+        """ Stop recording the calls of database. """
+        for name, method in list(vars(database).items()):
+            if getattr(method, '__instrument__', None) is self:
+                delattr(database, name)
+        database.con.instrument = None
+        if self._cur is not None:
+            database.cur = self._cur
+            self._cur = None
+        database.con.set_trace_callback(None)
+        self._end_statement()
+
+    def _wrap(self, name: str, method: Callable) -> Callable:
+        """ Return method recording its calls. """
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            self._depth += 1
+            begin = time.perf_counter()
+            result = None
+            try:
+                result = method(*args, **kwargs)
+                return result
+            finally:
+                seconds = time.perf_counter() - begin
+                self._depth -= 1
+                if not self._depth and not isinstance(result, Iterator):
+                    self._end_statement()
+                rows = len(result) if isinstance(result, list) else None
+                self._record(self.methods, Metric('method', name, seconds, rows))
+
+        wrapper.__instrument__ = self
+        return wrapper
+
+    def _trace(self, statement: str):
+        """ Trace callback of the connection.
+
+        The statements of a trigger are traced as comments or as the
+        statement firing the trigger again, and are timed as part of it.
+        """
+        if statement.startswith('--') or (self._statement and self._statement[0] == statement):
+            return
+        self._end_statement()
+        self._statement = [statement, time.perf_counter(), None]
+
+    def add_rows(self, count: int):
+        """ Add count rows to the statement running. A negative count is ignored. """
+        if self._statement and count >= 0:
+            self._statement[2] = (self._statement[2] or 0) + count
+
+    def _end_statement(self):
+        """ Record the statement running. """
+        if self._statement:
+            statement, begin, rows = self._statement
+            self._statement = None
+            self._record(
+                self.statements,
+                Metric('statement', LITERAL.sub('?', ' '.join(statement.split())),
+                       time.perf_counter() - begin, rows))
+
+    def _record(self, stats: OrderedDict, metric: Metric):
+        """ Add metric to stats and pass it to the callback. """
+        calls, seconds, rows = stats.get(metric.name, (0, 0.0, None))
+        if metric.rows is not None:
+            rows = (rows or 0) + metric.rows
+        stats[metric.name] = (calls + 1, seconds + metric.seconds, rows)
+        if self.callback:
+            self.callback(metric)
+
+    def report(self, width: int = 60) -> str:
+        """ Return the summary table of the methods and the statements.
+
+        The rows are sorted by the total time. The statements are cut at width.
+        """
+        self._end_statement()
+        lines = []
+
+        for title, stats in [('method', self.methods), ('statement', self.statements)]:
+            lines.append('{:<{width}} {:>6} {:>11} {:>10} {:>8}'.format(title,
+                                                                        'calls',
+                                                                        'total [ms]',
+                                                                        'mean [ms]',
+                                                                        'rows',
+                                                                        width=width))
+            for name, (calls, seconds, rows) in sorted(stats.items(),
+                                                       key=lambda item: item[1][1],
+                                                       reverse=True):
+                lines.append('{:<{width}} {:>6} {:>11.3f} {:>10.3f} {:>8}'.format(
+                    name if len(name) <= width else name[:width - 3] + '...',
+                    calls,
+                    seconds * 1e3,
+                    seconds * 1e3 / calls,
+                    '-' if rows is None else rows,
+                    width=width))
+            lines.append('')
+
+        return '\n'.join(lines)
@@ -0,0 +1,201 @@
+""" migration.py is a module to upgrade the database schema in place.
+
+The schema version of a database is stored in 'PRAGMA user_version'.
+A database created before the migrations were introduced has version 0.
+Each function in MIGRATIONS upgrades the schema by one version. The
+pending migrations are applied in order in one transaction together with
+the new version number.
+
+The records whose duration cannot be parsed are not converted. They are
+moved to the table donelist_invalid with a RuntimeWarning listing their
+ids, so that they can be fixed and registered again.
+"""
+
+__all__ = ['MIGRATIONS', 'SCHEMA_VERSION', 'get_version', 'migrate']
+
+import sqlite3
+import warnings
+from itertools import groupby
+from geekhours import bucket, rollup
+from geekhours.util import parse_duration
+
+
+def _to_minutes(duration):
+    """ Return the minutes of a duration, or None if it cannot be parsed. """
+    try:
+        return parse_duration(duration)
+    except ValueError:
+        return None
+
+
+def _set_aside(con: sqlite3.Connection, ids):
+    """ Move the donelist rows of ids to donelist_invalid and warn about them. """
+    if not ids:
+        return
+
+    con.execute('CREATE TABLE IF NOT EXISTS donelist_invalid ('
+                'id INTEGER PRIMARY KEY, '
+                'date TEXT NOT NULL, '
+                'course TEXT NOT NULL, '
+                'duration TEXT NOT NULL)')
+    con.executemany(
+        'INSERT INTO donelist_invalid(id, date, course, duration) '
+        'SELECT id, date, course, duration FROM donelist WHERE id = ?',
+        ((row_id,) for row_id in ids))
+    con.executemany('DELETE FROM donelist WHERE id = ?', ((row_id,) for row_id in ids))
+    warnings.warn(
+        'Invalid duration in donelist. The records are moved to the table '
+        'donelist_invalid. id: {}'.format(', '.join(str(row_id) for row_id in ids)),
+        RuntimeWarning)
+
+
+def add_donelist_indexes(con: sqlite3.Connection):
+    """ Version 1: Add indexes on donelist.
+
+    donelist_date_course: Unique index for the duplicate check and removal of records.
+    donelist_course_date: Covering index for the total hours per course.
+
+    The records registered twice before the unique index existed are
+    merged into the first one, which takes the sum of their durations.
+    The duplicate records whose duration cannot be parsed are set aside
+    in donelist_invalid instead.
+    """
+    rows = con.execute('SELECT done.date, done.course, done.id, done.duration '
+                       'FROM donelist AS done '
+                       'INNER JOIN (SELECT date, course FROM donelist GROUP BY date, course '
+                       'HAVING COUNT(*) > 1) AS dup '
+                       'ON dup.date = done.date AND dup.course = done.course '
+                       'ORDER BY done.date, done.course, done.id')
+
+    merged = []
+    invalid = []
+    for _, group in groupby(rows, key=lambda row: row[:2]):
+        valid = []
+        for _, _, row_id, duration in group:
+            minutes = _to_minutes(duration)
+            if minutes is None:
+                invalid.append(row_id)
+            else:
+                valid.append((row_id, minutes))
+        if valid:
+            # The durations are still TEXT, converted by convert_duration_to_minutes().
+            merged.append(('{:d}m'.format(sum(minutes for _, minutes in valid)), valid[0][0]))
+    _set_aside(con, invalid)
+
+    con.executemany('UPDATE donelist SET duration = ? WHERE id = ?', merged)
+    con.execute('DELETE FROM donelist WHERE id NOT IN '
+                '(SELECT MIN(id) FROM donelist GROUP BY date, course)')
+    con.execute('CREATE UNIQUE INDEX IF NOT EXISTS donelist_date_course '
+                'ON donelist(date, course)')
+    con.execute('CREATE INDEX IF NOT EXISTS donelist_course_date '
+                'ON donelist(course, date, duration)')
+
+
+def convert_duration_to_minutes(con: sqlite3.Connection):
+    """ Version 2: Store donelist.duration as an INTEGER number of minutes.
+
+    The durations registered as TEXT are parsed by parse_duration() and
+    the table is rebuilt with a CHECK constraint on the new column. The
+    records whose duration cannot be parsed are set aside in donelist_invalid.
+    """
+    con.create_function('geekhours_minutes', 1, _to_minutes)
+
+    invalid = con.execute('SELECT id FROM donelist WHERE geekhours_minutes(duration) IS NULL')
+    _set_aside(con, [row[0] for row in invalid])
+
+    con.execute("CREATE TABLE donelist_new ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "date TEXT NOT NULL, "
+                "course TEXT NOT NULL, "
+                "duration INTEGER NOT NULL "
+                "CHECK (typeof(duration) = 'integer' AND duration > 0))")
+    con.execute('INSERT INTO donelist_new(id, date, course, duration) '
+                'SELECT id, date, course, geekhours_minutes(duration) FROM donelist')
+    con.execute('DROP TABLE donelist')
+    con.execute('ALTER TABLE donelist_new RENAME TO donelist')
+    con.execute('CREATE UNIQUE INDEX donelist_date_course ON donelist(date, course)')
+    con.execute('CREATE INDEX donelist_course_date ON donelist(course, date, duration)')
+
+
+def add_rollups(con: sqlite3.Connection):
+    """ Version 3: Add the rollup tables maintained by triggers on donelist. """
+    # The course name was stored in donelist until version 5.
+    rollup.install(con, 'course')
+
+
+def normalize_course(con: sqlite3.Connection):
+    """ Version 5: Replace donelist.course with course_id, a foreign key on course.id.
+
+    The names which are not registered in 'course' are registered first,
+    so that no record is lost. The records of a course are deleted with
+    the course (ON DELETE CASCADE), and the foreign key is enforced on the
+    connections of Database. The rollup tables are recreated per course_id.
+    """
+    con.execute('INSERT OR IGNORE INTO course(name) '
+                'SELECT course FROM donelist GROUP BY course ORDER BY MIN(id)')
+
+    con.execute("CREATE TABLE donelist_new ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "date TEXT NOT NULL, "
+                "course_id INTEGER NOT NULL REFERENCES course(id) ON DELETE CASCADE, "
+                "duration INTEGER NOT NULL "
+                "CHECK (typeof(duration) = 'integer' AND duration > 0), "
+                "{})".format(', '.join('{} TEXT'.format(column) for column, _ in bucket.BUCKETS)))
+    con.execute('INSERT INTO donelist_new(id, date, course_id, duration, {0}) '
+                'SELECT donelist.id, date, course.id, duration, {0} FROM donelist '
+                'INNER JOIN course ON course.name = donelist.course'.format(bucket.COLUMNS))
+    # The indexes and the triggers on donelist are dropped with it.
+    con.execute('DROP TABLE donelist')
+    con.execute('ALTER TABLE donelist_new RENAME TO donelist')
+    con.execute('CREATE UNIQUE INDEX donelist_date_course ON donelist(date, course_id)')
+    con.execute('CREATE INDEX donelist_course_date ON donelist(course_id, date, duration)')
+    bucket.create_indexes(con)
+    bucket.create_triggers(con)
+    rollup.install(con)
+
+
+MIGRATIONS = [
+    add_donelist_indexes,
+    convert_duration_to_minutes,
+    add_rollups,
+    # Version 4: Add the calendar buckets of donelist maintained by triggers.
+    bucket.install,
+    normalize_course,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_version(con: sqlite3.Connection) -> int:
+    """ Get the schema version of the database. """
+    return con.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(con: sqlite3.Connection) -> int:
+    """ Apply the pending migrations and return the schema version.
+
+    Raises:
+        RuntimeError: The database was created by a newer version of geekhours.
+    """
+    version = get_version(con)
+
+    if version > SCHEMA_VERSION:
+        raise RuntimeError('The database schema version {} is newer than {}.'.format(
+            version, SCHEMA_VERSION))
+
+    if version == SCHEMA_VERSION:
+        return version
+
+    con.execute('BEGIN IMMEDIATE')
+    try:
+        # Another process may have upgraded the database in the meantime.
+        for upgrade in MIGRATIONS[get_version(con):]:
+            upgrade(con)
+
+        con.execute('PRAGMA user_version = {:d}'.format(SCHEMA_VERSION))
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+
+    return SCHEMA_VERSION
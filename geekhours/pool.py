@@ -0,0 +1,129 @@
+""" pool.py is a module to share a database between threads.
+
+DatabasePool hands out a Database to one thread at a time. The readers
+are checked out of a pool of connections which reject writes, so many
+threads read at once. The writer is a single connection behind a lock, so
+the writes of the threads are serialized in the process instead of
+failing on the lock of SQLite.
+
+Under WAL, which the default profile enables, the readers are not blocked
+by the writer and read the last committed state. With the 'rollback'
+profile, the readers and the writer wait for each other.
+
+    pool = DatabasePool(db_path)
+    with pool.writer() as database:
+        database.insert_donelist_many(records)
+    with pool.reader() as database:
+        total = database.get_total_hours()
+    pool.close()
+"""
+
+__all__ = ['DatabasePool']
+
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+from geekhours.database import Database
+
+READERS = 4
+
+
+class DatabasePool:
+    """ DatabasePool hands out the Database of db_name to the threads.
+
+    The database is created or migrated by the writer when the pool is
+    created. The reader connections are opened on first use.
+
+    Args:
+        db_name: Path of the database.
+        profile: Name of tuning.PROFILES for all the connections.
+        readers: Maximum number of reader connections.
+    """
+
+    def __init__(self, db_name: str, profile: str = None, readers: int = READERS):
+        if readers < 1:
+            raise ValueError('The number of readers must be a positive integer.')
+
+        self.db_name = db_name
+        self.profile = profile
+        self._readers = queue.LifoQueue()
+        self._available = threading.Semaphore(readers)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer = Database(db_name, profile, check_same_thread=False)
+        self._writer.create_table()
+        self._closed = False
+
+    @contextmanager
+    def reader(self, timeout: float = None) -> Iterator[Database]:
+        """ Check out a reader and run the block in one read transaction.
+
+        The block reads a consistent snapshot of the database. The writes
+        are rejected by 'PRAGMA query_only'.
+
+        Args:
+            timeout: Seconds to wait for a free reader. None waits forever.
+
+        Raises:
+            TimeoutError: No reader was free in timeout seconds.
+        """
+        if not self._available.acquire(timeout=timeout):
+            raise TimeoutError('No free reader in {} seconds.'.format(timeout))
+        try:
+            database = self._checkout()
+            try:
+                with database.batch():
+                    yield database
+            finally:
+                self._checkin(database)
+        finally:
+            self._available.release()
+
+    @contextmanager
+    def writer(self) -> Iterator[Database]:
+        """ Lock the writer and run the block in one write transaction.
+
+        The transaction is committed at the end of the block, or rolled
+        back if the block raises.
+        """
+        with self._write_lock:
+            self._check_open()
+            with self._writer.batch(immediate=True):
+                yield self._writer
+
+    def close(self):
+        """ Close the connections. The readers checked out are closed on return. """
+        with self._write_lock, self._lock:
+            self._closed = True
+            self._writer.close_db()
+            while True:
+                try:
+                    self._readers.get_nowait().close_db()
+                except queue.Empty:
+                    break
+
+    def _checkout(self) -> Database:
+        """ Return a free reader, opening a new one if none is free. """
+        with self._lock:
+            self._check_open()
+            try:
+                return self._readers.get_nowait()
+            except queue.Empty:
+                pass
+            database = Database(self.db_name, self.profile, check_same_thread=False)
+            database.con.execute('PRAGMA query_only = ON')
+            return database
+
+    def _checkin(self, database: Database):
+        """ Return a reader to the pool, or close it if the pool is closed. """
+        with self._lock:
+            if self._closed:
+                database.close_db()
+            else:
+                self._readers.put(database)
+
+    def _check_open(self):
+        """ Raise RuntimeError if the pool is closed. """
+        if self._closed:
+            raise RuntimeError('The pool is closed.')
@@ -0,0 +1,134 @@
+""" report.py is a module to sum up the total hours of many databases at once.
+
+Each database is read by a worker process of a pool, which opens it
+read-only and returns its partial totals in minutes per course, day and
+month. The parent merges the partial totals as they arrive, so the wall
+clock time scales with the number of cores instead of the number of
+databases.
+
+    report = Report.from_databases(['alice.db', 'bob.db'])
+    report.to_dict()
+"""
+
+__all__ = ['Report', 'read_partial']
+
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+from urllib.request import pathname2url
+from geekhours import migration
+from geekhours.database import course_filter, date_range
+
+KEYS = ['course', 'day', 'month']
+
+
+def read_partial(db_name: str, course=None, since: str = None, until: str = None) -> Dict:
+    """ Read the partial totals of a database.
+
+    The database is opened read-only and is neither created nor migrated.
+    Return {'total': minutes, 'course': {...}, 'day': {...}, 'month': {...}}.
+
+    Args:
+        db_name: Path of the database.
+
+    The other arguments are the same as Database.get_total_hours().
+
+    Raises:
+        ValueError: The database cannot be read or has an older schema.
+    """
+    where, params = date_range(since, until, 'done.day')
+    course_filter(course, where, params, 'done.course_id')
+
+    sql = ("SELECT course.name, done.day, done.minutes "
+           "FROM rollup_day AS done "
+           "INNER JOIN course ON course.id = done.course_id")
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+
+    partial = {'total': 0}
+    partial.update((key, {}) for key in KEYS)
+    try:
+        con = sqlite3.connect('file:{}?mode=ro'.format(pathname2url(os.path.abspath(db_name))),
+                              uri=True)
+    except sqlite3.Error as error:
+        raise ValueError('Cannot open {}: {}'.format(db_name, error))
+    try:
+        if migration.get_version(con) != migration.SCHEMA_VERSION:
+            raise ValueError(
+                'Schema of {} is not current. Open it with geekhours first.'.format(db_name))
+        for name, day, minutes in con.execute(sql, params):
+            partial['total'] += minutes
+            for key, value in zip(KEYS, [name, day, day[:7]]):
+                partial[key][value] = partial[key].get(value, 0) + minutes
+    except sqlite3.Error as error:
+        raise ValueError('Cannot read {}: {}'.format(db_name, error))
+    finally:
+        con.close()
+
+    return partial
+
+
+class Report:
+    """ Report merges the partial totals of read_partial(). """
+
+    def __init__(self):
+        self.databases = 0
+        self.total = None
+        self.minutes = {key: {} for key in KEYS}
+
+    @classmethod
+    def from_databases(cls,
+                       db_names: List[str],
+                       course=None,
+                       since: str = None,
+                       until: str = None,
+                       jobs: int = None) -> 'Report':
+        """ Read the databases in parallel and return the merged Report.
+
+        Args:
+            db_names: Paths of the databases.
+            jobs: Number of worker processes. The number of CPUs if omitted.
+                  A single database or job is read in this process.
+
+        The other arguments are the same as read_partial().
+        """
+        report = cls()
+        jobs = min(jobs or os.cpu_count() or 1, len(db_names))
+        if jobs <= 1:
+            for db_name in db_names:
+                report.add(read_partial(db_name, course, since, until))
+            return report
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            count = len(db_names)
+            for partial in executor.map(read_partial, db_names, [course] * count, [since] * count,
+                                        [until] * count):
+                report.add(partial)
+        return report
+
+    def add(self, partial: Dict):
+        """ Merge the partial totals of a database. """
+        self.databases += 1
+        if partial['total']:
+            self.total = (self.total or 0) + partial['total']
+        for key in KEYS:
+            minutes = self.minutes[key]
+            for value, mins in partial[key].items():
+                minutes[value] = minutes.get(value, 0) + mins
+
+    def to_dict(self) -> Dict:
+        """ Return the total hours in the format of Command.show_total_hours(). """
+        report = {
+            'databases': self.databases,
+            'total_hours': {
+                'Total: ': self.total / 60.0 if self.total is not None else None
+            },
+        }
+        for key in KEYS:
+            minutes = self.minutes[key]
+            report['total_hours_per_' + key] = {
+                value: minutes[value] / 60.0
+                for value in sorted(minutes)
+            }
+        return report
@@ -0,0 +1,25 @@
+""" result.py is a module of the results and the records of Database.
+
+They are defined apart from database.py so that the results can be built
+without importing sqlite3, such as by the client of the daemon.
+
+The records are named tuples, which have empty __slots__: a record takes
+the memory of a plain tuple, compares equal to it and is serialized to
+JSON as an array, while its fields are read by name.
+"""
+
+__all__ = ['ImportResult', 'CourseResult', 'MergeResult', 'Course', 'DoneRecord']
+
+from collections import namedtuple
+
+ImportResult = namedtuple('ImportResult', ['inserted', 'duplicate', 'rejected'])
+
+CourseResult = namedtuple('CourseResult', ['added', 'skipped'])
+
+MergeResult = namedtuple('MergeResult', ['courses', 'inserted', 'conflicts', 'updated'])
+
+# Record of the 'course' table
+Course = namedtuple('Course', ['id', 'name'])
+
+# Record of the 'donelist' table with the duration in hours
+DoneRecord = namedtuple('DoneRecord', ['id', 'date', 'course', 'duration'])
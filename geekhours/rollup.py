@@ -0,0 +1,197 @@
+""" rollup.py is a module to maintain the rollup tables of donelist.
+
+The rollup tables hold the minutes and the number of records of donelist
+per course id and calendar period. Triggers on donelist keep them current on
+every INSERT, UPDATE and DELETE, so the total hours are read from a few
+rows per period instead of aggregating the whole history.
+
+rollup_day: Per course and day such as '2019-01-31'.
+rollup_week: Per course and ISO week such as '2019-W05'.
+rollup_month: Per course and month such as '2019-01', split by day of week
+              from '0' (Sunday) to '6' (Saturday).
+"""
+
+__all__ = [
+    'ROLLUPS', 'create', 'create_triggers', 'drop', 'drop_triggers', 'rebuild', 'install',
+    'add_since', 'check'
+]
+
+import sqlite3
+from typing import Dict
+
+# ISO 8601 year and week of the Thursday in the same week as the date.
+ISO_WEEK = ("strftime('%Y', {0}.date, '-3 days', 'weekday 4') || '-W' || "
+            "printf('%02d', (strftime('%j', {0}.date, '-3 days', 'weekday 4') - 1) / 7 + 1)")
+
+# Rollup table and its key columns with the expressions of a donelist row
+ROLLUPS = [
+    ('rollup_day', [('day', '{0}.date')]),
+    ('rollup_week', [('week', ISO_WEEK)]),
+    ('rollup_month', [('month', 'substr({0}.date, 1, 7)'),
+                      ('weekday', "strftime('%w', {0}.date)")]),
+]
+
+TRIGGERS = ['rollup_insert', 'rollup_delete', 'rollup_update']
+
+# Type of the course column: the course name was stored in donelist until version 5.
+COURSE_TYPES = {'course_id': 'INTEGER', 'course': 'TEXT'}
+
+
+def _match(keys, row: str, course: str) -> str:
+    """ Return the condition matching the rollup row of a donelist row. """
+    return ' AND '.join(['{0} = {1}.{0}'.format(course, row)] +
+                        ['{} = {}'.format(column, expr.format(row)) for column, expr in keys])
+
+
+def _add(table: str, keys, row: str, course: str) -> str:
+    """ Return the statements adding a donelist row to a rollup table. """
+    return ('INSERT OR IGNORE INTO {table}({course}, {columns}, minutes, records) '
+            'VALUES ({row}.{course}, {values}, 0, 0); '
+            'UPDATE {table} SET minutes = minutes + {row}.duration, records = records + 1 '
+            'WHERE {match}; ').format(table=table,
+                                      course=course,
+                                      columns=', '.join(column for column, _ in keys),
+                                      row=row,
+                                      values=', '.join(expr.format(row) for _, expr in keys),
+                                      match=_match(keys, row, course))
+
+
+def _subtract(table: str, keys, row: str, course: str) -> str:
+    """ Return the statements subtracting a donelist row from a rollup table. """
+    return ('UPDATE {table} SET minutes = minutes - {row}.duration, records = records - 1 '
+            'WHERE {match}; '
+            'DELETE FROM {table} WHERE {match} AND records = 0; ').format(table=table,
+                                                                          row=row,
+                                                                          match=_match(
+                                                                              keys, row, course))
+
+
+def _recompute(keys, where: str = '', course: str = 'course_id') -> str:
+    """ Return the query aggregating donelist for a rollup table. """
+    return ('SELECT {course}, {values}, SUM(duration), COUNT(*) FROM donelist {where}'
+            'GROUP BY {course}, {columns}').format(
+                course=course,
+                values=', '.join('{} AS {}'.format(expr.format('donelist'), column)
+                                 for column, expr in keys),
+                where=where,
+                columns=', '.join(column for column, _ in keys))
+
+
+def create(con: sqlite3.Connection, course: str = 'course_id'):
+    """ Create the rollup tables and the triggers on donelist.
+
+    Args:
+        course: Column of the course in donelist.
+    """
+    for table, keys in ROLLUPS:
+        columns = ', '.join(column for column, _ in keys)
+        con.execute('CREATE TABLE {table} ('
+                    '{course} {type} NOT NULL, '
+                    '{definitions}, '
+                    'minutes INTEGER NOT NULL, '
+                    'records INTEGER NOT NULL, '
+                    'PRIMARY KEY ({course}, {columns})) WITHOUT ROWID'.format(
+                        table=table,
+                        course=course,
+                        type=COURSE_TYPES[course],
+                        definitions=', '.join('{} TEXT NOT NULL'.format(column)
+                                              for column, _ in keys),
+                        columns=columns))
+
+    create_triggers(con, course)
+
+
+def create_triggers(con: sqlite3.Connection, course: str = 'course_id'):
+    """ Create the triggers on donelist which maintain the rollup tables.
+
+    Args:
+        course: Column of the course in donelist.
+    """
+    con.execute('CREATE TRIGGER rollup_insert AFTER INSERT ON donelist BEGIN {}END'.format(''.join(
+        _add(table, keys, 'NEW', course) for table, keys in ROLLUPS)))
+    con.execute('CREATE TRIGGER rollup_delete AFTER DELETE ON donelist BEGIN {}END'.format(''.join(
+        _subtract(table, keys, 'OLD', course) for table, keys in ROLLUPS)))
+    con.execute('CREATE TRIGGER rollup_update AFTER UPDATE OF date, {}, duration '
+                'ON donelist BEGIN {}{}END'.format(
+                    course,
+                    ''.join(_subtract(table, keys, 'OLD', course) for table, keys in ROLLUPS),
+                    ''.join(_add(table, keys, 'NEW', course) for table, keys in ROLLUPS)))
+
+
+def drop_triggers(con: sqlite3.Connection):
+    """ Drop the triggers on donelist which maintain the rollup tables. """
+    for trigger in TRIGGERS:
+        con.execute('DROP TRIGGER IF EXISTS {}'.format(trigger))
+
+
+def drop(con: sqlite3.Connection):
+    """ Drop the triggers on donelist and the rollup tables. """
+    drop_triggers(con)
+    for table, _ in ROLLUPS:
+        con.execute('DROP TABLE IF EXISTS {}'.format(table))
+
+
+def rebuild(con: sqlite3.Connection, course: str = 'course_id'):
+    """ Recompute the rollup tables from donelist.
+
+    Args:
+        course: Column of the course in donelist.
+    """
+    for table, keys in ROLLUPS:
+        con.execute('DELETE FROM {}'.format(table))
+        con.execute('INSERT INTO {}({}, {}, minutes, records) {}'.format(
+            table, course, ', '.join(column for column, _ in keys), _recompute(keys,
+                                                                               course=course)))
+
+
+def install(con: sqlite3.Connection, course: str = 'course_id'):
+    """ Create the rollup tables and the triggers from scratch and fill them.
+
+    Args:
+        course: Column of the course in donelist.
+    """
+    drop(con)
+    create(con, course)
+    rebuild(con, course)
+
+
+def add_since(con: sqlite3.Connection, last_id: int):
+    """ Add the donelist rows inserted after last_id to the rollup tables.
+
+    Used instead of the triggers to add many rows at once: the rows are
+    aggregated per rollup row first and each rollup row is updated once.
+    The triggers must be dropped while the rows are inserted, otherwise the
+    rows are added twice.
+    """
+    for table, keys in ROLLUPS:
+        columns = [column for column, _ in keys]
+        rows = con.execute(_recompute(keys, 'WHERE id > ? '), (last_id,)).fetchall()
+        # Existing rollup rows are updated, and the insertion of them is ignored.
+        con.executemany(
+            'UPDATE {} SET minutes = minutes + ?, records = records + ? '
+            'WHERE course_id = ? AND {}'.format(table,
+                                                ' AND '.join('{} = ?'.format(c) for c in columns)),
+            (row[-2:] + row[:-2] for row in rows))
+        con.executemany(
+            'INSERT OR IGNORE INTO {}(course_id, {}, minutes, records) '
+            'VALUES (?, {}, ?, ?)'.format(table, ', '.join(columns),
+                                          ', '.join('?' for _ in columns)), rows)
+
+
+def check(con: sqlite3.Connection) -> Dict[str, int]:
+    """ Check the rollup tables against a full recompute of donelist.
+
+    Return the number of rows which differ from the recompute per rollup table.
+    """
+    mismatches = {}
+
+    for table, keys in ROLLUPS:
+        rollup = 'SELECT course_id, {}, minutes, records FROM {}'.format(
+            ', '.join(column for column, _ in keys), table)
+        recompute = _recompute(keys)
+        count = con.execute('SELECT COUNT(*) FROM ({0} EXCEPT {1}) '
+                            'UNION ALL '
+                            'SELECT COUNT(*) FROM ({1} EXCEPT {0})'.format(rollup, recompute))
+        mismatches[table] = sum(row[0] for row in count)
+
+    return mismatches
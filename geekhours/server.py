@@ -0,0 +1,114 @@
+""" server.py is a module to serve a Command over a Unix domain socket.
+
+'geekhours serve' keeps a Command open in a long-running process, so the
+requests do not pay for the start of the interpreter, the imports and the
+opening of the database. The requests are answered one at a time in the
+order they arrive, and a connection which sends no request within
+Handler.timeout seconds is closed, so an idle client does not hold up the
+others. Only the owner of the socket can connect to it.
+
+See client.py for the protocol.
+"""
+
+__all__ = ['Server', 'serve']
+
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import threading
+from geekhours.client import METHODS, SHUTDOWN, connect, socket_path
+from geekhours.command import Command
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """ Answer the request of a connection. """
+
+    # Seconds to wait for the request line
+    timeout = 1.0
+
+    def handle(self):
+        try:
+            line = self.rfile.readline()
+        except socket.timeout:
+            return
+        if line:
+            response = self.server.dispatch(line)
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class Server(socketserver.UnixStreamServer):
+    """ Server of command on the socket of db_name.
+
+    A socket left by a daemon which did not exit cleanly is replaced.
+
+    Raises:
+        RuntimeError: Another daemon serves db_name.
+    """
+
+    def __init__(self, db_name: str, command: Command):
+        path = socket_path(db_name)
+        if os.path.exists(path):
+            remote = connect(db_name)
+            if remote:
+                raise RuntimeError('A daemon is already running on {}.'.format(path))
+            os.remove(path)
+
+        self.command = command
+        umask = os.umask(0o177)
+        try:
+            super().__init__(path, Handler)
+        finally:
+            os.umask(umask)
+
+    def dispatch(self, line: bytes) -> dict:
+        """ Call the method of a request line and return the response.
+
+        A line which is not a JSON object is answered with a ValueError.
+        """
+        output = io.StringIO()
+        response = {'result': None, 'output': '', 'error': None}
+
+        try:
+            try:
+                request = json.loads(line.decode('utf-8'))
+            except ValueError as error:
+                raise ValueError('Invalid request: {}'.format(error))
+            if not isinstance(request, dict):
+                raise ValueError('The request is not a JSON object.')
+            method = request.get('method')
+            if method == SHUTDOWN:
+                # shutdown() waits for serve_forever() to return, which runs this call.
+                threading.Thread(target=self.shutdown).start()
+            elif method in METHODS:
+                with contextlib.redirect_stdout(output):
+                    response['result'] = getattr(self.command, method)(*request.get('args', []),
+                                                                       **request.get('kwargs', {}))
+            else:
+                raise ValueError('Unknown method: {}'.format(method))
+        except Exception as error:  # pylint: disable=broad-except
+            response['error'] = {'type': type(error).__name__, 'message': str(error)}
+
+        response['output'] = output.getvalue()
+        return response
+
+    def server_close(self):
+        """ Close and remove the socket. """
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def serve(db_name: str, profile: str = None):
+    """ Serve a Command of db_name until a shutdown request or an interrupt. """
+    command = Command(db_name, profile)
+    server = Server(db_name, command)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        command.database.close_db()
@@ -0,0 +1,214 @@
+""" snapshot.py is a module of a compact columnar file of the records of donelist.
+
+A snapshot holds the records of donelist in three columns of fixed size
+values, written as the machine representation of arrays:
+
+    days: Day ordinals of the dates (date.toordinal()), array('i').
+    courses: Indexes of the course names in the name table, array('H').
+    durations: Durations in minutes, array('f').
+
+The file is laid out as follows. The columns start at offsets aligned to
+4 bytes, so they are read in place.
+
+    Header: magic 'GHSNAP', version (1 byte), byte order ('<' or '>'),
+            number of records and length of the name table (uint32 each).
+    Name table: JSON list of the course names in UTF-8, then zero padding.
+    days, durations, courses: The columns in this order.
+
+Snapshot.load() maps the file into memory and the columns are memoryviews
+of the mapping, so a snapshot of millions of records is loaded without
+reading or copying them.
+
+    Snapshot.from_database(database).save('records.snapshot')
+    with Snapshot.load('records.snapshot') as snapshot:
+        total = sum(snapshot.durations)
+"""
+
+__all__ = ['Snapshot']
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from datetime import date
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+MAGIC = b'GHSNAP'
+VERSION = 1
+HEADER = struct.Struct('<6sBcII')
+BYTE_ORDER = b'<' if sys.byteorder == 'little' else b'>'
+
+# Columns in the order of the file with their typecodes
+COLUMNS = [('days', 'i'), ('durations', 'f'), ('courses', 'H')]
+
+# Maximum number of course names of the dictionary encoding
+MAX_COURSES = 1 << 16
+
+
+def _align(offset: int) -> int:
+    """ Return offset rounded up to a multiple of 4. """
+    return -(-offset // 4) * 4
+
+
+def _to_bytes(column, typecode: str) -> bytes:
+    """ Return the machine representation of a column as an array of typecode. """
+    if getattr(column, 'typecode', getattr(column, 'format', None)) == typecode:
+        return column.tobytes()
+    return array(typecode, column).tobytes()
+
+
+class Snapshot:
+    """ Snapshot holds the records of donelist in columns.
+
+    The columns are arrays when built from a database, or memoryviews of
+    the mapped file when loaded. They support len(), indexing, slicing and
+    iteration alike.
+
+    Args:
+        days: Day ordinals of the dates.
+        courses: Indexes of names of the course of the records.
+        durations: Durations in minutes.
+        names: Course names.
+    """
+
+    def __init__(self, days, courses, durations, names: List[str]):
+        if not len(days) == len(courses) == len(durations):
+            raise ValueError('The columns must have the same length.')
+        self.days = days
+        self.courses = courses
+        self.durations = durations
+        self.names = names
+        self._mmap = None
+
+    @classmethod
+    def from_database(cls, database) -> 'Snapshot':
+        """ Read the records of donelist in the order of date and course id.
+
+        The day ordinals are computed by SQLite, and the rows are fetched
+        in chunks into the arrays.
+
+        Args:
+            database: Database to read.
+
+        Raises:
+            ValueError: There are too many course names to encode.
+        """
+        days, courses, durations = array('i'), array('H'), array('f')
+        names = []
+        codes = {}
+
+        cur = database.con.execute(
+            "SELECT CAST(julianday(date) - 1721424.5 AS INTEGER), course.name, duration "
+            "FROM donelist INNER JOIN course ON course.id = donelist.course_id "
+            "ORDER BY date, course_id")
+        while True:
+            rows = cur.fetchmany(10000)
+            if not rows:
+                break
+            for day, course, duration in rows:
+                code = codes.get(course)
+                if code is None:
+                    if len(names) == MAX_COURSES:
+                        raise ValueError('Too many courses for a snapshot.')
+                    code = codes[course] = len(names)
+                    names.append(course)
+                days.append(day)
+                courses.append(code)
+                durations.append(duration)
+
+        return cls(days, courses, durations, names)
+
+    @classmethod
+    def load(cls, path: str) -> 'Snapshot':
+        """ Map a snapshot file into memory.
+
+        The columns are read in place unless the file was written on a
+        machine of the other byte order, in which case they are copied and
+        swapped. Call close() to unmap the file.
+
+        Raises:
+            ValueError: The file is not a snapshot.
+        """
+        with open(str(path), 'rb') as infile:
+            try:
+                mapped = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError('{} is not a snapshot.'.format(path))
+
+        try:
+            magic, version, byte_order, count, size = HEADER.unpack_from(mapped)
+        except struct.error:
+            magic = None
+        if magic != MAGIC or version != VERSION:
+            mapped.close()
+            raise ValueError('{} is not a snapshot.'.format(path))
+
+        offset = HEADER.size
+        names = json.loads(mapped[offset:offset + size].decode('utf-8'))
+        offset = _align(offset + size)
+
+        view = memoryview(mapped)
+        columns = {}
+        for name, typecode in COLUMNS:
+            length = count * array(typecode).itemsize
+            if byte_order == BYTE_ORDER:
+                columns[name] = view[offset:offset + length].cast(typecode)
+            else:
+                column = array(typecode, view[offset:offset + length].tobytes())
+                column.byteswap()
+                columns[name] = column
+            offset = _align(offset + length)
+        view.release()
+
+        snapshot = cls(columns['days'], columns['courses'], columns['durations'], names)
+        snapshot._mmap = mapped
+        return snapshot
+
+    def save(self, path: str):
+        """ Write the snapshot to a file, which must not exist.
+
+        Raises:
+            FileExistsError: The file exists.
+        """
+        path = Path(path)
+        if path.exists():
+            raise FileExistsError('{} exists'.format(path))
+
+        names = json.dumps(self.names).encode('utf-8')
+        with open(str(path), 'xb') as out:
+            out.write(HEADER.pack(MAGIC, VERSION, BYTE_ORDER, len(self.days), len(names)))
+            out.write(names)
+            offset = HEADER.size + len(names)
+            for name, typecode in COLUMNS:
+                out.write(b'\0' * (_align(offset) - offset))
+                data = _to_bytes(getattr(self, name), typecode)
+                out.write(data)
+                offset = _align(offset) + len(data)
+
+    def close(self):
+        """ Release the columns and unmap the file of a loaded snapshot. """
+        if self._mmap is None:
+            return
+        for name, _ in COLUMNS:
+            column = getattr(self, name)
+            if isinstance(column, memoryview):
+                column.release()
+        self._mmap.close()
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def records(self) -> Iterator[Tuple[str, str, float]]:
+        """ Iterate over the records as (date, course, hours) like Database.show(). """
+        names = self.names
+        for day, course, duration in zip(self.days, self.courses, self.durations):
+            yield date.fromordinal(day).isoformat(), names[course], duration / 60.0
@@ -0,0 +1,53 @@
+""" Unit test for aggregate module. """
+
+import unittest
+from geekhours.aggregate import Summary
+
+
+class TestSummary(unittest.TestCase):
+    """ Test cases of the unit test for Summary class """
+
+    def test_to_dict(self):
+        """ Test to_dict()
+
+        Assert:
+            * The minutes are summed up per course, day of week and month
+              and returned in hours sorted by the keys.
+            * The total hours are None if nothing is added.
+        """
+        self.assertEqual(
+            Summary().to_dict(), {
+                'total_hours': {
+                    'Total: ': None
+                },
+                'total_hours_per_course': {},
+                'total_hours_per_week': {},
+                'total_hours_per_month': {},
+            })
+
+        summary = Summary()
+        summary.add('python', '6', '11', 90)
+        summary.add('art', '1', '01', 60)
+        summary.add('python', '1', '01', 30)
+
+        res = summary.to_dict()
+        self.assertEqual(
+            res, {
+                'total_hours': {
+                    'Total: ': 3
+                },
+                'total_hours_per_course': {
+                    'art': 1,
+                    'python': 2
+                },
+                'total_hours_per_week': {
+                    'Mon': 1.5,
+                    'Sat': 1.5
+                },
+                'total_hours_per_month': {
+                    'Jan': 1.5,
+                    'Nov': 1.5
+                },
+            })
+        self.assertEqual(list(res['total_hours_per_course']), ['art', 'python'])
+        self.assertEqual(list(res['total_hours_per_week']), ['Mon', 'Sat'])
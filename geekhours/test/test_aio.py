@@ -0,0 +1,148 @@
+""" Unit test for aio module. """
+
+import asyncio
+import threading
+import time
+import unittest
+from geekhours.aio import AsyncCommand, AsyncDatabase, AsyncIterator
+from geekhours.database import ImportResult
+from geekhours.util import create_db, remove_db
+
+
+class TestAio(unittest.TestCase):
+    """ Test cases of the unit test for aio module """
+
+    def setUp(self):
+        """ Create a database file and an event loop. """
+        self._db_path, self._db_name = create_db()
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        """ Close the event loop and remove the database. """
+        self.loop.close()
+        remove_db(self._db_path, self._db_name)
+
+    def run_async(self, coroutine):
+        """ Run coroutine on the event loop of the test and return its result. """
+        return self.loop.run_until_complete(coroutine)
+
+    def test_async_database(self):
+        """ Test the coroutines of AsyncDatabase
+
+        Assert:
+            * The public methods of Database are mirrored as coroutines.
+            * The connection is owned by the worker thread.
+            * Iterators are returned as AsyncIterator fetching in chunks.
+            * The exceptions are raised to the caller.
+        """
+
+        async def scenario():
+            database = AsyncDatabase(self._db_name)
+            await database.create_table()
+            await database.insert_course(['python'])
+            await database.insert_donelist_many([('2019-04-0{}'.format(day), 'python', '1')
+                                                 for day in range(1, 10)])
+            thread = await database.run(lambda _: threading.current_thread(), write=False)
+            total = await database.get_total_hours()
+            rows = await database.iter_rows('donelist', size=2)
+            dates = []
+            async for row in rows:
+                dates.append(row[1])
+            with self.assertRaises(RuntimeError):
+                await database.remove_course('art')
+            await database.close_db()
+            return thread, total, rows, dates
+
+        thread, total, rows, dates = self.run_async(scenario())
+
+        self.assertNotEqual(thread, threading.current_thread())
+        self.assertEqual(total, [('Total: ', 9)])
+        self.assertIsInstance(rows, AsyncIterator)
+        self.assertEqual(dates, ['2019-04-0{}'.format(day) for day in range(1, 10)])
+        self.assertFalse(thread.is_alive())
+
+    def test_batch(self):
+        """ Test the calls queued while the worker is busy
+
+        Assert:
+            * The queued calls are run in one transaction.
+            * A call raising an exception rolls back its own statements only.
+        """
+
+        def fail(database):
+            database.insert_donelist('2019-04-03', 'python', '1')
+            raise ZeroDivisionError
+
+        async def scenario():
+            database = AsyncDatabase(self._db_name)
+            await database.create_table()
+            await database.insert_course(['python'])
+            statements = []
+
+            def trace(statement):
+                statements.append(statement)
+
+            await database.run(lambda db: db.con.set_trace_callback(trace))
+
+            # Keep the worker busy while the other calls are queued.
+            started = threading.Event()
+            release = threading.Event()
+            busy = asyncio.ensure_future(
+                database.run(lambda _: started.set() or release.wait(), write=False))
+            await asyncio.get_event_loop().run_in_executor(None, started.wait)
+            calls = [
+                asyncio.ensure_future(database.insert_donelist('2019-04-01', 'python', '1')),
+                asyncio.ensure_future(database.run(fail)),
+                asyncio.ensure_future(database.insert_donelist('2019-04-02', 'python', '2')),
+                asyncio.ensure_future(database.get_total_hours()),
+            ]
+            await asyncio.sleep(0.05)
+            release.set()
+            await busy
+            results = await asyncio.gather(*calls, return_exceptions=True)
+            await database.run(lambda db: db.con.set_trace_callback(None))
+            await database.close_db()
+            return statements, results
+
+        statements, results = self.run_async(scenario())
+
+        self.assertIsInstance(results[1], ZeroDivisionError)
+        self.assertEqual(results[3], [('Total: ', 3)])
+        # The transactions of the busy call, of the queued calls and of
+        # the call removing the trace callback.
+        self.assertEqual(statements.count('BEGIN'), 1)
+        self.assertEqual(statements.count('BEGIN IMMEDIATE'), 2)
+
+    def test_responsive_import(self):
+        """ Test the event loop during a large import of AsyncCommand
+
+        Assert:
+            * The event loop keeps running its tasks while the records are
+              imported on the worker thread.
+            * No tick of the event loop waits for a large part of the import.
+        """
+        records = [('{:04d}-01-01'.format(year), 'course{}'.format(course), '1h')
+                   for year in range(1000, 1400) for course in range(50)]
+
+        async def scenario():
+            command = AsyncCommand(self._db_name)
+            await command.insert_course(['course{}'.format(course) for course in range(50)])
+            begin = time.perf_counter()
+            importing = asyncio.ensure_future(command.insert_donelist_many(records))
+            gaps = []
+            while not importing.done():
+                tick = time.perf_counter()
+                await asyncio.sleep(0)
+                gaps.append(time.perf_counter() - tick)
+            seconds = time.perf_counter() - begin
+            result = await importing
+            await command.close()
+            return result, gaps, seconds
+
+        result, gaps, seconds = self.run_async(scenario())
+
+        self.assertEqual(result, ImportResult(len(records), 0, 0))
+        # An import blocking the event loop would be done after the first tick.
+        self.assertGreater(len(gaps), 1)
+        # The limit is generous for the scheduling of a loaded machine.
+        self.assertLess(max(gaps), max(0.25, seconds / 2))
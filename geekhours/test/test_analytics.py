@@ -0,0 +1,108 @@
+""" Unit test for analytics module. """
+
+import unittest
+from datetime import date
+from geekhours import analytics
+from geekhours.analytics import DailyMatrix
+
+FIRST = date(2019, 4, 1).toordinal()
+
+# Minutes of python and art over 10 days from 2019-04-01
+ROWS = [
+    ('python', FIRST, 60),
+    ('python', FIRST + 1, 30),
+    ('art', FIRST + 1, 90),
+    ('python', FIRST + 3, 120),
+    ('art', FIRST + 8, 15),
+    ('art', FIRST + 9, 45),
+]
+
+
+class TestDailyMatrix(unittest.TestCase):
+    """ Test cases of the unit test for DailyMatrix class """
+
+    def test_report(self):
+        """ Test report() without NumPy
+
+        Assert:
+            * The rolling averages are the hours per day of the trailing
+              window, or of the days so far in the first days.
+            * The current streak ends on the last day.
+            * The percentiles are interpolated between the sessions.
+            * The last 7 days are compared with the 7 days before.
+            * A matrix without days has no averages nor percentiles.
+        """
+        matrix = DailyMatrix.from_rows(ROWS, use_numpy=False)
+        self.assertEqual(matrix.days, 10)
+        self.assertEqual(matrix.names, ['art', 'python'])
+
+        self.assertEqual(
+            matrix.report(), {
+                'period': {
+                    'since': '2019-04-01',
+                    'until': '2019-04-10',
+                    'days': 10
+                },
+                'rolling_average_7_days': {
+                    'total': 0.43,
+                    'per_course': {
+                        'art': 0.14,
+                        'python': 0.29
+                    }
+                },
+                'rolling_average_30_days': {
+                    'total': 0.6,
+                    'per_course': {
+                        'art': 0.25,
+                        'python': 0.35
+                    }
+                },
+                'streak': {
+                    'longest': 2,
+                    'current': 2
+                },
+                'session_percentiles': {
+                    'p25': 0.56,
+                    'p50': 0.88,
+                    'p75': 1.38,
+                    'p90': 1.75
+                },
+                'week_over_week': {
+                    'total': {
+                        'this_week': 3.0,
+                        'last_week': 3.0,
+                        'delta': 0.0
+                    },
+                    'per_course': {
+                        'art': {
+                            'this_week': 1.0,
+                            'last_week': 1.5,
+                            'delta': -0.5
+                        },
+                        'python': {
+                            'this_week': 2.0,
+                            'last_week': 1.5,
+                            'delta': 0.5
+                        }
+                    }
+                },
+            })
+
+        _, totals = matrix.rolling_average(2)
+        self.assertEqual(list(totals[:3]), [60, 90, 60])
+
+        empty = DailyMatrix.from_rows([], FIRST, FIRST - 1, use_numpy=False).report()
+        self.assertEqual(empty['rolling_average_7_days'], {'total': None, 'per_course': {}})
+        self.assertEqual(empty['session_percentiles']['p50'], None)
+        self.assertEqual(empty['streak'], {'longest': 0, 'current': 0})
+
+    @unittest.skipIf(analytics.numpy is None, 'NumPy is not installed.')
+    def test_numpy(self):
+        """ Test the metrics with NumPy
+
+        Assert that the reports with and without NumPy are the same.
+        """
+        for first, last in [(None, None), (FIRST - 3, FIRST + 20), (FIRST + 5, FIRST + 6)]:
+            self.assertEqual(
+                DailyMatrix.from_rows(ROWS, first, last, use_numpy=True).report(),
+                DailyMatrix.from_rows(ROWS, first, last, use_numpy=False).report())
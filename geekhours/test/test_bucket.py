@@ -0,0 +1,67 @@
+""" Unit test for bucket module. """
+
+import unittest
+from geekhours.database import Database
+from geekhours.util import create_db, remove_db
+
+
+class TestBucket(unittest.TestCase):
+    """ Test cases of the unit test for bucket module """
+
+    def setUp(self):
+        """ Create a database with courses. """
+        self._db_path, self._db_name = create_db()
+        self.database = Database(self._db_name)
+        self.database.create_table()
+        self.database.insert_course(['python', 'art'])
+
+    def tearDown(self):
+        """ Remove the database. """
+        self.database.close_db()
+        remove_db(self._db_path, self._db_name)
+
+    def buckets(self):
+        """ Return the buckets of donelist. """
+        rows = self.database.cur.execute(
+            'SELECT date, year, month, week, weekday FROM donelist ORDER BY date, course_id')
+        return rows.fetchall()
+
+    def test_triggers(self):
+        """ Test the triggers on donelist
+
+        Assert:
+            * The buckets are filled on INSERT and follow UPDATE of the date.
+            * The ISO week of the first days of a year may belong to the previous year.
+        """
+        self.database.insert_donelist('2021-01-01', 'python', '1')
+        self.database.insert_donelist('2021-01-04', 'art', '2')
+
+        self.assertEqual(self.buckets(), [('2021-01-01', '2021', '2021-01', '2020-W53', '5'),
+                                          ('2021-01-04', '2021', '2021-01', '2021-W01', '1')])
+
+        with self.database.con:
+            self.database.cur.execute(
+                "UPDATE donelist SET date = '2019-12-30' WHERE date = '2021-01-04'")
+
+        self.assertEqual(self.buckets(), [('2019-12-30', '2019', '2019-12', '2020-W01', '1'),
+                                          ('2021-01-01', '2021', '2021-01', '2020-W53', '5')])
+
+    def test_insert_donelist_many(self):
+        """ Test the buckets filled by insert_donelist_many()
+
+        Assert:
+            * The buckets of the records inserted at once are filled per batch.
+            * The triggers are created again afterwards.
+        """
+        self.database.insert_donelist_many([('2019-04-01', 'python', '1'),
+                                            ('2019-04-02', 'art', '2'),
+                                            ('2020-04-01', 'python', '3')],
+                                           batch_size=2)
+
+        self.assertEqual(self.buckets(), [('2019-04-01', '2019', '2019-04', '2019-W14', '1'),
+                                          ('2019-04-02', '2019', '2019-04', '2019-W14', '2'),
+                                          ('2020-04-01', '2020', '2020-04', '2020-W14', '3')])
+
+        triggers = self.database.cur.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'bucket_%'")
+        self.assertEqual(sorted(row[0] for row in triggers), ['bucket_insert', 'bucket_update'])
@@ -0,0 +1,99 @@
+""" Unit test for cache module. """
+
+import sqlite3
+import unittest
+from geekhours.cache import CacheStats, ResultCache
+from geekhours.command import Command
+from geekhours.util import create_db, remove_db
+
+
+class TestCache(unittest.TestCase):
+    """ Test cases of the unit test for cache module """
+
+    def setUp(self):
+        """ Create a database with a record. """
+        self._db_path, self._db_name = create_db()
+        self.cmd = Command(self._db_name, cache_size=2)
+        self.cmd.insert_course(['python', 'art'])
+        self.cmd.insert_donelist('2019-04-01', 'python', '1')
+
+    def tearDown(self):
+        """ Remove the database. """
+        self.cmd.database.close_db()
+        remove_db(self._db_path, self._db_name)
+
+    def test_result_cache(self):
+        """ Test ResultCache
+
+        Assert:
+            * A result is computed again if the version differs.
+            * The least recently used result is evicted over the capacity.
+            * A capacity of 0 keeps no result.
+        """
+        cache = ResultCache(2)
+        compute = iter(range(100)).__next__
+
+        self.assertEqual(cache.get('a', 1, compute), 0)
+        self.assertEqual(cache.get('a', 1, compute), 0)
+        self.assertEqual(cache.get('a', 2, compute), 1)
+        self.assertEqual(cache.get('b', 2, compute), 2)
+        self.assertEqual(cache.get('a', 2, compute), 1)
+        self.assertEqual(cache.get('c', 2, compute), 3)
+        self.assertEqual(cache.get('b', 2, compute), 4)
+        self.assertEqual(cache.stats(), CacheStats(2, 5, 2, 2, 2))
+
+        disabled = ResultCache(0)
+        self.assertEqual(disabled.get('a', 1, compute), 5)
+        self.assertEqual(disabled.get('a', 1, compute), 6)
+        self.assertEqual(disabled.stats().size, 0)
+
+        with self.assertRaises(ValueError):
+            ResultCache(-1)
+
+    def test_command_cache(self):
+        """ Test the cache of the total hours of Command
+
+        Assert:
+            * A repeated report reads only the version of the database.
+            * The cache is invalidated by the writes of the same connection
+              and by the commits of another connection.
+            * The callers get a copy of the cached results.
+        """
+        first = self.cmd.show_total_hours_by('month', ['python'])
+        first['total_hours_per_month']['2019-04'] = 0
+
+        statements = []
+
+        def trace(statement):
+            statements.append(statement)
+
+        self.cmd.database.con.set_trace_callback(trace)
+        self.assertEqual(self.cmd.show_total_hours_by('month', ['python']),
+                         {'total_hours_per_month': {
+                             '2019-04': 1.0
+                         }})
+        self.cmd.database.con.set_trace_callback(None)
+        self.assertEqual(statements, ['PRAGMA data_version'])
+
+        self.cmd.insert_donelist('2019-04-02', 'python', '2')
+        self.assertEqual(self.cmd.show_total_hours_by('month', ['python']),
+                         {'total_hours_per_month': {
+                             '2019-04': 3.0
+                         }})
+
+        con = sqlite3.connect(self._db_name)
+        with con:
+            con.execute("UPDATE donelist SET duration = 30 WHERE date = '2019-04-02'")
+        con.close()
+        self.assertEqual(self.cmd.show_total_hours_by('month', ['python']),
+                         {'total_hours_per_month': {
+                             '2019-04': 1.5
+                         }})
+
+        self.assertEqual(self.cmd.cache_stats(), {
+            'hits': 1,
+            'misses': 3,
+            'evictions': 0,
+            'size': 1,
+            'capacity': 2
+        })
@@ -1,7 +1,11 @@
 """ Unit test for Command module. """
 
+import contextlib
+import io
+import json
 import sqlite3
 import unittest
+from geekhours import command
 from geekhours.command import Command
 from geekhours.util import create_db, remove_db
 
@@ -84,7 +88,7 @@ class TestCommand(unittest.TestCase):
         records = self._command.show('donelist')
         self.assertEqual(records[0][1], self._date)
         self.assertEqual(records[0][2], self._course_name_python)
-        self.assertEqual(records[0][3], self._duration)
+        self.assertEqual(records[0][3], float(self._duration))
 
         wrong_name = None
 
@@ -99,12 +103,32 @@ class TestCommand(unittest.TestCase):
         self._command.remove_course(self._course_name_python)
         self._command.remove_course(self._course_name_math)
         self._command.remove_course(self._course_name_eng)
-        self.assertIsNone(self._command.insert_course(self._courses))
+        self.assertEqual(self._command.insert_course(self._courses).added, self._courses)
 
         wrong_course = [None]
-        with self.assertRaises(sqlite3.IntegrityError):
+        with self.assertRaises(ValueError):
             self._command.insert_course(wrong_course)
 
+        # Insertion for tearDown()
+        self._command.insert_donelist(self._date, self._course_name_python, self._duration)
+
+    def test_import_course(self):
+        """ Test for import_course()
+
+        Assert the course names of the file and the arguments are inserted
+        in one call, skipping blank lines, comments and registered names.
+        """
+        srcfile = self._db_path + 'courses.txt'
+        with open(srcfile, 'w') as outfile:
+            outfile.write('# catalog\nhistory\n\n  music  \npython\n')
+
+        res = self._command.import_course(srcfile, ['art'])
+        self.assertEqual(res.added, ['art', 'history', 'music'])
+        self.assertEqual(res.skipped, [self._course_name_python])
+
+        for course in res.added:
+            self._command.remove_course(course)
+
     def test_insert_donelist(self):
         """ Test for insert_donelist()
 
@@ -120,11 +144,15 @@ class TestCommand(unittest.TestCase):
     def test_remove_course(self):
         """ Test for insert_course()
 
-        Assert insert_course() calls the Database.remove_course().
+        Assert:
+            * remove_course() calls the Database.remove_course().
+            * The records of the course are removed with it.
         """
         self.assertIsNone(self._command.remove_course(self._course_name_python))
         self.assertIsNone(self._command.remove_course(self._course_name_math))
         self.assertIsNone(self._command.remove_course(self._course_name_eng))
+        self.assertEqual(self._command.show('donelist'), [])
+        self.assertEqual(self._command.show_total_hours()['total_hours'], {'Total: ': None})
 
         wrong_course = 'music'
         with self.assertRaises(RuntimeError):
@@ -132,6 +160,7 @@ class TestCommand(unittest.TestCase):
 
         # Insertion for tearDown()
         self._command.insert_course(self._courses)
+        self._command.insert_donelist(self._date, self._course_name_python, self._duration)
 
     def test_remove_donelist(self):
         """ Test for remove_donelist()
@@ -176,6 +205,34 @@ class TestCommand(unittest.TestCase):
         with self.assertRaises(FileExistsError):
             self._command.dump_to_json(records, jsonfile)
 
+    def test_dump_streaming(self):
+        """ Test dump_to_json() and dump_to_ndjson() with iter_rows()
+
+        Assert:
+            * dump_to_json() writes the same JSON as json.dump().
+            * dump_to_ndjson() writes one object per record.
+            * '-' writes to the standard output.
+        """
+        records = self._command.show('donelist')
+        fields = self._command.show_column('donelist')
+
+        jsonfile = self._db_path + 'stream.json'
+        self._command.dump_to_json(self._command.iter_rows('donelist', 1), jsonfile)
+        with open(jsonfile) as infile:
+            self.assertEqual(infile.read(), json.dumps(records))
+
+        ndjsonfile = self._db_path + 'stream.ndjson'
+        self._command.dump_to_ndjson(self._command.iter_rows('donelist', 1), ndjsonfile, fields)
+        with open(ndjsonfile) as infile:
+            self.assertEqual([json.loads(line) for line in infile],
+                             [dict(zip(fields, record)) for record in records])
+
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self._command.dump_to_ndjson(self._command.iter_rows('course'), '-')
+        self.assertEqual(stdout.getvalue().splitlines(),
+                         [json.dumps(list(record)) for record in self._command.show('course')])
+
     def test_show_total_hours(self):
         """ Test show_total_hours()
 
@@ -198,6 +255,36 @@ class TestCommand(unittest.TestCase):
         }
         self.assertEqual(self._command.show_total_hours(), expected_res)
 
+    def test_show_total_hours_single_pass(self):
+        """ Test show_total_hours() against the separate reports
+
+        Assert that the reports built from one scan of donelist are the
+        same as the ones of get_total_hours(), show_total_hours_course(),
+        show_total_hours_week() and show_total_hours_month(), including
+        a removed course, whose records are removed with it.
+        """
+        records = [
+            ('2019-01-06', self._course_name_math, '1h30m'),
+            ('2019-02-11', self._course_name_math, '2'),
+            ('2019-02-12', self._course_name_eng, '45m'),
+            ('2020-01-06', self._course_name_eng, '1'),
+        ]
+        for record in records:
+            self._command.insert_donelist(*record)
+        self._command.remove_course(self._course_name_eng)
+
+        expected_res = self._command.map_keys_to_dict(['total_hours'],
+                                                      self._command.database.get_total_hours())
+        expected_res.update(self._command.show_total_hours_course())
+        expected_res.update(self._command.show_total_hours_week())
+        expected_res.update(self._command.show_total_hours_month())
+        self.assertEqual(self._command.show_total_hours(), expected_res)
+
+        # Cleanup
+        self._command.insert_course([self._course_name_eng])
+        for date, course, _ in records[:2]:
+            self._command.remove_donelist(date, course)
+
     def test_show_total_hours_course(self):
         """ Test show_total_hours_course()
 
@@ -269,6 +356,32 @@ class TestCommand(unittest.TestCase):
         self._command.remove_donelist('2019-06-08', self._course_name_math)
         self._command.remove_donelist('2019-11-01', self._course_name_python)
 
+    def test_show_stats(self):
+        """ Test show_stats()
+
+        Assert:
+            * The days range from since, or the first record, to until.
+            * The records of other courses are excluded by the course filter.
+        """
+        self._command.insert_donelist('2018-11-02', self._course_name_math, '1')
+
+        res = self._command.show_stats(until='2018-11-04')
+        self.assertEqual(res['period'], {'since': '2018-11-01', 'until': '2018-11-04', 'days': 4})
+        self.assertEqual(res['rolling_average_7_days']['total'], 1.5)
+        self.assertEqual(res['streak'], {'longest': 2, 'current': 0})
+
+        res = self._command.show_stats('math', '2018-10-31', '2018-11-02')
+        self.assertEqual(res['rolling_average_30_days'], {
+            'total': 0.33,
+            'per_course': {
+                'math': 0.33
+            }
+        })
+        self.assertEqual(res['streak'], {'longest': 1, 'current': 1})
+
+        # Cleanup
+        self._command.remove_donelist('2018-11-02', self._course_name_math)
+
     def test_name_months_and_days(self):
         """ Test name_months_and_days()
 
@@ -351,3 +464,65 @@ class TestCommand(unittest.TestCase):
         records = self._command.map_keys_to_dict(keys, seq)
         expected_res = {"total_hours_per_course": {"cooking": 5, "history": 6}}
         self.assertDictEqual(records, expected_res)
+
+    def test_import_donelist(self):
+        """ Test import_donelist()
+
+        Assert:
+            * Records are imported from CSV, JSON and NDJSON files.
+            * Files written by dump_to_csv() and dump_to_json() can be imported.
+            * ValueError is raised if the format is unknown.
+        """
+        files = {
+            'import.csv':
+            'date,course,duration\n2019-06-01,math,3\n2019-06-02,math,\n',
+            'import.json':
+            '[[1, "2019-06-03", "math", "2"], {"date": "2019-06-04", '
+            '"course": "math", "duration": "1"}, ["2019-06-05", "art", "1"]]',
+            'import.ndjson':
+            '{"date": "2019-06-06", "course": "math", "duration": "1"}\n'
+            '\n{broken\n',
+        }
+        expected = {
+            'import.csv': (1, 0, 1),
+            'import.json': (2, 0, 1),
+            'import.ndjson': (1, 0, 1),
+        }
+
+        for name, contents in files.items():
+            srcfile = self._db_path + name
+            with open(srcfile, 'w') as outfile:
+                outfile.write(contents)
+            self.assertEqual(self._command.import_donelist(srcfile), expected[name])
+
+        # Importing the same file again finds duplicates only.
+        self.assertEqual(self._command.import_donelist(self._db_path + 'import.json'), (0, 2, 1))
+
+        jsonfile = self._db_path + 'roundtrip.json'
+        self._command.dump_to_json(self._command.show('donelist'), jsonfile)
+        self.assertEqual(self._command.import_donelist(jsonfile, batch_size=1), (0, 5, 0))
+
+        with self.assertRaises(ValueError):
+            self._command.import_donelist(self._db_path + 'import.txt')
+
+        # Cleanup
+        for date in ['2019-06-01', '2019-06-03', '2019-06-04', '2019-06-06']:
+            self._command.remove_donelist(date, self._course_name_math)
+
+    def test_read_json(self):
+        """ Test read_json()
+
+        Assert that the elements of a JSON array are decoded across chunk
+        boundaries and ValueError is raised for a broken array.
+        """
+        records = [[i, '2019-01-01', 'course' * i, str(i)] for i in range(100)]
+        default_size = command.READ_CHUNK_SIZE
+        command.READ_CHUNK_SIZE = 7
+        try:
+            decoded = list(self._command.read_json(io.StringIO(json.dumps(records))))
+            self.assertEqual(decoded, records)
+
+            with self.assertRaises(ValueError):
+                list(self._command.read_json(io.StringIO('[[1, 2], [3')))
+        finally:
+            command.READ_CHUNK_SIZE = default_size
@@ -3,6 +3,7 @@
 import unittest
 import sqlite3
 from geekhours.database import Database
+from geekhours.result import Course, DoneRecord
 from geekhours.util import create_db, remove_db
 
 
@@ -72,11 +73,13 @@ class TestDatabase(unittest.TestCase):
         Check that the created table is the expected one.
         """
         # Prepare the table schemas
-        expected_donelist = ("CREATE TABLE donelist ("
+        expected_donelist = ("CREATE TABLE \"donelist\" ("
                              "id INTEGER PRIMARY KEY AUTOINCREMENT, "
                              "date TEXT NOT NULL, "
-                             "course TEXT NOT NULL, "
-                             "duration TEXT NOT NULL)")
+                             "course_id INTEGER NOT NULL REFERENCES course(id) ON DELETE CASCADE, "
+                             "duration INTEGER NOT NULL "
+                             "CHECK (typeof(duration) = 'integer' AND duration > 0), "
+                             "year TEXT, month TEXT, week TEXT, weekday TEXT)")
 
         expected_course = ("CREATE TABLE course ("
                            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
@@ -95,19 +98,49 @@ class TestDatabase(unittest.TestCase):
         expected_course = tuple([expected_course])
         self.assertEqual(course.fetchone(), expected_course)
 
+    def test_create_table_up_to_date(self):
+        """ Test for create_table() on an up-to-date database
+
+        Assert only the schema version is read, while another connection
+        holds the write lock.
+        """
+        writer = sqlite3.connect(self._db_name)
+        writer.execute('BEGIN IMMEDIATE')
+        database = Database(self._db_name)
+        statements = []
+
+        def trace(statement):
+            statements.append(statement)
+
+        try:
+            database.con.set_trace_callback(trace)
+            database.create_table()
+        finally:
+            writer.rollback()
+            writer.close()
+            database.close_db()
+
+        self.assertEqual(statements, ['PRAGMA user_version'])
+
     def test_get_column(self):
         """ Test get_colmun()
 
-        Assert get_colmun() returns colmun names of the records.
+        Assert:
+            * get_colmun() returns colmun names of the records.
+            * RuntimeError is raised for an invalid table name.
         """
         course_columns = ['id', 'name']
         donelist_columns = ['id', 'date', 'course', 'duration']
 
+        self.assertEqual(self.database.get_column(self._donelist), donelist_columns)
         self.database.insert_course(self._courses)
         self.assertEqual(self.database.get_column(self._course), course_columns)
         self.database.insert_donelist(self._date, self._course_name, self._duration)
         self.assertEqual(self.database.get_column(self._donelist), donelist_columns)
 
+        with self.assertRaises(RuntimeError):
+            self.database.get_column('test')
+
     def test_show(self):
         """ Test for show()
 
@@ -134,23 +167,136 @@ class TestDatabase(unittest.TestCase):
         ret = self.database.show(self._donelist)
         self.assertEqual(ret[0][1], self._date)
         self.assertEqual(ret[0][2], self._course_name)
-        self.assertEqual(ret[0][3], self._duration)
+        self.assertEqual(ret[0][3], float(self._duration))
 
         with self.assertRaises(RuntimeError):
             self.database.show(invalid_table)
 
+    def test_show_order(self):
+        """ Test the order of the records of show() and iter_rows()
+
+        Assert the records are returned in the order of id, also when the
+        records of the courses are interleaved.
+        """
+        self.database.insert_course(self._courses)
+        records = [('2019-04-01', 'math', '1'), ('2019-04-01', 'python', '2'),
+                   ('2019-04-02', 'art', '1'), ('2019-04-02', 'math', '2'),
+                   ('2019-04-03', 'python', '1')]
+        for record in records:
+            self.database.insert_donelist(*record)
+
+        ret = self.database.show(self._donelist)
+        self.assertEqual([record.id for record in ret], sorted(record.id for record in ret))
+        self.assertEqual([(record.date, record.course) for record in ret],
+                         [record[:2] for record in records])
+        self.assertEqual(list(self.database.iter_rows(self._donelist, 2)), ret)
+        self.assertEqual([course.name for course in self.database.show(self._course)],
+                         self._courses)
+
+    def test_records(self):
+        """ Test the records of show() and the iterators
+
+        Assert:
+            * The records are Course and DoneRecord, read by field name and
+              equal to plain tuples.
+            * The records have no instance dictionary.
+            * The other queries of the connection still return plain tuples.
+        """
+        self.database.insert_course(['python'])
+        self.database.insert_donelist('2019-04-01', 'python', '1h30m')
+
+        course = self.database.show(self._course)[0]
+        self.assertIsInstance(course, Course)
+        self.assertEqual(course.name, 'python')
+
+        record = next(self.database.iter_rows(self._donelist))
+        self.assertIsInstance(record, DoneRecord)
+        self.assertEqual((record.date, record.course, record.duration),
+                         ('2019-04-01', 'python', 1.5))
+        self.assertEqual(record, tuple(record))
+        self.assertFalse(hasattr(record, '__dict__'))
+        self.assertEqual(self.database.query_donelist(course='python'), [record])
+        self.assertEqual(list(self.database.iter_donelist(since='2019-04-01')), [record])
+
+        row = self.database.con.execute('SELECT date FROM donelist').fetchone()
+        self.assertIs(type(row), tuple)
+
+    def test_iter_rows(self):
+        """ Test for iter_rows()
+
+        Assert:
+            * The records are the same as show() whatever the fetch size.
+            * RuntimeError is raised before iterating if table is invalid.
+        """
+        self.database.insert_course(self._courses)
+        self.database.insert_donelist(self._date, self._course_name, self._duration)
+
+        for size in [1, 2, 1000]:
+            self.assertEqual(list(self.database.iter_rows(self._course, size)),
+                             self.database.show(self._course))
+            self.assertEqual(list(self.database.iter_rows(self._donelist, size)),
+                             self.database.show(self._donelist))
+
+        with self.assertRaises(RuntimeError):
+            self.database.iter_rows('test')
+
+    def test_query_donelist(self):
+        """ Test for query_donelist()
+
+        Assert:
+            * The records are filtered by date and course in the order of
+              date and course id.
+            * Paging with limit and after_id returns every record once.
+            * The filters are served by the indexes of donelist.
+            * ValueError is raised for an invalid date, limit or after_id.
+        """
+        self.database.insert_course(self._courses)
+        records = [('2019-04-{:02d}'.format(day), course, '1') for day in [3, 1, 2]
+                   for course in self._courses]
+        self.database.insert_donelist_many(records)
+
+        ret = self.database.query_donelist(since='2019-04-02', course='art')
+        self.assertEqual([(record[1], record[2]) for record in ret], [('2019-04-02', 'art'),
+                                                                      ('2019-04-03', 'art')])
+        ret = self.database.query_donelist(until='2019-04-01')
+        self.assertEqual([record[2] for record in ret], self._courses)
+
+        pages = []
+        after_id = None
+        while True:
+            page = self.database.query_donelist(limit=4, after_id=after_id)
+            if not page:
+                break
+            pages.append(page)
+            after_id = page[-1][0]
+        self.assertEqual([len(page) for page in pages], [4, 4, 1])
+        self.assertEqual(sum(pages, []), self.database.query_donelist())
+
+        for kwargs in [{'since': '2019-04-01', 'until': '2019-04-30'}, {'course': 'art'}]:
+            sql, params = self.database._query_donelist(after_id=ret[0][0], limit=10, **kwargs)
+            plan = self.database.cur.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+            self.assertIn('USING', str(plan))
+            self.assertNotIn('TEMP B-TREE', str(plan))
+
+        for kwargs in [{'since': '2019-4-1'}, {'limit': 0}, {'after_id': -1}]:
+            with self.assertRaises(ValueError):
+                self.database.query_donelist(**kwargs)
+
     def test_insert_course(self):
         """ Test for insert_course()
 
         Check:
-        * when SQL statement succeeds, None will be returned.
-        * when SQL statement fails, exception will be returned.
+        * the added course names and the skipped duplicates are returned.
+        * an invalid course name raises ValueError and inserts nothing.
         """
-        courses = [('python'), ('python')]
-        self.assertIsNone(self.database.insert_course(self._courses))
+        courses = [('python'), ('english'), ('python'), ('english')]
+        self.assertEqual(self.database.insert_course(self._courses), (self._courses, []))
+        self.assertEqual(self.database.insert_course(courses),
+                         (['english'], ['python', 'python', 'english']))
 
-        with self.assertRaises(sqlite3.IntegrityError):
-            self.database.insert_course(courses)
+        with self.assertRaises(ValueError):
+            self.database.insert_course(['history', None])
+        self.assertEqual(len(self.database.show(self._course)), 4)
 
     def test_insert_donelist(self):
         """ Test for insert_donelist()
@@ -159,6 +305,7 @@ class TestDatabase(unittest.TestCase):
         * None is returned when SQL statement succeeds.
         * Exception is returned when SQL statement fails.
         * ValueError is raised if the date is not in YYYY-MM-DD format.
+        * ValueError is raised if the duration cannot be parsed.
         """
         self.database.insert_course(self._courses)
         self.assertIsNone(
@@ -183,19 +330,33 @@ class TestDatabase(unittest.TestCase):
         exception_msg = err.exception
         print(exception_msg)
 
+        with self.assertRaises(ValueError):
+            self.database.insert_donelist('2019-04-02', self._course_name, '5 hours')
+
     def test_remove_course(self):
         """ Test for remove_course()
 
         Check that
         * None is returned when SQL statement succeeds.
         * Exception is returned when SQL statement fails.
+        * The records of the course are removed with it.
+        * A record of a course which does not exist cannot be inserted.
         """
         self.database.insert_course(self._courses)
+        self.database.insert_donelist(self._date, self._course_name, self._duration)
+        self.database.insert_donelist(self._date, 'art', self._duration)
         self.assertIsNone(self.database.remove_course(self._course_name))
+        self.assertEqual([record.course for record in self.database.show(self._donelist)], ['art'])
 
         with self.assertRaises(RuntimeError):
             self.database.remove_course(self._course_name)
 
+        with self.assertRaises(sqlite3.IntegrityError):
+            with self.database.con:
+                self.database.cur.execute(
+                    'INSERT INTO donelist(date, course_id, duration) VALUES (?, -1, 60)',
+                    (self._date,))
+
     def test_remove_donelist(self):
         """ Test for remove_donelist()
 
@@ -215,10 +376,11 @@ class TestDatabase(unittest.TestCase):
 
         Assert that get_total_hours() returns the total hours as expected.
         """
-        total = [('Total: ', 4)]
+        total = [('Total: ', 4.5)]
         self.database.insert_course(self._courses)
         self.database.insert_donelist('2019-04-01', 'python', '2')
-        self.database.insert_donelist('2019-05-01', 'art', '2')
+        self.database.insert_donelist('2019-05-01', 'art', '1h30m')
+        self.database.insert_donelist('2019-05-02', 'art', '60m')
         self.assertEqual(self.database.get_total_hours(), total)
 
     def test_get_total_hours_course(self):
@@ -295,3 +457,216 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(self.database.get_total_hours_month(), courses)
         self.assertEqual(self.database.get_total_hours_month(course='python'), python)
         self.assertEqual(self.database.get_total_hours_month(course='art'), art)
+
+    def test_insert_donelist_many(self):
+        """ Test insert_donelist_many()
+
+        Assert:
+            * Valid records are inserted and counted.
+            * Records already registered, including the ones repeated in
+              the input, are counted as duplicates.
+            * Records with an invalid date, an unregistered course, an
+              empty duration or a wrong shape are counted as rejected.
+        """
+        self.database.insert_course(self._courses)
+        self.database.insert_donelist('2019-04-01', 'python', '2')
+
+        records = [
+            ('2019-04-01', 'python', '2'),
+            ('2019-04-02', 'python', '2'),
+            ('2019-04-02', 'python', '3'),
+            ('2019-04-02', 'art', '1'),
+            ('2019-4-3', 'art', '1'),
+            ('2019-02-30', 'art', '1'),
+            ('2019-04-03', 'japanese', '1'),
+            ('2019-04-03', 'art', ''),
+            ('2019-04-03', 'art'),
+            None,
+        ]
+        res = self.database.insert_donelist_many(iter(records), batch_size=2)
+        self.assertEqual(res, (2, 2, 6))
+        self.assertEqual(self.database.get_total_hours(), [('Total: ', 5)])
+
+        with self.assertRaises(ValueError):
+            self.database.insert_donelist_many(records, batch_size=0)
+
+    def test_insert_donelist_many_rollback(self):
+        """ Test insert_donelist_many() with records failing in the middle
+
+        Assert the whole import is rolled back, including the triggers
+        dropped in its transaction.
+        """
+        self.database.insert_course(self._courses)
+
+        def records():
+            yield ('2019-04-01', 'python', '2')
+            yield ('2019-04-02', 'python', '2')
+            raise ZeroDivisionError
+
+        with self.assertRaises(ZeroDivisionError):
+            self.database.insert_donelist_many(records(), batch_size=1)
+
+        self.assertFalse(self.database.con.in_transaction)
+        self.assertEqual(self.database.get_total_hours(), [('Total: ', None)])
+        triggers = self.database.cur.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'").fetchone()[0]
+        self.assertEqual(triggers, 5)
+        self.database.insert_donelist('2019-04-01', 'python', '2')
+        self.assertFalse(any(self.database.check_rollups().values()))
+
+    def test_get_summary(self):
+        """ Test get_summary()
+
+        Assert that get_summary() returns the minutes grouped by course,
+        month and day of week.
+        """
+        self.database.insert_course(self._courses)
+
+        # Saturday, Sunday and Monday
+        self.database.insert_donelist('2000-01-01', 'python', '1')
+        self.database.insert_donelist('2000-01-02', 'python', '2')
+        self.database.insert_donelist('2019-04-01', 'python', '1h30m')
+        self.database.insert_donelist('2019-04-08', 'python', '30m')
+        self.database.insert_donelist('2019-04-01', 'art', '1')
+
+        summary = [('art', '1', '04', 60), ('python', '6', '01', 60), ('python', '0', '01', 120),
+                   ('python', '1', '04', 120)]
+        self.assertCountEqual(self.database.get_summary().fetchall(), summary)
+
+    def test_get_total_hours_filters(self):
+        """ Test the date range and course filters of the total hours
+
+        Assert:
+            * Only the records in the date range of the courses are summed up.
+            * Without a date range, the total hours are the same as with
+              a date range covering all the records.
+            * The date range is served by an index of donelist.
+        """
+        self.database.insert_course(self._courses)
+        self.database.insert_donelist_many([('2019-03-31', 'python', '1'),
+                                            ('2019-04-01', 'python', '2'),
+                                            ('2019-04-01', 'art', '3'),
+                                            ('2019-04-02', 'math', '4'),
+                                            ('2019-05-01', 'art', '5')])
+        april = {'since': '2019-04-01', 'until': '2019-04-30'}
+
+        self.assertEqual(self.database.get_total_hours(**april), [('Total: ', 9)])
+        self.assertEqual(self.database.get_total_hours(['python', 'art'], **april),
+                         [('Total: ', 5)])
+        self.assertEqual(self.database.get_total_hours('art', since='2019-04-02'),
+                         [('Total: ', 5)])
+        self.assertCountEqual(self.database.get_total_hours_course(['art', 'math'], **april),
+                              [('art', 3), ('math', 4)])
+        self.assertCountEqual(self.database.get_total_hours_week(until='2019-04-01'), [('0', 1),
+                                                                                       ('1', 5)])
+        self.assertCountEqual(self.database.get_total_hours_month('art'), [('04', 3), ('05', 5)])
+
+        for method in [
+                self.database.get_total_hours_course, self.database.get_total_hours_week,
+                self.database.get_total_hours_month
+        ]:
+            self.assertCountEqual(method(['art', 'math']),
+                                  method(['art', 'math'], '2000-01-01', '2099-12-31'))
+
+        sql, params = self.database._minutes(**april)
+        plan = self.database.cur.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+        self.assertIn('donelist_date_course', str(plan))
+
+        with self.assertRaises(ValueError):
+            self.database.get_total_hours(since='April')
+
+    def test_get_total_hours_by(self):
+        """ Test for get_total_hours_by()
+
+        Assert:
+            * The months and the weeks of different years are not merged.
+            * With a date range, the same totals are read from donelist
+              through the index of the bucket.
+            * An unknown bucket raises ValueError.
+        """
+        self.database.insert_course(self._courses)
+        self.database.insert_donelist_many([('2019-01-03', 'python', '1'),
+                                            ('2020-01-03', 'python', '2'),
+                                            ('2020-01-04', 'art', '3'),
+                                            ('2020-12-31', 'math', '4')])
+
+        self.assertEqual(self.database.get_total_hours_by('month'),
+                         [('2019-01', 1), ('2020-01', 5), ('2020-12', 4)])
+        self.assertEqual(self.database.get_total_hours_by('week', 'python'), [('2019-W01', 1),
+                                                                              ('2020-W01', 2)])
+        self.assertEqual(self.database.get_total_hours_by('year'), [('2019', 1), ('2020', 9)])
+        self.assertEqual(self.database.get_total_hours_by('weekday'), [('4', 5), ('5', 2),
+                                                                       ('6', 3)])
+        self.assertEqual(self.database.get_total_hours_by('day', since='2020-12-01'),
+                         [('2020-12-31', 4)])
+
+        for by in ['day', 'week', 'month', 'year', 'weekday']:
+            self.assertEqual(
+                self.database.get_total_hours_by(by, ['art', 'math']),
+                self.database.get_total_hours_by(by, ['art', 'math'], '2000-01-01', '2099-12-31'))
+
+        statements = []
+
+        def trace(statement):
+            statements.append(statement)
+
+        self.database.con.set_trace_callback(trace)
+        self.database.get_total_hours_by('month', since='2020-01-01', until='2020-06-30')
+        self.database.con.set_trace_callback(None)
+        select = [statement for statement in statements if statement.startswith('SELECT')]
+        plan = self.database.cur.execute('EXPLAIN QUERY PLAN ' + select[-1]).fetchall()
+        self.assertIn('donelist_month', str(plan))
+
+        with self.assertRaises(ValueError):
+            self.database.get_total_hours_by('hour')
+
+    def test_merge(self):
+        """ Test merge()
+
+        Assert:
+            * The courses and the records of the other database are added
+              and the conflicts are resolved by the policy.
+            * The buckets and the rollup tables are kept current.
+            * The other database is not modified.
+            * An invalid policy, a missing database and this database raise
+              an exception.
+        """
+        self.database.insert_course(['python', 'art'])
+        self.database.insert_donelist_many([('2019-04-01', 'python', '1'),
+                                            ('2019-04-02', 'art', '2')])
+
+        other_path, other_name = create_db()
+        other = Database(other_name)
+        other.create_table()
+        other.insert_course(['python', 'math'])
+        other.insert_donelist_many([('2019-04-01', 'python', '30m'), ('2019-12-31', 'math', '3')])
+
+        try:
+            self.assertEqual(self.database.merge(other_name), (1, 1, 1, 0))
+            self.assertEqual(self.database.get_total_hours_course(), [('art', 2), ('math', 3),
+                                                                      ('python', 1)])
+            self.assertEqual(self.database.get_total_hours_by('week', 'math'), [('2020-W01', 3)])
+
+            self.assertEqual(self.database.merge(other_name, 'sum'), (0, 0, 2, 2))
+            self.assertEqual(self.database.get_total_hours_course(), [('art', 2), ('math', 6),
+                                                                      ('python', 1.5)])
+
+            self.assertEqual(self.database.merge(other_name, 'replace'), (0, 0, 2, 2))
+            self.assertEqual(self.database.get_total_hours_course(), [('art', 2), ('math', 3),
+                                                                      ('python', 0.5)])
+            self.assertEqual(self.database.check_rollups(), {
+                'rollup_day': 0,
+                'rollup_week': 0,
+                'rollup_month': 0
+            })
+            self.assertEqual(other.get_total_hours(), [('Total: ', 3.5)])
+
+            with self.assertRaises(ValueError):
+                self.database.merge(other_name, 'max')
+            with self.assertRaises(FileNotFoundError):
+                self.database.merge(other_name + '.missing')
+            with self.assertRaises(ValueError):
+                self.database.merge(self._db_name)
+        finally:
+            other.close_db()
+            remove_db(other_path, other_name)
@@ -0,0 +1,51 @@
+""" Unit test for the data generator of the benchmarks. """
+
+import unittest
+from itertools import islice
+from geekhours.benchmark import generate
+from geekhours.database import Database
+from geekhours.util import create_db, remove_db
+
+
+class TestGenerate(unittest.TestCase):
+    """ Test cases of the unit test for generate module """
+
+    def test_generate(self):
+        """ Test generate()
+
+        Assert:
+            * The same seed generates the same records.
+            * The records are in the order of date and within the years.
+            * The density is validated.
+        """
+        records = list(generate.generate(courses=5, years=2, density=0.3, seed=1))
+        self.assertEqual(records, list(generate.generate(courses=5, years=2, density=0.3, seed=1)))
+        self.assertNotEqual(records,
+                            list(generate.generate(courses=5, years=2, density=0.3, seed=2)))
+        dates = [record[0] for record in records]
+        self.assertEqual(dates, sorted(dates))
+        self.assertTrue(records[0][0] >= '2000-01-01' and records[-1][0] <= '2001-12-31')
+        self.assertTrue(all(15 <= record[2] <= 240 for record in records))
+
+        with self.assertRaises(ValueError):
+            list(generate.generate(density=0))
+
+    def test_populate(self):
+        """ Test populate()
+
+        Assert the requested number of records is inserted and the rollup
+        tables match donelist.
+        """
+        db_path, db_name = create_db()
+        database = Database(db_name)
+        database.create_table()
+
+        years = generate.years_for(1000, 3, 0.5)
+        records = islice(generate.generate(courses=3, years=years, density=0.5), 1000)
+        self.assertEqual(generate.populate(database, records, 3, batch_size=300), 1000)
+        self.assertEqual(len(database.show('donelist')), 1000)
+        self.assertEqual(len(database.show('course')), 3)
+        self.assertFalse(any(database.check_rollups().values()))
+
+        database.close_db()
+        remove_db(db_path, db_name)
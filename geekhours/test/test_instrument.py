@@ -0,0 +1,74 @@
+""" Unit test for instrument module. """
+
+import sqlite3
+import unittest
+from geekhours.database import Database
+from geekhours.instrument import LITERAL
+from geekhours.util import create_db, remove_db
+
+
+class TestInstrument(unittest.TestCase):
+    """ Test cases of the unit test for instrument module """
+
+    def setUp(self):
+        """ Create a database with a course. """
+        self._db_path, self._db_name = create_db()
+        self.database = Database(self._db_name)
+        self.database.create_table()
+        self.database.insert_course(['python'])
+
+    def tearDown(self):
+        """ Remove the database. """
+        self.database.close_db()
+        remove_db(self._db_path, self._db_name)
+
+    def test_instrument(self):
+        """ Test Database.instrument()
+
+        Assert:
+            * The calls, latency and rows of the methods are recorded.
+            * The statements are recorded without their literals, and the
+              statements of the triggers are not counted separately.
+            * The rows fetched or changed by the statements are counted.
+            * The report lists the calls and the rows of the statements.
+            * The callback receives every metric.
+            * detach() removes the wrappers and restores the cursors.
+        """
+        metrics = []
+        instrument = self.database.instrument(metrics.append)
+
+        self.database.insert_donelist('2019-04-01', 'python', '1')
+        self.database.insert_donelist('2019-04-02', 'python', '2')
+        self.assertEqual(len(self.database.show('donelist')), 2)
+        self.database.get_total_hours()
+
+        calls, seconds, rows = instrument.methods['insert_donelist']
+        self.assertEqual(calls, 2)
+        self.assertGreater(seconds, 0)
+        self.assertIsNone(rows)
+        self.assertEqual(instrument.methods['show'][::2], (1, 2))
+
+        insert = 'INSERT INTO donelist(date, course_id, duration) VALUES (?, ?, ?)'
+        self.assertEqual(instrument.statements[insert][::2], (2, 2))
+        select = LITERAL.sub('?', self.database.select('donelist'))
+        self.assertEqual(instrument.statements[select][::2], (1, 2))
+        self.assertEqual(instrument.statements['SELECT id FROM course WHERE name=?'][::2], (2, 2))
+        self.assertIn(('method', 'get_total_hours'), [metric[:2] for metric in metrics])
+        self.assertIn(('statement', insert), [metric[:2] for metric in metrics])
+
+        report = instrument.report(width=80).splitlines()
+        self.assertEqual(report[0].split(),
+                         ['method', 'calls', 'total', '[ms]', 'mean', '[ms]', 'rows'])
+        self.assertIn('statement', [line.split()[0] for line in report if line])
+        lines = {line[:80].rstrip(): line[80:].split() for line in report if line}
+        self.assertEqual([lines['insert_donelist'][0], lines['insert_donelist'][-1]], ['2', '-'])
+        self.assertEqual([lines['show'][0], lines['show'][-1]], ['1', '2'])
+        self.assertEqual([lines[insert][0], lines[insert][-1]], ['2', '2'])
+
+        instrument.detach(self.database)
+        self.assertNotIn('show', vars(self.database))
+        self.assertIsNone(self.database.con.instrument)
+        self.assertIs(type(self.database.cur), sqlite3.Cursor)
+        count = len(metrics)
+        self.database.show('donelist')
+        self.assertEqual(len(metrics), count)
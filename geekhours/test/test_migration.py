@@ -0,0 +1,224 @@
+""" Unit test for migration module. """
+
+import sqlite3
+import unittest
+from geekhours import migration
+from geekhours.database import Database
+from geekhours.util import create_db, remove_db
+
+
+class TestMigration(unittest.TestCase):
+    """ Test cases of the unit test for migration module """
+
+    def setUp(self):
+        """ Create a database in the schema before the migrations were introduced. """
+        self._db_path, self._db_name = create_db()
+        con = sqlite3.connect(self._db_name)
+        with con:
+            con.execute("CREATE TABLE donelist ("
+                        "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                        "date TEXT NOT NULL, "
+                        "course TEXT NOT NULL, "
+                        "duration TEXT NOT NULL)")
+            con.execute("CREATE TABLE course ("
+                        "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                        "name TEXT NOT NULL UNIQUE)")
+            con.execute("INSERT INTO course(name) VALUES ('python')")
+            con.executemany('INSERT INTO donelist(date, course, duration) VALUES (?, ?, ?)', [
+                ('2019-04-01', 'python', '2'),
+                ('2019-04-01', 'python', '3'),
+                ('2019-04-02', 'python', '1'),
+            ])
+        con.close()
+
+    def tearDown(self):
+        """ Remove the database. """
+        remove_db(self._db_path, self._db_name)
+
+    def test_migrate(self):
+        """ Test migrate()
+
+        Assert:
+            * A database of version 0 is upgraded to SCHEMA_VERSION in place.
+            * The records registered twice are merged into the first one
+              with the sum of their durations.
+            * The durations are converted to minutes.
+            * The indexes on donelist are created.
+            * The calendar buckets of the existing records are filled.
+            * Migrating an up-to-date database does nothing.
+        """
+        database = Database(self._db_name)
+        self.assertEqual(migration.get_version(database.con), 0)
+        self.assertEqual(database.migrate(), migration.SCHEMA_VERSION)
+        self.assertEqual(migration.get_version(database.con), migration.SCHEMA_VERSION)
+
+        records = database.cur.execute(
+            'SELECT date, course.name, duration FROM donelist '
+            'INNER JOIN course ON course.id = donelist.course_id ORDER BY donelist.id').fetchall()
+        self.assertEqual(records, [('2019-04-01', 'python', 300), ('2019-04-02', 'python', 60)])
+
+        indexes = database.cur.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'donelist'")
+        indexes = [index[0] for index in indexes]
+        self.assertIn('donelist_date_course', indexes)
+        self.assertIn('donelist_course_date', indexes)
+
+        plan = database.cur.execute(
+            'EXPLAIN QUERY PLAN SELECT 1 FROM donelist WHERE date=? AND course_id=?',
+            ('2019-04-01', 1)).fetchall()
+        self.assertIn('donelist_date_course', str(plan))
+
+        buckets = database.cur.execute(
+            'SELECT year, month, week, weekday FROM donelist ORDER BY id').fetchall()
+        self.assertEqual(buckets, [('2019', '2019-04', '2019-W14', '1'),
+                                   ('2019', '2019-04', '2019-W14', '2')])
+
+        self.assertEqual(database.migrate(), migration.SCHEMA_VERSION)
+        database.close_db()
+
+    def test_normalize_course(self):
+        """ Test the migration of donelist.course to course_id
+
+        Assert:
+            * The course of a record which is not registered is registered.
+            * The records refer to the courses by id and the rollups match them.
+            * The records of a course are removed with it.
+        """
+        con = sqlite3.connect(self._db_name)
+        with con:
+            con.execute("INSERT INTO donelist(date, course, duration) "
+                        "VALUES ('2019-04-03', 'music', '30m')")
+        con.close()
+
+        database = Database(self._db_name)
+        database.migrate()
+
+        self.assertEqual([course.name for course in database.show('course')], ['python', 'music'])
+        self.assertEqual(database.show('donelist')[-1], (4, '2019-04-03', 'music', 0.5))
+        self.assertFalse(any(database.check_rollups().values()))
+        self.assertEqual(database.get_total_hours_course(), [('music', 0.5), ('python', 6.0)])
+
+        database.remove_course('music')
+        self.assertEqual(len(database.show('donelist')), 2)
+        self.assertEqual(database.get_total_hours(), [('Total: ', 6.0)])
+        database.close_db()
+
+    def test_migrate_in_order(self):
+        """ Test migrate() from a database upgraded to version 4
+
+        Assert:
+            * The migrations up to version 4 keep the rollups per course name.
+            * The upgrade to version 5 recreates the rollups per course id.
+        """
+        con = sqlite3.connect(self._db_name)
+        with con:
+            for version, upgrade in enumerate(migration.MIGRATIONS[:4], 1):
+                upgrade(con)
+                con.execute('PRAGMA user_version = {:d}'.format(version))
+            con.execute("INSERT INTO donelist(date, course, duration) "
+                        "VALUES ('2019-04-02', 'music', 30)")
+        rollups = con.execute('SELECT course, day, minutes, records FROM rollup_day '
+                              'ORDER BY day, course').fetchall()
+        self.assertEqual(rollups,
+                         [('python', '2019-04-01', 300, 1), ('music', '2019-04-02', 30, 1),
+                          ('python', '2019-04-02', 60, 1)])
+        con.close()
+
+        database = Database(self._db_name)
+        self.assertEqual(database.migrate(), migration.SCHEMA_VERSION)
+        rollups = database.cur.execute(
+            'SELECT course.name, day, minutes, records FROM rollup_day '
+            'INNER JOIN course ON course.id = rollup_day.course_id ORDER BY day, name').fetchall()
+        self.assertEqual(rollups,
+                         [('python', '2019-04-01', 300, 1), ('music', '2019-04-02', 30, 1),
+                          ('python', '2019-04-02', 60, 1)])
+        self.assertFalse(any(database.check_rollups().values()))
+        database.close_db()
+
+    def test_merge_duplicates(self):
+        """ Test the merge of the records registered twice
+
+        Assert:
+            * The durations of all the records of a date and course are
+              summed up into the first one, whatever their format.
+            * The duplicate records whose duration cannot be parsed are
+              moved to donelist_invalid with a warning of their ids.
+        """
+        con = sqlite3.connect(self._db_name)
+        with con:
+            con.executemany('INSERT INTO donelist(date, course, duration) VALUES (?, ?, ?)', [
+                ('2019-04-02', 'python', '1h30m'),
+                ('2019-04-01', 'python', '45m'),
+                ('2019-04-03', 'python', 'long'),
+                ('2019-04-03', 'python', '1'),
+            ])
+        con.close()
+
+        database = Database(self._db_name)
+        with self.assertWarnsRegex(RuntimeWarning, 'id: 6$'):
+            database.migrate()
+        records = database.cur.execute(
+            'SELECT id, date, duration FROM donelist ORDER BY id').fetchall()
+        self.assertEqual(records, [(1, '2019-04-01', 345), (3, '2019-04-02', 150),
+                                   (7, '2019-04-03', 60)])
+        invalid = database.cur.execute('SELECT * FROM donelist_invalid').fetchall()
+        self.assertEqual(invalid, [(6, '2019-04-03', 'python', 'long')])
+        self.assertFalse(any(database.check_rollups().values()))
+        database.close_db()
+
+    def test_migrate_invalid_duration(self):
+        """ Test migrate() with a duration which cannot be parsed
+
+        Assert:
+            * The migrations are applied to the other records.
+            * The record is moved to donelist_invalid with a warning of its id.
+        """
+        database = Database(self._db_name)
+        with database.con:
+            database.cur.execute("UPDATE donelist SET duration = 'long' WHERE id = 3")
+
+        with self.assertWarnsRegex(RuntimeWarning, 'id: 3$'):
+            database.migrate()
+
+        self.assertEqual(migration.get_version(database.con), migration.SCHEMA_VERSION)
+        records = database.cur.execute('SELECT id, duration FROM donelist ORDER BY id').fetchall()
+        self.assertEqual(records, [(1, 300)])
+        invalid = database.cur.execute('SELECT * FROM donelist_invalid').fetchall()
+        self.assertEqual(invalid, [(3, '2019-04-02', 'python', 'long')])
+        database.close_db()
+
+    def test_migrate_newer_schema(self):
+        """ Test migrate() with a database newer than geekhours
+
+        Assert RuntimeError is raised and the database is left untouched.
+        """
+        database = Database(self._db_name)
+        database.cur.execute('PRAGMA user_version = {:d}'.format(migration.SCHEMA_VERSION + 1))
+
+        with self.assertRaises(RuntimeError):
+            database.migrate()
+        self.assertEqual(migration.get_version(database.con), migration.SCHEMA_VERSION + 1)
+        database.close_db()
+
+    def test_migrate_rollback(self):
+        """ Test migrate() with a failing migration
+
+        Assert the failed migration is rolled back and the version is kept.
+        """
+
+        def broken(con):
+            con.execute('DELETE FROM donelist')
+            raise sqlite3.OperationalError('broken migration')
+
+        database = Database(self._db_name)
+        migrations = migration.MIGRATIONS[:]
+        migration.MIGRATIONS[0] = broken
+        try:
+            with self.assertRaises(sqlite3.OperationalError):
+                database.migrate()
+        finally:
+            migration.MIGRATIONS[:] = migrations
+
+        self.assertEqual(migration.get_version(database.con), 0)
+        self.assertEqual(database.cur.execute('SELECT COUNT(*) FROM donelist').fetchone(), (3,))
+        database.close_db()
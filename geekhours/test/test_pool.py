@@ -0,0 +1,112 @@
+""" Unit test for pool module. """
+
+import sqlite3
+import threading
+import unittest
+from datetime import date, timedelta
+from geekhours.pool import DatabasePool
+from geekhours.util import create_db, remove_db
+
+
+class TestPool(unittest.TestCase):
+    """ Test cases of the unit test for pool module """
+
+    def setUp(self):
+        """ Create a pool of a database with a course. """
+        self._db_path, self._db_name = create_db()
+        self.pool = DatabasePool(self._db_name, readers=4)
+        with self.pool.writer() as database:
+            database.insert_course(['python'])
+
+    def tearDown(self):
+        """ Close the pool and remove the database. """
+        self.pool.close()
+        remove_db(self._db_path, self._db_name)
+
+    def test_reader_and_writer(self):
+        """ Test reader() and writer()
+
+        Assert:
+            * The readers reject writes.
+            * The writes of a block raising an exception are rolled back.
+            * A reader reads a snapshot until the end of its block.
+            * reader() raises TimeoutError if no reader is free in time.
+        """
+        with self.assertRaises(sqlite3.OperationalError):
+            with self.pool.reader() as database:
+                database.insert_donelist_many([('2019-04-01', 'python', '1')])
+
+        with self.assertRaises(ZeroDivisionError):
+            with self.pool.writer() as database:
+                database.insert_donelist_many([('2019-04-01', 'python', '1')])
+                raise ZeroDivisionError
+
+        with self.pool.reader() as database:
+            self.assertEqual(database.get_total_hours(), [('Total: ', None)])
+            with self.pool.writer() as writer:
+                writer.insert_donelist_many([('2019-04-02', 'python', '2')])
+            self.assertEqual(database.get_total_hours(), [('Total: ', None)])
+
+        with self.pool.reader() as database:
+            self.assertEqual(database.get_total_hours(), [('Total: ', 2)])
+
+        pool = DatabasePool(self._db_name, readers=1)
+        with pool.reader():
+            with self.assertRaises(TimeoutError):
+                with pool.reader(timeout=0.01):
+                    pass
+        pool.close()
+        with self.assertRaises(RuntimeError):
+            with pool.writer():
+                pass
+
+    def test_stress(self):
+        """ Stress test with reader threads and a writer thread
+
+        Assert:
+            * No thread fails and every write is read at the end.
+            * Each reader sees the number of records only grow.
+            * The readers and the writer make progress at the same time.
+        """
+        writes = 50
+        errors = []
+        reads = []
+        stop = threading.Event()
+
+        def write():
+            try:
+                first = date(2019, 1, 1)
+                for day in range(writes):
+                    with self.pool.writer() as database:
+                        database.insert_donelist_many([((first + timedelta(days=day)).isoformat(),
+                                                        'python', '30m')])
+            except Exception as error:  # pylint: disable=broad-except
+                errors.append(error)
+            finally:
+                stop.set()
+
+        def read():
+            counts = []
+            try:
+                while not stop.is_set():
+                    with self.pool.reader() as database:
+                        counts.append(len(database.show('donelist')))
+                        database.get_total_hours_by('month')
+            except Exception as error:  # pylint: disable=broad-except
+                errors.append(error)
+            reads.append(counts)
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        threads.append(threading.Thread(target=write))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        with self.pool.reader() as database:
+            self.assertEqual(len(database.show('donelist')), writes)
+        for counts in reads:
+            self.assertEqual(counts, sorted(counts))
+        # Some reads saw the writes in progress.
+        self.assertTrue(any(0 < count < writes for counts in reads for count in counts))
@@ -0,0 +1,90 @@
+""" Unit test for report module. """
+
+import sqlite3
+import unittest
+from geekhours.database import Database
+from geekhours.report import Report, read_partial
+from geekhours.util import create_db, remove_db
+
+
+class TestReport(unittest.TestCase):
+    """ Test cases of the unit test for report module """
+
+    def setUp(self):
+        """ Create two databases of different members. """
+        self._dbs = [create_db() for _ in range(2)]
+        records = [
+            [('2019-04-01', 'python', '1h'), ('2019-04-30', 'art', '30m')],
+            [('2019-04-01', 'python', '30m'), ('2019-05-02', 'python', '1h')],
+        ]
+        for (_, db_name), rows in zip(self._dbs, records):
+            database = Database(db_name)
+            database.create_table()
+            database.insert_course(['python', 'art'])
+            database.insert_donelist_many(rows)
+            database.close_db()
+        self.db_names = [db_name for _, db_name in self._dbs]
+
+    def tearDown(self):
+        """ Remove the databases. """
+        for db_path, db_name in self._dbs:
+            remove_db(db_path, db_name)
+
+    def test_from_databases(self):
+        """ Test from_databases()
+
+        Assert:
+            * The totals of the databases are summed up per course, day and month.
+            * The worker processes return the same report as a single process.
+            * The filters are applied to every database.
+        """
+        expected = {
+            'databases': 2,
+            'total_hours': {
+                'Total: ': 3.0
+            },
+            'total_hours_per_course': {
+                'art': 0.5,
+                'python': 2.5
+            },
+            'total_hours_per_day': {
+                '2019-04-01': 1.5,
+                '2019-04-30': 0.5,
+                '2019-05-02': 1.0
+            },
+            'total_hours_per_month': {
+                '2019-04': 2.0,
+                '2019-05': 1.0
+            },
+        }
+        self.assertEqual(Report.from_databases(self.db_names, jobs=1).to_dict(), expected)
+        self.assertEqual(Report.from_databases(self.db_names, jobs=2).to_dict(), expected)
+
+        res = Report.from_databases(self.db_names, 'python', until='2019-04-30', jobs=2)
+        self.assertEqual(res.to_dict()['total_hours'], {'Total: ': 1.5})
+        self.assertEqual(Report.from_databases([]).to_dict()['total_hours'], {'Total: ': None})
+
+    def test_read_partial(self):
+        """ Test read_partial()
+
+        Assert:
+            * The database is not written.
+            * The records of a list of courses are read.
+            * ValueError is raised for an invalid date, a missing database
+              and a database of an older schema.
+        """
+        con = sqlite3.connect(self.db_names[0])
+        before = con.execute('PRAGMA data_version').fetchone()
+        self.assertEqual(read_partial(self.db_names[0])['total'], 90)
+        self.assertEqual(con.execute('PRAGMA data_version').fetchone(), before)
+        self.assertEqual(read_partial(self.db_names[0], ['art', 'music'])['course'], {'art': 30})
+
+        with self.assertRaises(ValueError):
+            read_partial(self.db_names[0], since='April')
+        with self.assertRaises(ValueError):
+            read_partial(self.db_names[0] + '.missing')
+
+        con.execute('PRAGMA user_version = 3')
+        con.close()
+        with self.assertRaises(ValueError):
+            read_partial(self.db_names[0])
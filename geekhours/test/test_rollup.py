@@ -0,0 +1,143 @@
+""" Unit test for rollup module. """
+
+import unittest
+from geekhours.database import Database
+from geekhours.util import create_db, remove_db
+
+
+class TestRollup(unittest.TestCase):
+    """ Test cases of the unit test for rollup module """
+
+    def setUp(self):
+        """ Create a database with courses. """
+        self._db_path, self._db_name = create_db()
+        self.database = Database(self._db_name)
+        self.database.create_table()
+        self.database.insert_course(['python', 'art'])
+
+    def tearDown(self):
+        """ Remove the database. """
+        self.database.close_db()
+        remove_db(self._db_path, self._db_name)
+
+    def rollup(self, table: str):
+        """ Return the rows of a rollup table with the course names. """
+        names = dict(self.database.cur.execute('SELECT id, name FROM course'))
+        rows = self.database.cur.execute('SELECT * FROM {}'.format(table))
+        return sorted((names[row[0]],) + row[1:] for row in rows)
+
+    def test_triggers(self):
+        """ Test the triggers on donelist
+
+        Assert the rollup tables follow INSERT, UPDATE and DELETE of donelist.
+        """
+        self.database.insert_donelist('2019-04-01', 'python', '1')
+        self.database.insert_donelist('2019-04-02', 'python', '30m')
+        self.database.insert_donelist('2019-04-01', 'art', '2')
+
+        self.assertEqual(self.rollup('rollup_day'), [('art', '2019-04-01', 120, 1),
+                                                     ('python', '2019-04-01', 60, 1),
+                                                     ('python', '2019-04-02', 30, 1)])
+        self.assertEqual(self.rollup('rollup_week'), [('art', '2019-W14', 120, 1),
+                                                      ('python', '2019-W14', 90, 2)])
+        self.assertEqual(self.rollup('rollup_month'), [('art', '2019-04', '1', 120, 1),
+                                                       ('python', '2019-04', '1', 60, 1),
+                                                       ('python', '2019-04', '2', 30, 1)])
+
+        with self.database.con:
+            self.database.cur.execute(
+                "UPDATE donelist SET date = '2019-05-05', duration = 45 WHERE date = '2019-04-02'")
+        self.database.remove_donelist('2019-04-01', 'art')
+
+        self.assertEqual(self.rollup('rollup_day'), [('python', '2019-04-01', 60, 1),
+                                                     ('python', '2019-05-05', 45, 1)])
+        self.assertEqual(self.rollup('rollup_week'), [('python', '2019-W14', 60, 1),
+                                                      ('python', '2019-W18', 45, 1)])
+        self.assertEqual(self.rollup('rollup_month'), [('python', '2019-04', '1', 60, 1),
+                                                       ('python', '2019-05', '0', 45, 1)])
+        self.assertEqual(self.database.check_rollups(), {
+            'rollup_day': 0,
+            'rollup_week': 0,
+            'rollup_month': 0
+        })
+
+    def test_iso_week(self):
+        """ Test the ISO weeks of rollup_week
+
+        Assert the days around the new year belong to the ISO year of the week.
+        """
+        weeks = {
+            '2018-12-31': '2019-W01',
+            '2019-12-29': '2019-W52',
+            '2019-12-30': '2020-W01',
+            '2021-01-03': '2020-W53',
+            '2021-01-04': '2021-W01',
+        }
+        self.database.insert_donelist_many((date, 'python', '1') for date in weeks)
+        rows = self.database.cur.execute('SELECT week FROM rollup_week ORDER BY week')
+        self.assertEqual([row[0] for row in rows], sorted(set(weeks.values())))
+
+    def test_check_and_rebuild_rollups(self):
+        """ Test check_rollups() and rebuild_rollups()
+
+        Assert a rollup table which differs from donelist is reported by
+        check_rollups() and fixed by rebuild_rollups().
+        """
+        self.database.insert_donelist('2019-04-01', 'python', '1')
+        self.database.insert_donelist('2019-04-08', 'python', '1')
+
+        with self.database.con:
+            self.database.cur.execute('UPDATE rollup_month SET minutes = 0')
+            self.database.cur.execute("DELETE FROM rollup_day WHERE day = '2019-04-08'")
+
+        self.assertEqual(self.database.check_rollups(), {
+            'rollup_day': 1,
+            'rollup_week': 0,
+            'rollup_month': 2
+        })
+        self.database.rebuild_rollups()
+        self.assertFalse(any(self.database.check_rollups().values()))
+        self.assertEqual(self.database.get_total_hours(), [('Total: ', 2)])
+
+    def test_remove_course(self):
+        """ Test the rollup tables with remove_course()
+
+        Assert the records removed with the course are subtracted from the
+        rollup tables by the triggers.
+        """
+        self.database.insert_donelist('2019-04-01', 'python', '1')
+        self.database.insert_donelist('2019-04-01', 'art', '2')
+        self.database.remove_course('art')
+
+        self.assertEqual(self.rollup('rollup_day'), [('python', '2019-04-01', 60, 1)])
+        self.assertFalse(any(self.database.check_rollups().values()))
+        self.assertEqual(self.database.get_total_hours(), [('Total: ', 1)])
+
+    def test_insert_donelist_many(self):
+        """ Test the rollup tables with insert_donelist_many()
+
+        Assert:
+            * The rollup tables are updated per batch and match donelist.
+            * The triggers are restored after the insertion, and kept when
+              the insertion fails.
+        """
+        self.database.insert_donelist('2019-04-01', 'python', '1')
+        records = [('2019-04-{:02d}'.format(day), course, '30m') for day in range(1, 31)
+                   for course in ['python', 'art']]
+        self.database.insert_donelist_many(records, batch_size=7)
+        self.assertFalse(any(self.database.check_rollups().values()))
+        self.assertEqual(self.database.get_total_hours(), [('Total: ', 30.5)])
+
+        def failing():
+            yield ('2019-05-01', 'python', '1')
+            raise KeyError('broken input')
+
+        with self.assertRaises(KeyError):
+            self.database.insert_donelist_many(failing(), batch_size=1)
+
+        triggers = self.database.cur.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        self.assertEqual(len(triggers.fetchall()), 5)
+        self.database.insert_donelist('2019-05-02', 'art', '1')
+        self.assertFalse(any(self.database.check_rollups().values()))
+        self.assertEqual(self.database.get_total_hours(), [('Total: ', 31.5)])
@@ -0,0 +1,134 @@
+""" Unit test for server and client modules. """
+
+import contextlib
+import io
+import json
+import os
+import socket
+import threading
+import time
+import unittest
+from geekhours import client
+from geekhours.command import Command
+from geekhours.result import Course, CourseResult, DoneRecord
+from geekhours.server import Server, serve
+from geekhours.util import create_db, remove_db
+
+
+class TestServer(unittest.TestCase):
+    """ Test cases of the unit test for server and client modules """
+
+    def setUp(self):
+        """ Serve a database on a thread. """
+        self._db_path, self._db_name = create_db()
+        self.thread = threading.Thread(target=serve, args=(self._db_name,))
+        self.thread.start()
+        for _ in range(100):
+            self.remote = client.connect(self._db_name)
+            if self.remote:
+                break
+            time.sleep(0.05)
+
+    def tearDown(self):
+        """ Stop the daemon and remove the database. """
+        client.stop(self._db_name)
+        self.thread.join()
+        remove_db(self._db_path, self._db_name)
+
+    def test_remote_command(self):
+        """ Test RemoteCommand
+
+        Assert:
+            * The results are the same as the ones of Command, including
+              the named tuples of the records.
+            * What the daemon prints is printed by the client.
+            * The exceptions of the daemon are raised by the client.
+            * Only the methods of METHODS are served.
+        """
+        self.assertEqual(self.remote.insert_course(['python', 'art']),
+                         CourseResult(['python', 'art'], []))
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.remote.insert_donelist('2019-04-01', 'python', '1h')
+        self.assertEqual(output.getvalue(), "Add '2019-04-01 python 1h' in donelist.\n")
+
+        self.assertEqual(self.remote.show('donelist'), [(1, '2019-04-01', 'python', 1.0)])
+        self.assertEqual([type(record) for record in self.remote.show('donelist')], [DoneRecord])
+        self.assertEqual(self.remote.show(arg='course')[1].name, 'art')
+        self.assertEqual([type(record) for record in self.remote.show('course')], [Course, Course])
+        self.assertEqual(self.remote.query_donelist(course='python')[0].duration, 1.0)
+        self.assertEqual(self.remote.show_total_hours_by('month', since='2019-01-01'),
+                         {'total_hours_per_month': {
+                             '2019-04': 1.0
+                         }})
+
+        with self.assertRaises(RuntimeError):
+            self.remote.remove_course('math')
+        with self.assertRaises(ValueError):
+            self.remote.query_donelist(since='April')
+        with self.assertRaises(AttributeError):
+            self.remote.import_donelist('records.csv')
+        with self.assertRaises(ValueError):
+            self.remote.call('close_db')
+
+    def test_invalid_request(self):
+        """ Test a request which is not a JSON object
+
+        Assert the daemon answers with a ValueError instead of dropping the
+        connection.
+        """
+        for line in [b'{"method": \n', b'["show"]\n', b'\xff\n']:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(10)
+            sock.connect(client.socket_path(self._db_name))
+            with sock, sock.makefile('rb') as stream:
+                sock.sendall(line)
+                response = json.loads(stream.readline().decode('utf-8'))
+            self.assertEqual(response['error']['type'], 'ValueError')
+            self.assertIsNone(response['result'])
+
+    def test_idle_client(self):
+        """ Test a client which connects and sends nothing
+
+        Assert:
+            * The daemon closes the idle connection after its timeout.
+            * The request of another client is answered in the meantime.
+        """
+        idle = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        idle.connect(client.socket_path(self._db_name))
+
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(self.remote.insert_course(['python'])))
+        try:
+            thread.start()
+            thread.join(10)
+            self.assertFalse(thread.is_alive())
+            self.assertEqual(results, [CourseResult(['python'], [])])
+
+            idle.settimeout(10)
+            self.assertEqual(idle.recv(1), b'')
+        finally:
+            idle.close()
+
+    def test_socket(self):
+        """ Test the socket of the daemon
+
+        Assert:
+            * Only the owner can connect to the socket.
+            * A second daemon of the same database is refused.
+            * The socket is removed when the daemon stops.
+        """
+        path = client.socket_path(self._db_name)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+        command = Command(self._db_name)
+        with self.assertRaises(RuntimeError):
+            Server(self._db_name, command)
+        command.database.close_db()
+
+        self.assertTrue(client.stop(self._db_name))
+        self.thread.join()
+        self.assertFalse(os.path.exists(path))
+        self.assertIsNone(client.connect(self._db_name))
+        self.assertFalse(client.stop(self._db_name))
@@ -0,0 +1,75 @@
+""" Unit test for snapshot module. """
+
+import mmap
+import os
+import sys
+import unittest
+from array import array
+from unittest import mock
+from geekhours.database import Database
+from geekhours.snapshot import Snapshot
+from geekhours.util import create_db, remove_db
+
+
+class TestSnapshot(unittest.TestCase):
+    """ Test cases of the unit test for snapshot module """
+
+    def setUp(self):
+        """ Create a database with records. """
+        self._db_path, self._db_name = create_db()
+        self.database = Database(self._db_name)
+        self.database.create_table()
+        self.database.insert_course(['python', 'art'])
+        self.database.insert_donelist_many([('2019-04-02', 'python', '1h30m'),
+                                            ('2019-04-01', 'art', '15m'),
+                                            ('2019-04-01', 'python', '2')])
+        self.path = os.path.join(self._db_path, 'records.snapshot')
+
+    def tearDown(self):
+        """ Remove the snapshot and the database. """
+        self.database.close_db()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        remove_db(self._db_path, self._db_name)
+
+    def test_save_and_load(self):
+        """ Test save() and load()
+
+        Assert:
+            * The records are loaded in the order of date and course id as
+              Database.query_donelist() returns them.
+            * The columns are read in place from the mapped file.
+            * A file of the other byte order is loaded.
+            * An existing file is not overwritten and a file which is not
+              a snapshot is refused.
+        """
+        snapshot = Snapshot.from_database(self.database)
+        self.assertEqual(snapshot.names, ['python', 'art'])
+        snapshot.save(self.path)
+        with self.assertRaises(FileExistsError):
+            snapshot.save(self.path)
+
+        expected = [record[1:] for record in self.database.query_donelist()]
+        with Snapshot.load(self.path) as loaded:
+            self.assertEqual(list(loaded.records()), expected)
+            self.assertIsInstance(loaded.days, memoryview)
+            self.assertIsInstance(loaded.days.obj, mmap.mmap)
+            self.assertEqual(sum(loaded.durations), 225)
+        os.remove(self.path)
+
+        swapped = [
+            array(column.typecode, column)
+            for column in [snapshot.days, snapshot.courses, snapshot.durations]
+        ]
+        for column in swapped:
+            column.byteswap()
+        other = b'>' if sys.byteorder == 'little' else b'<'
+        with mock.patch('geekhours.snapshot.BYTE_ORDER', other):
+            Snapshot(*swapped, snapshot.names).save(self.path)
+        with Snapshot.load(self.path) as loaded:
+            self.assertEqual(list(loaded.records()), expected)
+
+        with open(self.path, 'wb') as out:
+            out.write(b'date,course,duration\n')
+        with self.assertRaises(ValueError):
+            Snapshot.load(self.path)
@@ -0,0 +1,87 @@
+""" Unit test for tuning module. """
+
+import os
+import sqlite3
+import unittest
+from unittest import mock
+from geekhours import tuning
+from geekhours.database import Database
+from geekhours.util import create_db, remove_db
+
+
+class TestTuning(unittest.TestCase):
+    """ Test cases of the unit test for tuning module """
+
+    def setUp(self):
+        """ Create a database without the config file and the environment variable. """
+        self._db_path, self._db_name = create_db()
+        self._config = tuning.config_path(self._db_name)
+        self._environ = mock.patch.dict(os.environ)
+        self._environ.start()
+        os.environ.pop(tuning.ENV_PROFILE, None)
+
+    def tearDown(self):
+        """ Remove the database and the config file. """
+        self._environ.stop()
+        if os.path.exists(self._config):
+            os.remove(self._config)
+        remove_db(self._db_path, self._db_name)
+
+    def write_config(self, *lines: str):
+        """ Write the config file of the database. """
+        with open(self._config, 'w') as config:
+            config.write('\n'.join(['[sqlite]'] + list(lines)))
+
+    def test_load(self):
+        """ Test load()
+
+        Assert:
+            * The profile argument is used before the environment variable,
+              the config file and DEFAULT_PROFILE in this order.
+            * The PRAGMAs of the config file override the profile.
+            * ValueError is raised for an unknown profile or an invalid PRAGMA.
+        """
+        self.assertEqual(tuning.load(self._db_name)[0], tuning.DEFAULT_PROFILE)
+
+        self.write_config('profile = fast', 'cache_size = -1024')
+        profile, pragmas = tuning.load(self._db_name)
+        self.assertEqual(profile, 'fast')
+        self.assertEqual(pragmas['synchronous'], 'NORMAL')
+        self.assertEqual(pragmas['cache_size'], '-1024')
+
+        os.environ[tuning.ENV_PROFILE] = 'readonly-report'
+        self.assertEqual(tuning.load(self._db_name)[0], 'readonly-report')
+        self.assertEqual(tuning.load(self._db_name, 'durable')[0], 'durable')
+
+        with self.assertRaises(ValueError):
+            tuning.load(self._db_name, 'unknown')
+
+        self.write_config('synchronous = NORMAL; DROP TABLE course')
+        with self.assertRaises(ValueError):
+            tuning.load(self._db_name)
+
+        self.write_config('page_size = 1024')
+        with self.assertRaises(ValueError):
+            tuning.load(self._db_name)
+
+    def test_apply(self):
+        """ Test the profiles applied by Database
+
+        Assert:
+            * 'durable' and 'fast' switch the database to WAL.
+            * 'readonly-report' rejects writes.
+        """
+        database = Database(self._db_name, 'fast')
+        database.create_table()
+        self.assertEqual(database.profile, 'fast')
+        self.assertEqual(database.cur.execute('PRAGMA journal_mode').fetchone(), ('wal',))
+        self.assertEqual(database.cur.execute('PRAGMA synchronous').fetchone(), (1,))
+        self.assertEqual(database.cur.execute('PRAGMA temp_store').fetchone(), (2,))
+        database.close_db()
+
+        database = Database(self._db_name, 'readonly-report')
+        database.create_table()
+        self.assertEqual(database.show('course'), [])
+        with self.assertRaises(sqlite3.OperationalError):
+            database.insert_course(['python'])
+        database.close_db()
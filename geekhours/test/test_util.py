@@ -0,0 +1,40 @@
+""" Unit test for util module. """
+
+import unittest
+from geekhours.util import parse_duration
+
+
+class TestUtil(unittest.TestCase):
+    """ Test cases of the unit test for util module """
+
+    def test_parse_duration(self):
+        """ Test parse_duration()
+
+        Assert:
+            * Numbers are taken as hours and returned in minutes.
+            * Hours and minutes suffixed with 'h' and 'm' are parsed.
+            * None is returned as is.
+            * ValueError is raised for an invalid or non-positive duration.
+        """
+        durations = {
+            1: 60,
+            1.5: 90,
+            '1': 60,
+            '1.5': 90,
+            ' 2 ': 120,
+            '90m': 90,
+            '1h30m': 90,
+            '1.5h': 90,
+            '2H': 120,
+            '0.25': 15,
+        }
+        for duration, minutes in durations.items():
+            self.assertEqual(parse_duration(duration), minutes)
+
+        self.assertIsNone(parse_duration(None))
+
+        for duration in [
+                '', 'h', 'm', 'abc', '1h30', '30m1h', '0', '-1', '0m', 'nan', 'inf', True, [1]
+        ]:
+            with self.assertRaises(ValueError):
+                parse_duration(duration)
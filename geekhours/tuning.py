@@ -0,0 +1,115 @@
+""" tuning.py is a module to apply a tuning profile of SQLite on connect.
+
+A profile is a set of PRAGMAs applied to every connection of Database.
+It is selected in the following order:
+
+1. The profile argument of Database.
+2. The GEEKHOURS_PROFILE environment variable.
+3. The 'profile' option of the config file next to the database, which is
+   '~/.geekhours.conf' for '~/.geekhours.db'.
+4. DEFAULT_PROFILE.
+
+The config file may also override each PRAGMA of the profile.
+
+    [sqlite]
+    profile = fast
+    cache_size = -16384
+
+journal_mode is stored in the database file, so it is kept by the
+connections of the profiles which do not set it.
+"""
+
+__all__ = ['PROFILES', 'DEFAULT_PROFILE', 'ENV_PROFILE', 'config_path', 'load', 'apply']
+
+import configparser
+import os
+import re
+import sqlite3
+from collections import OrderedDict
+from typing import Tuple
+
+# 64 MiB of page cache (negative values are in KiB) and memory map.
+CACHE_SIZE = -65536
+MMAP_SIZE = 67108864
+
+PROFILES = {
+    # Rollback journal, the default of SQLite. Readers block writers.
+    'rollback': [('journal_mode', 'DELETE'), ('synchronous', 'FULL')],
+    # Every commit is on disk before it returns. Readers do not block writers.
+    'durable': [('journal_mode', 'WAL'), ('synchronous', 'FULL')],
+    # The last commits may be lost on power failure, but never corrupt the database.
+    'fast': [('journal_mode', 'WAL'), ('synchronous', 'NORMAL'), ('cache_size', CACHE_SIZE),
+             ('mmap_size', MMAP_SIZE), ('temp_store', 'MEMORY')],
+    # For the reports: any write is rejected.
+    'readonly-report': [('query_only', 'ON'), ('cache_size', CACHE_SIZE), ('mmap_size', MMAP_SIZE),
+                        ('temp_store', 'MEMORY')],
+}
+
+DEFAULT_PROFILE = 'durable'
+
+ENV_PROFILE = 'GEEKHOURS_PROFILE'
+
+CONFIG_SECTION = 'sqlite'
+
+INTEGER = re.compile(r'^-?[0-9]+$')
+
+# Values accepted by each PRAGMA. None is any integer.
+PRAGMAS = {
+    'journal_mode': ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'),
+    'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA', '0', '1', '2', '3'),
+    'temp_store': ('DEFAULT', 'FILE', 'MEMORY', '0', '1', '2'),
+    'query_only': ('ON', 'OFF', 'TRUE', 'FALSE', 'YES', 'NO', '1', '0'),
+    'cache_size': None,
+    'mmap_size': None,
+    'busy_timeout': None,
+}
+
+
+def config_path(db_name: str) -> str:
+    """ Return the path of the config file of the database. """
+    return os.path.splitext(db_name)[0] + '.conf'
+
+
+def _validate(pragma: str, value) -> str:
+    """ Return the value of pragma as a string, or raise ValueError. """
+    if pragma not in PRAGMAS:
+        raise ValueError('Unknown PRAGMA: {}'.format(pragma))
+
+    value = str(value).strip().upper()
+    choices = PRAGMAS[pragma]
+
+    if (choices is None and not INTEGER.match(value)) or (choices and value not in choices):
+        raise ValueError('Invalid value of PRAGMA {}: {}'.format(pragma, value))
+
+    return value
+
+
+def load(db_name: str, profile: str = None) -> Tuple[str, OrderedDict]:
+    """ Return the name and the PRAGMAs of the tuning profile of the database.
+
+    Raises:
+        ValueError: The profile or a PRAGMA of the config file is invalid.
+    """
+    config = configparser.ConfigParser()
+    if db_name != ':memory:':
+        config.read(config_path(db_name))
+    options = config[CONFIG_SECTION] if config.has_section(CONFIG_SECTION) else {}
+
+    profile = profile or os.environ.get(ENV_PROFILE) or options.get('profile') or DEFAULT_PROFILE
+    if profile not in PROFILES:
+        raise ValueError('No such profile: {}. Choose from {}.'.format(
+            profile, ', '.join(sorted(PROFILES))))
+
+    pragmas = OrderedDict(PROFILES[profile])
+    for pragma, value in options.items():
+        if pragma != 'profile':
+            pragmas[pragma] = value
+
+    return profile, OrderedDict(
+        (pragma, _validate(pragma, value)) for pragma, value in pragmas.items())
+
+
+def apply(con: sqlite3.Connection, pragmas: OrderedDict):
+    """ Apply the PRAGMAs returned by load() to a connection. """
+    for pragma, value in pragmas.items():
+        con.execute('PRAGMA {} = {}'.format(pragma, value)).fetchall()
@@ -1,8 +1,11 @@
 """ Common Utilities """
 
-from os import remove, rmdir
+import re
+from os import path, remove, rmdir
 from tempfile import mkstemp, mkdtemp
 
+DURATION_PATTERN = re.compile(r'^(?:([0-9]+(?:\.[0-9]*)?)h)?(?:([0-9]+(?:\.[0-9]*)?)m)?$')
+
 
 def create_db():
     """ Create temporary database. """
@@ -13,6 +16,52 @@ def create_db():
 
 
 def remove_db(db_path: str, db_name: str):
-    """ Remove temporary database. """
+    """ Remove temporary database and its WAL files. """
     remove(db_name)
+    for suffix in ['-wal', '-shm']:
+        if path.exists(db_name + suffix):
+            remove(db_name + suffix)
     rmdir(db_path)
+
+
+def parse_duration(duration) -> int:
+    """ Parse a study time and return it in minutes.
+
+    A number is taken as hours. A string is either a number of hours or
+    hours and/or minutes suffixed with 'h' and 'm'.
+
+    e.g.
+    1, '1' -> 60
+    1.5, '1.5', '1h30m', '90m' -> 90
+
+    None is returned as is so that the NOT NULL constraint rejects it.
+
+    Raises:
+        ValueError: The duration is not a positive study time.
+    """
+    if duration is None:
+        return None
+
+    if isinstance(duration, (int, float)) and not isinstance(duration, bool):
+        minutes = duration * 60
+    elif isinstance(duration, str):
+        duration = duration.strip().lower()
+        try:
+            minutes = float(duration) * 60
+        except ValueError:
+            match = DURATION_PATTERN.match(duration)
+            if not duration or not match:
+                raise ValueError('Invalid duration: {}'.format(duration))
+            hours, mins = match.groups()
+            minutes = float(hours or 0) * 60 + float(mins or 0)
+    else:
+        raise ValueError('Invalid duration: {}'.format(duration))
+
+    if not minutes > 0 or minutes == float('inf'):
+        raise ValueError('The duration must be a positive study time.')
+
+    minutes = int(round(minutes))
+    if minutes < 1:
+        raise ValueError('The duration must be at least one minute.')
+
+    return minutes
@@ -23,7 +23,10 @@ pkginfo_platforms = __pkginfo__['platforms']
 pkginfo_python_requires = __pkginfo__['python_requires']
 pkginfo_classifiers = __pkginfo__['classifiers']
 pkginfo_description = __pkginfo__['description']
-pkginfo_long_description = __pkginfo__['long_description']
+
+# README.md is read here rather than in __pkginfo__, which is imported by bin/geekhours.
+with open(str(base_dir.joinpath('README.md'))) as fh:
+    pkginfo_long_description = fh.read()
 
 setup(
     name=pkginfo_name,